@@ -0,0 +1,74 @@
+"""
+CPU cost per document of list endpoints: validated path (parse_obj + FastAPI response validation + json)
+against trusted path (construct_trusted + orjson), on 100 documents like a single list page.
+Run from repo root: python -m benchmarks.decode
+"""
+import asyncio
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.core.models.AlarmModel import AlarmModel
+from src.core.models.NoteModel import NoteModel
+from src.core.models.ThemeModel import ThemeModel
+from src.core.models.trusted import construct_trusted
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+
+def alarm_document() -> dict:
+    now = datetime.now()
+    return {
+        "_id": str(ObjectId()), "name": "alarm", "description": "description", "is_repeatable": True,
+        "status": "QUEUE", "links": {"user_id": "123456789", "parent_id": str(ObjectId())},
+        "times": {"creation_time": now, "next_notion_time": now, "end_time": None, "repeat_interval": 60,
+                  "due_at_utc": now}
+    }
+
+
+def note_document() -> dict:
+    return {
+        "_id": str(ObjectId()), "name": "note",
+        "links": {"user_id": "123456789", "theme_id": str(ObjectId())},
+        "data": {"text": "text", "attachments": [],
+                 "check_points": [{"text": "point", "is_finish": False} for _ in range(5)]},
+        "times": {"creation_time": datetime.now(), "end_time": None}
+    }
+
+
+def theme_document() -> dict:
+    return {"_id": str(ObjectId()), "name": "theme", "description": "description", "links": {"user_id": "123456789"}}
+
+
+def validated_path(model, documents: list[dict], loop: asyncio.AbstractEventLoop) -> bytes:
+    items = [model.parse_obj(document) for document in documents]
+    field = create_response_field(name="response", type_=list[model])
+    content = loop.run_until_complete(serialize_response(field=field, response_content=items))
+    return JSONResponse(content).body
+
+
+def trusted_path(model, documents: list[dict]) -> bytes:
+    items = [construct_trusted(model, document) for document in documents]
+    return ORJSONResponse([item.dict(by_alias=True) for item in items]).body
+
+
+def main() -> None:
+    loop = asyncio.new_event_loop()
+    print(f"{'model':<12}{'validated us/doc':>18}{'trusted us/doc':>18}{'saved':>10}")
+    for model, factory in ((AlarmModel, alarm_document), (NoteModel, note_document), (ThemeModel, theme_document)):
+        documents = [factory() for _ in range(PAGE_SIZE)]
+        validated = min(timeit.repeat(lambda: validated_path(model, documents, loop), number=ROUNDS // 10, repeat=10))
+        trusted = min(timeit.repeat(lambda: trusted_path(model, documents), number=ROUNDS // 10, repeat=10))
+        validated_us = validated / (ROUNDS // 10) / PAGE_SIZE * 1e6
+        trusted_us = trusted / (ROUNDS // 10) / PAGE_SIZE * 1e6
+        print(f"{model.__name__:<12}{validated_us:>18.1f}{trusted_us:>18.1f}{1 - trusted_us / validated_us:>10.0%}")
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
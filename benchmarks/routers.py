@@ -0,0 +1,216 @@
+"""
+Latency of every router, driven in-process through httpx against local db with stubbed auth,
+so numbers show cost of routers, models and db layer without network.
+Run from repo root:
+    python -m benchmarks.routers                        compare with benchmarks/baseline.json
+    python -m benchmarks.routers --update-baseline      store current numbers as baseline
+    DB_BACKEND=sqlite python -m benchmarks.routers      same with sqlite db, baseline is benchmarks/baseline_sqlite.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple, Callable
+
+os.environ.setdefault("APP_HOST", "127.0.0.1")
+os.environ.setdefault("APP_PORT", "8000")
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from httpx import AsyncClient  # noqa: E402
+
+from src.app_main import app  # noqa: E402
+from src.core.models.AlarmModel import AlarmStatuses  # noqa: E402
+from src.services.auth.auth import get_current_backend_user  # noqa: E402
+from src.services.database.controller import connect_to_db  # noqa: E402
+from src.services.database.interface import IDataBase  # noqa: E402
+from src.utils import config  # noqa: E402
+from src.utils.depends import get_db  # noqa: E402
+
+if config.DB_BACKEND not in ("memory", "sqlite"):
+    raise SystemExit("Benchmark clears db, run it with DB_BACKEND=memory or DB_BACKEND=sqlite")
+
+BASELINE_PATH = Path(__file__).with_name(
+    "baseline.json" if config.DB_BACKEND == "memory" else f"baseline_{config.DB_BACKEND}.json"
+)
+
+
+class SeedSizes(NamedTuple):
+    users: int = 200
+    themes_per_user: int = 5
+    notes_per_theme: int = 4
+    alarms_per_note: int = 2
+    ready_alarms_share: float = 0.05
+
+
+class SeedData(NamedTuple):
+    user_ids: list[str]
+    theme_ids: list[str]
+    note_ids: list[str]
+    alarm_ids: list[str]
+
+
+class RouteStats(NamedTuple):
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    rps: float
+
+
+class StubBackendUser:
+    tags = ["benchmark"]
+    is_active = True
+
+
+async def seed(db: IDataBase, client: AsyncClient, sizes: SeedSizes) -> SeedData:
+    """Create data through routers, so it has the same shape as in production"""
+    data = SeedData([], [], [], [])
+    next_notion_time = (datetime.now() + timedelta(days=1)).isoformat()
+    for user_number in range(sizes.users):
+        user_id = str(100000000 + user_number)
+        await client.post("/users/create_user", json={
+            "telegram_id": user_id, "user_name": f"user{user_number}", "timezone": 3, "lang_code": "ru"
+        })
+        data.user_ids.append(user_id)
+        for theme_number in range(sizes.themes_per_user):
+            r = await client.post("/themes/create_theme", json={
+                "name": f"theme{theme_number}", "description": "benchmark theme", "links": {"user_id": user_id}
+            })
+            theme_id = r.json()
+            data.theme_ids.append(theme_id)
+            for note_number in range(sizes.notes_per_theme):
+                r = await client.post("/notes/create_note", json={
+                    "name": f"note{note_number}", "links": {"user_id": user_id, "theme_id": theme_id},
+                    "data": {"text": "benchmark note", "check_points": [{"text": "point", "is_finish": False}] * 3}
+                })
+                note_id = r.json()
+                data.note_ids.append(note_id)
+                for alarm_number in range(sizes.alarms_per_note):
+                    r = await client.post("/alarms/create_alarm", params={
+                        "next_notion_time": next_notion_time, "repeat_interval": 60
+                    }, json={
+                        "name": f"alarm{alarm_number}", "description": "benchmark alarm", "is_repeatable": True,
+                        "links": {"user_id": user_id, "parent_id": note_id}
+                    })
+                    data.alarm_ids.append(r.json())
+    ready_count = int(len(data.alarm_ids) * sizes.ready_alarms_share)
+    await db.update_alarms_status(data.alarm_ids[:ready_count], AlarmStatuses.QUEUE, AlarmStatuses.READY)
+    return data
+
+
+def routes(data: SeedData) -> dict[str, tuple[str, str, Callable[[int], dict]]]:
+    """Benchmark name -> (method, url, request number -> request kwargs). Writes change data on every request"""
+    user_id, theme_id, note_id, alarm_id = data.user_ids[0], data.theme_ids[0], data.note_ids[0], data.alarm_ids[-1]
+    no_kwargs = lambda number: {}  # noqa: E731
+    statuses = (AlarmStatuses.READY.value, AlarmStatuses.QUEUE.value)
+    postpone_actions = [{"alarm_id": alarm_id, "action": "POSTPONE"} for alarm_id in data.alarm_ids[:100]]
+    new_alarm = {"name": "batch alarm", "is_repeatable": False, "links": {"user_id": user_id, "parent_id": note_id},
+                 "next_notion_time": (datetime.now() + timedelta(days=1)).isoformat()}
+    return {
+        "GET /ping": ("GET", "/ping", no_kwargs),
+        "GET /users/get_user": ("GET", f"/users/get_user/{user_id}", no_kwargs),
+        "GET /themes/get_theme": ("GET", f"/themes/get_theme/{theme_id}", no_kwargs),
+        "GET /themes/get_all_user_themes": ("GET", f"/themes/get_all_user_themes/{user_id}", no_kwargs),
+        "GET /notes/get_note": ("GET", f"/notes/get_note/{note_id}", no_kwargs),
+        "GET /notes/get_all_notes_by_user_id": ("GET", f"/notes/get_all_notes_by_user_id/{user_id}", no_kwargs),
+        "GET /notes/get_all_notes_by_theme_id": ("GET", f"/notes/get_all_notes_by_theme_id/{theme_id}", no_kwargs),
+        "GET /alarms/get_alarm": ("GET", f"/alarms/get_alarm/{alarm_id}", no_kwargs),
+        "GET /alarms/get_all_user_alarms": ("GET", f"/alarms/get_all_user_alarms/{user_id}", no_kwargs),
+        "GET /alarms/get_all_alarm_by_parent_id": ("GET", f"/alarms/get_all_alarm_by_parent_id/{note_id}",
+                                                   no_kwargs),
+        "GET /alarms/get_all_ready_alarms": ("GET", "/alarms/get_all_ready_alarms", no_kwargs),
+        "PATCH /notes/update_note": ("PATCH", f"/notes/update_note/{note_id}",
+                                     lambda number: {"json": {"data.text": f"updated {number}"}}),
+        "PATCH /alarms/update_alarm_status": ("PATCH", f"/alarms/update_alarm_status/{alarm_id}",
+                                              lambda number: {"params": {"new_status": statuses[number % 2]}}),
+        "POST /alarms/create_alarms (100 alarms)": ("POST", "/alarms/create_alarms",
+                                                    lambda number: {"json": [new_alarm] * 100}),
+        "POST /alarms/apply_alarms_actions (100 alarms)": ("POST", "/alarms/apply_alarms_actions",
+                                                           lambda number: {"json": postpone_actions}),
+    }
+
+
+async def measure(client: AsyncClient, method: str, url: str, kwargs: Callable[[int], dict],
+                  requests: int) -> RouteStats:
+    warmup = max(requests // 10, 1)
+    for number in range(warmup):
+        await client.request(method, url, **kwargs(number))
+    latencies = list()
+    started = time.perf_counter()
+    for number in range(warmup, warmup + requests):
+        request_started = time.perf_counter()
+        r = await client.request(method, url, **kwargs(number))
+        latencies.append(time.perf_counter() - request_started)
+        if r.status_code >= 400:
+            raise RuntimeError(f"{method} {url} failed with {r.status_code}: {r.text}")
+    total = time.perf_counter() - started
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return RouteStats(p50_ms=percentiles[49] * 1000, p95_ms=percentiles[94] * 1000, p99_ms=percentiles[98] * 1000,
+                      rps=requests / total)
+
+
+async def run(requests: int, sizes: SeedSizes) -> dict[str, RouteStats]:
+    db = connect_to_db()
+    await db.clear()
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_backend_user] = lambda: StubBackendUser()
+    async with AsyncClient(app=app, base_url="http://benchmark") as client:
+        data = await seed(db, client, sizes)
+        results = dict()
+        for name, (method, url, kwargs) in routes(data).items():
+            results[name] = await measure(client, method, url, kwargs, requests)
+    app.dependency_overrides.clear()
+    await db.close()
+    return results
+
+
+def diff(current: float, baseline: float | None) -> str:
+    if not baseline:
+        return ""
+    return f"{(current - baseline) / baseline:+.0%}"
+
+
+def report(results: dict[str, RouteStats], baseline: dict[str, dict]) -> None:
+    """Print table with diff of p50 and rps against baseline"""
+    print(f"{'route':<40}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rps':>9}{'p50 diff':>10}{'rps diff':>10}")
+    for name, stats in results.items():
+        route_baseline = baseline.get(name, {})
+        print(f"{name:<40}{stats.p50_ms:>9.2f}{stats.p95_ms:>9.2f}{stats.p99_ms:>9.2f}{stats.rps:>9.0f}"
+              f"{diff(stats.p50_ms, route_baseline.get('p50_ms')):>10}{diff(stats.rps, route_baseline.get('rps')):>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per route")
+    parser.add_argument("--users", type=int, default=SeedSizes().users, help="seeded users")
+    parser.add_argument("--update-baseline", action="store_true", help="write results to baseline file")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit with code 1 if any route p50 is slower than baseline by this share, e.g. 0.2")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, SeedSizes(users=args.users)))
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    report(results, baseline)
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(
+            {name: {key: round(value, 3) for key, value in stats._asdict().items()} for name, stats in results.items()},
+            indent=4
+        ) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+    elif args.max_regression is not None:
+        regressed = [
+            name for name, stats in results.items()
+            if name in baseline and stats.p50_ms > baseline[name]["p50_ms"] * (1 + args.max_regression)
+        ]
+        if regressed:
+            print(f"Regressed routes: {', '.join(regressed)}")
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
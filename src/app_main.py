@@ -1,16 +1,20 @@
 import uvicorn
 from fastapi import FastAPI
 
-from src.services.auth.auth import auth_fastapi_users
-from src.services.auth.auth_backend import auth_backend
+from src.infrastructure.alarms.db_interaction import backfill_alarms_due_time, backfill_alarms_partition
 from src.services.auth.database import init_backend_users_db
 from src.services.database.controller import connect_to_db
-from src.services.jobs.scheduler import create_and_start_scheduler
+from src.services.jobs.alarm_timer import alarm_timer
+from src.services.jobs.leader_election import create_jobs_leader_election
+from src.services.jobs.partitions_assignment import create_alarm_partitions_assignment
+from src.services.jobs.scheduler import JobsRunner
 from src.services.routers.alarms import router as alarms_routers
+from src.services.routers.auth import router as auth_router
 from src.services.routers.notes import router as note_routers
 from src.services.routers.ping import router as ping_router
 from src.services.routers.themes import router as themes_routers
 from src.services.routers.users import router as user_routers
+from src.utils import config
 from src.utils.config import APP_PORT, APP_HOST
 
 # Create fastApi app
@@ -20,7 +24,30 @@ app = FastAPI(title="Alarm_bot_api")
 @app.on_event("startup")
 async def on_startup():
     await init_backend_users_db()
-    create_and_start_scheduler()
+    await app.state.db.ensure_indexes()
+    await backfill_alarms_due_time(app.state.db)
+    await backfill_alarms_partition(app.state.db)
+    # Timer of worker collects alarms only while worker owns alarm partitions or is not partitioned leader
+    await alarm_timer.standby()
+    app.state.jobs_runner = JobsRunner(config.ALARM_PARTITIONED_JOBS)
+    app.state.jobs_runner.start()
+    app.state.leader_election = create_jobs_leader_election(app.state.jobs_runner.start_leader_jobs,
+                                                            app.state.jobs_runner.stop_leader_jobs)
+    app.state.leader_election.start()
+    app.state.alarm_partitions = None
+    if config.ALARM_PARTITIONED_JOBS:
+        app.state.alarm_partitions = create_alarm_partitions_assignment(app.state.jobs_runner.set_partitions)
+        app.state.alarm_partitions.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    if app.state.alarm_partitions is not None:
+        await app.state.alarm_partitions.stop()
+    await app.state.leader_election.stop()
+    app.state.jobs_runner.shutdown()
+    await alarm_timer.stop()
+    await app.state.db.close()
 
 
 # Connect to db
@@ -32,19 +59,13 @@ ROUTERS = (
     alarms_routers,
     themes_routers,
     note_routers,
-    ping_router
+    ping_router,
+    auth_router
 )
 
 for router in ROUTERS:
     app.include_router(router=router)
 
-# Register auth routers
-app.include_router(
-    auth_fastapi_users.get_auth_router(auth_backend),
-    prefix="/auth/jwt",
-    tags=["auth"],
-)
-
 # Router to register new backend user
 # app.include_router(
 #     auth_fastapi_users.get_register_router(UserRead, UserCreate),
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional
 
@@ -6,11 +6,25 @@ from bson import ObjectId
 from bson.errors import InvalidId
 from pydantic import BaseModel, Field, validator
 
+from src.core.models.IndexModel import IndexModel, ASCENDING
+
 
 class AlarmStatuses(str, Enum):
     READY = "READY"
     QUEUE = "QUEUE"
     FINISH = "FINISH"
+    IN_FLIGHT = "IN_FLIGHT"
+
+
+ALARM_INDEXES = (
+    IndexModel("status_due_at_utc", (("status", ASCENDING), ("times.due_at_utc", ASCENDING))),
+    IndexModel("status_partition_due_at_utc",
+               (("status", ASCENDING), ("partition", ASCENDING), ("times.due_at_utc", ASCENDING))),
+    IndexModel("status_id", (("status", ASCENDING), ("_id", ASCENDING))),
+    IndexModel("status_lease_expires_at", (("status", ASCENDING), ("lease.expires_at", ASCENDING))),
+    IndexModel("links_user_id_id", (("links.user_id", ASCENDING), ("_id", ASCENDING))),
+    IndexModel("links_parent_id_id", (("links.parent_id", ASCENDING), ("_id", ASCENDING))),
+)
 
 
 class AlarmLinksModel(BaseModel):
@@ -31,6 +45,22 @@ class AlarmTimesModel(BaseModel):
     next_notion_time: Optional[datetime]
     end_time: Optional[datetime]
     repeat_interval: Optional[int]
+    due_at_utc: Optional[datetime]
+
+    def postponed(self, now: datetime) -> "AlarmTimesModel":
+        """Times of repeatable alarm queued again at now + repeat_interval minutes, due_at_utc keeps user offset"""
+        next_notion_time = now + timedelta(minutes=self.repeat_interval)
+        due_at_utc = None
+        if self.due_at_utc is not None and self.next_notion_time is not None:
+            due_at_utc = next_notion_time + (self.due_at_utc - self.next_notion_time)
+        return self.copy(update={"next_notion_time": next_notion_time, "due_at_utc": due_at_utc})
+
+
+class AlarmLeaseModel(BaseModel):
+    """Consumer, that claimed IN_FLIGHT alarm, alarm returns to READY after expires_at"""
+    consumer_id: str
+    claim_id: str
+    expires_at: datetime
 
 
 class AlarmModel(BaseModel):
@@ -42,6 +72,8 @@ class AlarmModel(BaseModel):
     status: AlarmStatuses
     links: AlarmLinksModel
     times: AlarmTimesModel
+    lease: Optional[AlarmLeaseModel]
+    partition: Optional[int]
 
 
 class AlarmModelWrite(BaseModel):
@@ -52,6 +84,8 @@ class AlarmModelWrite(BaseModel):
     status: AlarmStatuses
     links: AlarmLinksModel
     times: AlarmTimesModel
+    lease: Optional[AlarmLeaseModel]
+    partition: Optional[int]
 
 
 class AlarmRouterModel(BaseModel):
@@ -61,9 +95,49 @@ class AlarmRouterModel(BaseModel):
     is_repeatable: bool
     links: AlarmLinksModel
 
-    def convert_to_alarm_model_write(self, times: AlarmTimesModel, status: AlarmStatuses) -> AlarmModelWrite:
-        return AlarmModelWrite(
-            times=times.dict(),
-            status=status,
-            **self.dict()
+    def convert_to_alarm_model_write(self, times: AlarmTimesModel, status: AlarmStatuses,
+                                     partition: int | None = None) -> AlarmModelWrite:
+        """Router model and times are validated already, so write model is built without validation"""
+        return AlarmModelWrite.construct(
+            times=times,
+            status=AlarmStatuses(status),
+            lease=None,
+            partition=partition,
+            **{name: getattr(self, name) for name in AlarmRouterModel.__fields__}
         )
+
+
+class AlarmCreateModel(AlarmRouterModel):
+    """Represent one alarm of batch create router input"""
+    next_notion_time: datetime
+    repeat_interval: Optional[int]
+
+
+class AlarmWriteResultModel(BaseModel):
+    """Result of one alarm of batch create, error is set if alarm was not written"""
+    alarm_id: Optional[str]
+    error: Optional[str]
+
+
+class AlarmActions(str, Enum):
+    FINISH = "FINISH"
+    POSTPONE = "POSTPONE"
+
+
+class AlarmActionModel(BaseModel):
+    """Represent one item of batch router input: FINISH one-shot alarm or POSTPONE repeatable one"""
+    alarm_id: str
+    action: AlarmActions
+
+
+class AlarmActionResultModel(BaseModel):
+    """Result of one item of batch actions, next_notion_time is set for postponed alarm"""
+    alarm_id: str
+    error: Optional[str]
+    next_notion_time: Optional[datetime]
+
+
+class AlarmsAckModel(BaseModel):
+    """Represent router input to finish or return claimed alarms"""
+    consumer_id: str
+    alarm_ids: list[str]
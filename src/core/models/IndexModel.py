@@ -0,0 +1,15 @@
+from typing import NamedTuple
+
+ASCENDING = 1
+
+
+class IndexModel(NamedTuple):
+    """Represent db index, keys are (field, direction) pairs in index order"""
+    name: str
+    keys: tuple[tuple[str, int], ...]
+
+
+class QueryShapeModel(NamedTuple):
+    """Represent fields db query filters on, equality fields first, then range or sort field"""
+    collection: str
+    fields: tuple[str, ...]
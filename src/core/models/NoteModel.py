@@ -5,6 +5,13 @@ from bson.errors import InvalidId
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
+from src.core.models.IndexModel import IndexModel, ASCENDING
+
+NOTE_INDEXES = (
+    IndexModel("links_user_id_id", (("links.user_id", ASCENDING), ("_id", ASCENDING))),
+    IndexModel("links_theme_id_id", (("links.theme_id", ASCENDING), ("_id", ASCENDING))),
+)
+
 
 class CheckPointModel(BaseModel):
     text: str
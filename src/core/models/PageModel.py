@@ -0,0 +1,26 @@
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+
+ItemT = TypeVar("ItemT")
+
+
+class PageParamsModel(BaseModel):
+    """Represent keyset pagination request: at most limit items with id greater than after"""
+    limit: int
+    after: Optional[str]
+
+
+class PageModel(GenericModel, Generic[ItemT]):
+    """Represent one page of list, next_cursor is None on the last page"""
+    items: list[ItemT]
+    next_cursor: Optional[str]
+
+    @classmethod
+    def from_items(cls, items: list, limit: int) -> "PageModel":
+        """Build page from limit + 1 fetched items, extra item only signals that next page exists"""
+        if len(items) > limit:
+            items = items[:limit]
+            return cls.construct(items=items, next_cursor=items[-1].id)
+        return cls.construct(items=items, next_cursor=None)
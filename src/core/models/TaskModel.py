@@ -0,0 +1,22 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TaskStatuses(str, Enum):
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class TaskModel(BaseModel):
+    """Background task state, progress is updated by task while it runs"""
+    task_id: str
+    name: str
+    status: TaskStatuses
+    progress: dict[str, int]
+    error: Optional[str]
+    started_at: datetime
+    finished_at: Optional[datetime]
@@ -1,6 +1,12 @@
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from src.core.models.IndexModel import IndexModel, ASCENDING
+
+THEME_INDEXES = (
+    IndexModel("links_user_id_id", (("links.user_id", ASCENDING), ("_id", ASCENDING))),
+)
+
 
 class ThemesLinksModel(BaseModel):
     user_id: str
@@ -13,6 +19,13 @@ class ThemeModel(BaseModel):
     links: ThemesLinksModel
 
 
+class ThemeDeleteResultModel(BaseModel):
+    """Deleted objects count by level of theme cascade delete"""
+    deleted_count: int
+    deleted_notes_count: int
+    deleted_alarms_count: int
+
+
 class ThemeModelWrite(BaseModel):
     name: str
     description: Optional[str]
@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import Enum
+from typing import Type, TypeVar
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _construct_value(field_type, shape: int, value):
+    if value is None:
+        return None
+    if isinstance(field_type, type) and issubclass(field_type, BaseModel):
+        if shape == SHAPE_SINGLETON:
+            return construct_trusted(field_type, value)
+        if shape == SHAPE_LIST:
+            return [construct_trusted(field_type, item) for item in value]
+    if isinstance(field_type, type) and issubclass(field_type, Enum) and shape == SHAPE_SINGLETON:
+        return field_type(value)
+    if field_type is datetime and shape == SHAPE_SINGLETON and isinstance(value, str):
+        # Documents stored as json keep datetime in iso format
+        return datetime.fromisoformat(value)
+    return value
+
+
+def construct_trusted(model: Type[ModelT], data: dict) -> ModelT:
+    """
+    Build model from document written by this app without validation.
+    Nested models and enums are constructed too, unknown keys are dropped.
+    Use only for data read back from own db, input data must go through parse_obj
+    """
+    values = dict()
+    for name, field in model.__fields__.items():
+        key = field.alias if field.alias in data else name
+        if key in data:
+            values[name] = _construct_value(field.type_, field.shape, data[key])
+    return model.construct(**values)
@@ -1,8 +1,55 @@
-from src.core.models.AlarmModel import AlarmModel, AlarmStatuses, AlarmRouterModel, AlarmTimesModel
-from src.infrastructure.exceptions import AlarmNotRepeatable, UnexpectedInfrastructureException
+import asyncio
+import zlib
+from collections import defaultdict
+from typing import AsyncIterator
+from uuid import uuid4
+
+from bson import ObjectId
+from pydantic import parse_obj_as
+
+from src.core.models.AlarmModel import (AlarmModel, AlarmStatuses, AlarmRouterModel, AlarmTimesModel, AlarmLeaseModel,
+                                        AlarmModelWrite, AlarmCreateModel, AlarmActions, AlarmActionModel,
+                                        AlarmActionResultModel)
+from src.core.models.PageModel import PageModel, PageParamsModel
+from src.infrastructure.exceptions import AlarmNotRepeatable
+from src.infrastructure.users.db_interaction import get_users_timezones_from_db
+from src.services.database.database_exceptions import DBNotFound
+from src.services.jobs.alarm_timer import alarm_timer
+from src.services.jobs.ready_alarms_broker import ready_alarms_broker
+from src.services.jobs.ready_alarms_notifier import ready_alarms_notifier
 
 from src.services.database.interface import IDataBase
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Alarms are spread over partitions by user for scheduled jobs of several workers. Partition is stored
+# in alarm, so count must not change while alarms of other count are in db
+ALARM_PARTITIONS = 16
+
+
+def alarm_partition(user_id: str) -> int:
+    """Stable across processes and restarts, unlike built-in str hash"""
+    return zlib.crc32(user_id.encode()) % ALARM_PARTITIONS
+
+
+def compute_due_at_utc(next_notion_time: datetime | None, user_timezone: int | None) -> datetime | None:
+    """
+    Convert user local next_notion_time to naive utc datetime.
+    If time has explicit tzinfo, it is used instead of user timezone
+    """
+    if next_notion_time is None:
+        return None
+    if next_notion_time.tzinfo is not None:
+        return next_notion_time.astimezone(timezone.utc).replace(tzinfo=None)
+    if user_timezone is None:
+        return None
+    return next_notion_time - timedelta(hours=user_timezone)
+
+
+async def get_user_timezone(user_id: str, db: IDataBase) -> int | None:
+    users_timezones = await get_users_timezones_from_db({user_id}, db)
+    return users_timezones.get(user_id)
 
 
 async def get_alarm_from_db(alarm_id: str, db: IDataBase) -> AlarmModel:
@@ -10,52 +57,316 @@ async def get_alarm_from_db(alarm_id: str, db: IDataBase) -> AlarmModel:
     return alarm
 
 
-async def write_alarm_to_db(alarm: AlarmRouterModel, db: IDataBase, next_notion_time: datetime,
-                            repeat_interval: int | None) -> str:
-    alarm_id = await db.write_new_alarm(alarm.convert_to_alarm_model_write(
+def new_alarm_write(alarm: AlarmRouterModel, next_notion_time: datetime, repeat_interval: int | None,
+                    user_timezone: int | None) -> AlarmModelWrite:
+    """Queued alarm with times computed for user timezone"""
+    return alarm.convert_to_alarm_model_write(
         status=AlarmStatuses.QUEUE.value,
         times=AlarmTimesModel(
             creation_time=datetime.now(),
             next_notion_time=next_notion_time,
             repeat_interval=repeat_interval,
-            end_time=None
-        )))
+            end_time=None,
+            due_at_utc=compute_due_at_utc(next_notion_time, user_timezone)
+        ),
+        partition=alarm_partition(alarm.links.user_id))
+
+
+async def write_alarm_to_db(alarm: AlarmRouterModel, db: IDataBase, next_notion_time: datetime,
+                            repeat_interval: int | None) -> str:
+    user_timezone = await get_user_timezone(alarm.links.user_id, db)
+    alarm_write = new_alarm_write(alarm, next_notion_time, repeat_interval, user_timezone)
+    alarm_id = await db.write_new_alarm(alarm_write)
+    alarm_timer.schedule(alarm_id, alarm_write.times.due_at_utc, alarm_write.partition)
     return alarm_id
 
 
+async def write_alarms_to_db(alarms: list[AlarmCreateModel], db: IDataBase) -> list[str | None]:
+    """
+    Write many alarms by one db request, timezones of all users are got by at most one more request.
+    Return id of every written alarm in alarms order, None for alarm that was not written
+    """
+    timezones = await get_users_timezones_from_db({alarm.links.user_id for alarm in alarms}, db)
+    alarms_write = [
+        new_alarm_write(alarm, alarm.next_notion_time, alarm.repeat_interval, timezones.get(alarm.links.user_id))
+        for alarm in alarms
+    ]
+    alarm_ids = await db.write_new_alarms(alarms_write)
+    for alarm_id, alarm_write in zip(alarm_ids, alarms_write):
+        if alarm_id is not None:
+            alarm_timer.schedule(alarm_id, alarm_write.times.due_at_utc, alarm_write.partition)
+    return alarm_ids
+
+
 async def get_all_alarm_by_condition(condition: dict, db: IDataBase) -> [AlarmModel]:
     alarms = await db.get_all_alarms_by_condition(condition)
     return alarms
 
 
-async def get_all_queued_alarms(db: IDataBase) -> list[AlarmModel]:
-    alarms = await get_all_alarm_by_condition({"status": AlarmStatuses.QUEUE.value}, db)
+async def get_alarms_page_by_condition(condition: dict, page_params: PageParamsModel,
+                                       db: IDataBase) -> PageModel[AlarmModel]:
+    alarms = await db.get_all_alarms_by_condition(condition, limit=page_params.limit + 1, after=page_params.after)
+    return PageModel[AlarmModel].from_items(alarms, page_params.limit)
+
+
+async def wait_ready_alarms_page(page_params: PageParamsModel, timeout: float, db: IDataBase) -> PageModel[AlarmModel]:
+    """
+    Long poll of ready alarms: return page as soon as any alarm is READY, waiting at most timeout seconds.
+    Wakes on in-process notification, so alarms made READY by other worker process are seen only at timeout.
+    If still no ready alarms, raise DBNotFound exception like get_alarms_page_by_condition
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        woken = ready_alarms_notifier.waiter()
+        try:
+            return await get_alarms_page_by_condition({"status": AlarmStatuses.READY.value}, page_params, db)
+        except DBNotFound:
+            if loop.time() >= deadline:
+                raise
+        try:
+            await asyncio.wait_for(woken.wait(), deadline - loop.time())
+        except asyncio.TimeoutError:
+            ...
+
+
+def iter_alarms_by_condition(condition: dict, after: str | None, db: IDataBase) -> AsyncIterator[AlarmModel]:
+    return db.iter_alarms_by_condition(condition, after)
+
+
+async def get_all_due_alarms(db: IDataBase, partitions: list[int] | None = None) -> list[AlarmModel]:
+    alarms = await db.get_due_alarms(datetime.utcnow(), partitions)
     return alarms
 
 
-async def postpone_repeatable_alarm(alarm_id, db: IDataBase) -> datetime:
-    alarm = await db.get_alarm_by_id(alarm_id)
-    if not alarm.is_repeatable:
+async def get_postponed_alarm_data(alarm: AlarmModel, db: IDataBase) -> dict:
+    """New data of repeatable alarm queued again after repeat interval"""
+    if not alarm.is_repeatable or alarm.times.repeat_interval is None:
         raise AlarmNotRepeatable("Alarm must be repeatable")
-    else:
-        new_next_notion_time = datetime.now() + timedelta(minutes=alarm.times.repeat_interval)
-        result = await db.update_alarm(
-            alarm_id=alarm_id,
-            new_data={"status": AlarmStatuses.QUEUE.value, "times.next_notion_time": new_next_notion_time}
+    now = datetime.now()
+    # Mongo keeps milliseconds, so written time is equal to the one read back
+    times = alarm.times.postponed(now.replace(microsecond=now.microsecond // 1000 * 1000))
+    if times.due_at_utc is None:
+        times.due_at_utc = compute_due_at_utc(
+            times.next_notion_time, await get_user_timezone(alarm.links.user_id, db)
         )
-        if result:
-            return new_next_notion_time
+    return {"status": AlarmStatuses.QUEUE.value,
+            "lease": None,
+            "times.next_notion_time": times.next_notion_time,
+            "times.due_at_utc": times.due_at_utc}
+
+
+async def postpone_repeatable_alarm(alarm_id, db: IDataBase) -> datetime:
+    """
+    One atomic db update, db computes new time from stored repeat interval.
+    Alarm is read again only on error
+    """
+    alarm = await db.postpone_alarm(alarm_id, datetime.now())
+    if alarm is None:
+        await db.get_alarm_by_id(alarm_id)  # Raise DBNotFound for not existing alarm
+        raise AlarmNotRepeatable("Alarm must be repeatable")
+    times = alarm.times
+    if times.due_at_utc is None and times.next_notion_time is not None:
+        times.due_at_utc = compute_due_at_utc(times.next_notion_time, await get_user_timezone(alarm.links.user_id, db))
+        if times.due_at_utc is not None:
+            await db.update_alarm(alarm_id, {"times.due_at_utc": times.due_at_utc})
+    alarm_timer.schedule(alarm_id, times.due_at_utc, alarm.partition)
+    return times.next_notion_time
+
+
+def is_alarm_updated(alarm: AlarmModel | None, new_data: dict) -> bool:
+    """Stored alarm has status and notion time from new_data of apply_alarms_actions"""
+    if alarm is None or alarm.status.value != new_data["status"]:
+        return False
+    next_notion_time = new_data.get("times.next_notion_time", alarm.times.next_notion_time)
+    return alarm.times.next_notion_time == next_notion_time
+
+
+async def apply_alarms_actions(actions: list[AlarmActionModel], db: IDataBase) -> list[AlarmActionResultModel]:
+    """
+    FINISH or POSTPONE delivered alarms: alarms are read by one request and written by one bulk request.
+    Postponed alarm is written only if its notion time is still the read one, alarm changed meanwhile is
+    not overwritten and its action gets error. Result has error or new next_notion_time of every action
+    in actions order
+    """
+    results = [AlarmActionResultModel(alarm_id=action.alarm_id) for action in actions]
+    valid_ids = [action.alarm_id for action in actions if ObjectId.is_valid(action.alarm_id)]
+    alarms = {alarm.id: alarm for alarm in await db.get_alarms_by_ids(valid_ids)}
+    new_data_by_id, conditions_by_id, results_by_id = dict(), dict(), dict()
+    for action, result in zip(actions, results):
+        alarm = alarms.get(action.alarm_id)
+        if alarm is None:
+            result.error = "Alarm not found"
+            continue
+        if action.action == AlarmActions.FINISH:
+            new_data_by_id[alarm.id] = {"status": AlarmStatuses.FINISH.value, "lease": None}
+            conditions_by_id.pop(alarm.id, None)
+            results_by_id[alarm.id] = result
+            continue
+        try:
+            new_data_by_id[alarm.id] = await get_postponed_alarm_data(alarm, db)
+        except AlarmNotRepeatable as err:
+            result.error = str(err)
+            continue
+        conditions_by_id[alarm.id] = {"times.next_notion_time": alarm.times.next_notion_time}
+        results_by_id[alarm.id] = result
+        result.next_notion_time = new_data_by_id[alarm.id]["times.next_notion_time"]
+    modified_count = await db.bulk_update_alarms(new_data_by_id, conditions_by_id)
+    if modified_count < len(new_data_by_id):
+        # Bulk result has only total count, so not modified alarms are found by one more read
+        stored = {alarm.id: alarm for alarm in await db.get_alarms_by_ids(list(new_data_by_id))}
+        for alarm_id, new_data in list(new_data_by_id.items()):
+            if not is_alarm_updated(stored.get(alarm_id), new_data):
+                del new_data_by_id[alarm_id]
+                results_by_id[alarm_id].error = ("Alarm not found" if alarm_id not in stored
+                                                 else "Alarm was changed concurrently")
+                results_by_id[alarm_id].next_notion_time = None
+    for alarm_id, new_data in new_data_by_id.items():
+        if new_data["status"] == AlarmStatuses.QUEUE.value:
+            alarm_timer.schedule(alarm_id, new_data["times.due_at_utc"], alarms[alarm_id].partition)
         else:
-            raise UnexpectedInfrastructureException()
+            alarm_timer.cancel(alarm_id)
+    return results
 
 
 async def update_alarm(alarm_id: str, new_data: dict, db: IDataBase) -> int:
+    alarm = None
+    if new_data.get("times.next_notion_time") is not None:
+        # Keep due_at_utc in sync with changed notion time
+        alarm = await db.get_alarm_by_id(alarm_id)
+        next_notion_time = parse_obj_as(datetime, new_data["times.next_notion_time"])
+        new_data = {
+            **new_data,
+            "times.next_notion_time": next_notion_time,
+            "times.due_at_utc": compute_due_at_utc(
+                next_notion_time, await get_user_timezone(alarm.links.user_id, db)
+            )
+        }
     update_count = await db.update_alarm(alarm_id, new_data)
+    if new_data.get("status") == AlarmStatuses.READY.value and update_count:
+        await ready_alarms_broker.publish([alarm_id], db)
+    if new_data.get("status", AlarmStatuses.QUEUE.value) != AlarmStatuses.QUEUE.value:
+        alarm_timer.cancel(alarm_id)
+    elif "times.due_at_utc" in new_data:
+        alarm_timer.schedule(alarm_id, new_data["times.due_at_utc"], None if alarm is None else alarm.partition)
+    elif "status" in new_data:
+        # Alarm returned to QUEUE must not wait for the sweep
+        alarm = await db.get_alarm_by_id(alarm_id)
+        alarm_timer.schedule(alarm_id, alarm.times.due_at_utc, alarm.partition)
     return update_count
 
 
+async def promote_queued_alarms_to_ready(alarm_ids: list[str], db: IDataBase) -> int:
+    promoted_count = await db.update_alarms_status(alarm_ids, AlarmStatuses.QUEUE, AlarmStatuses.READY)
+    if promoted_count:
+        await ready_alarms_broker.publish(alarm_ids, db)
+    return promoted_count
+
+
+async def claim_ready_alarms(consumer_id: str, limit: int, lease_seconds: int, db: IDataBase) -> list[AlarmModel]:
+    """
+    Move up to limit READY alarms to IN_FLIGHT leased by consumer_id and return them.
+    Alarm is claimed only if it is still READY at update, so concurrent consumers never get the same alarm,
+    claim can return less than limit alarms on race. If nothing is claimed, raise DBNotFound exception.
+    Expired leases are not released here, check_expired_leases job does it
+    """
+    alarm_ids = await db.get_alarms_ids_by_condition({"status": AlarmStatuses.READY.value}, limit=limit)
+    lease = AlarmLeaseModel(consumer_id=consumer_id, claim_id=uuid4().hex,
+                            expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    claimed_count = await db.update_alarms_by_ids(
+        alarm_ids, {"status": AlarmStatuses.READY.value},
+        {"status": AlarmStatuses.IN_FLIGHT.value, "lease": lease.dict()}
+    )
+    if claimed_count == 0:
+        raise DBNotFound("Ready alarms not found")
+    alarms = await db.get_alarms_by_ids(alarm_ids)
+    return sorted((alarm for alarm in alarms if alarm.lease is not None and alarm.lease.claim_id == lease.claim_id),
+                  key=lambda alarm: alarm.id)
+
+
+async def ack_alarms(alarm_ids: list[str], consumer_id: str, db: IDataBase) -> int:
+    """Finish delivered alarms, only alarms still leased by consumer_id are changed"""
+    return await db.update_alarms_by_ids(
+        alarm_ids, {"status": AlarmStatuses.IN_FLIGHT.value, "lease.consumer_id": consumer_id},
+        {"status": AlarmStatuses.FINISH.value, "lease": None}
+    )
+
+
+async def nack_alarms(alarm_ids: list[str], consumer_id: str, db: IDataBase) -> int:
+    """Return not delivered alarms to READY at once, only alarms still leased by consumer_id are changed"""
+    returned_count = await db.update_alarms_by_ids(
+        alarm_ids, {"status": AlarmStatuses.IN_FLIGHT.value, "lease.consumer_id": consumer_id},
+        {"status": AlarmStatuses.READY.value, "lease": None}
+    )
+    if returned_count:
+        await ready_alarms_broker.publish(alarm_ids, db)
+    return returned_count
+
+
+async def release_expired_leases(db: IDataBase) -> int:
+    """Return IN_FLIGHT alarms with expired lease to READY, so other consumer can claim them"""
+    condition = {"status": AlarmStatuses.IN_FLIGHT.value, "lease.expires_at": {"$lte": datetime.utcnow()}}
+    alarm_ids = await db.get_alarms_ids_by_condition(condition)
+    released_count = await db.update_alarms_by_ids(
+        alarm_ids, condition, {"status": AlarmStatuses.READY.value, "lease": None}
+    )
+    if released_count:
+        await ready_alarms_broker.publish(alarm_ids, db)
+    return released_count
+
+
+async def backfill_alarms_due_time(db: IDataBase) -> int:
+    """
+    Set times.due_at_utc for queued alarms written before it existed.
+    Alarms whose user is not found are skipped. Alarm is updated only if due_at_utc is still not set,
+    so workers running backfill at the same time do not fail on alarms done by each other
+    """
+    condition = {
+        "status": AlarmStatuses.QUEUE.value,
+        "times.due_at_utc": None,
+        "times.next_notion_time": {"$ne": None}
+    }
+    updated_count = 0
+    after = None
+    while True:
+        try:
+            alarms = await db.get_all_alarms_by_condition(condition, limit=BACKFILL_BATCH_SIZE, after=after)
+        except DBNotFound:
+            return updated_count
+        users_timezones = await get_users_timezones_from_db({alarm.links.user_id for alarm in alarms}, db)
+        for alarm in alarms:
+            due_at_utc = compute_due_at_utc(alarm.times.next_notion_time,
+                                            users_timezones.get(alarm.links.user_id))
+            if due_at_utc is not None:
+                updated_count += await db.update_alarms_by_ids([alarm.id], {"times.due_at_utc": None},
+                                                               {"times.due_at_utc": due_at_utc})
+        after = alarms[-1].id
+
+
+async def backfill_alarms_partition(db: IDataBase) -> int:
+    """Set partition for alarms written before it existed, one update per partition of every batch"""
+    condition = {"partition": None}
+    updated_count = 0
+    while True:
+        alarm_ids = await db.get_alarms_ids_by_condition(condition, limit=BACKFILL_BATCH_SIZE)
+        if not alarm_ids:
+            return updated_count
+        alarms_ids_by_partition = defaultdict(list)
+        for alarm in await db.get_alarms_by_ids(alarm_ids):
+            alarms_ids_by_partition[alarm_partition(alarm.links.user_id)].append(alarm.id)
+        batch_updated_count = 0
+        for partition, partition_alarm_ids in alarms_ids_by_partition.items():
+            batch_updated_count += await db.update_alarms_by_ids(partition_alarm_ids, condition,
+                                                                 {"partition": partition})
+        if batch_updated_count == 0:
+            # Alarms of batch were deleted or got partition concurrently
+            return updated_count
+        updated_count += batch_updated_count
+
+
 async def delete_alarm(alarm_id, db: IDataBase) -> int:
     deleted_count = await db.delete_alarm_by_id(alarm_id)
+    alarm_timer.cancel(alarm_id)
     return deleted_count
 
 
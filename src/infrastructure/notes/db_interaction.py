@@ -1,6 +1,8 @@
 from datetime import datetime as dt
+from typing import AsyncIterator
 
 from src.core.models.NoteModel import NoteModelWrite, NoteRouterModel, NoteTimesModel, NoteModel
+from src.core.models.PageModel import PageModel, PageParamsModel
 from src.infrastructure.alarms.db_interaction import delete_all_alarms_by_condition
 from src.services.database.database_exceptions import DBNotFound
 
@@ -25,6 +27,16 @@ async def get_all_notes_by_condition(condition: dict, db: IDataBase) -> list[Not
     return notes
 
 
+async def get_notes_page_by_condition(condition: dict, page_params: PageParamsModel,
+                                      db: IDataBase) -> PageModel[NoteModel]:
+    notes = await db.get_all_notes_by_condition(condition, limit=page_params.limit + 1, after=page_params.after)
+    return PageModel[NoteModel].from_items(notes, page_params.limit)
+
+
+def iter_notes_by_condition(condition: dict, after: str | None, db: IDataBase) -> AsyncIterator[NoteModel]:
+    return db.iter_notes_by_condition(condition, after)
+
+
 async def update_note(note_id: str, new_data: dict, db: IDataBase) -> int:
     update_count = await db.update_note(note_id, new_data)
     return update_count
@@ -1,5 +1,8 @@
-from src.core.models.ThemeModel import ThemeModel, ThemeModelWrite
-from src.infrastructure.notes.db_interaction import delete_note, get_all_notes_by_condition
+from typing import AsyncIterator
+
+from src.core.models.PageModel import PageModel, PageParamsModel
+from src.core.models.ThemeModel import ThemeModel, ThemeModelWrite, ThemeDeleteResultModel
+from src.infrastructure.alarms.db_interaction import delete_all_alarms_by_condition
 from src.services.database.database_exceptions import DBNotFound
 
 from src.services.database.interface import IDataBase
@@ -20,22 +23,38 @@ async def get_all_themes_by_condition(condition: dict, db: IDataBase) -> list[Th
     return themes
 
 
+async def get_themes_page_by_condition(condition: dict, page_params: PageParamsModel,
+                                       db: IDataBase) -> PageModel[ThemeModel]:
+    themes = await db.get_all_themes_by_condition(condition, limit=page_params.limit + 1, after=page_params.after)
+    return PageModel[ThemeModel].from_items(themes, page_params.limit)
+
+
+def iter_themes_by_condition(condition: dict, after: str | None, db: IDataBase) -> AsyncIterator[ThemeModel]:
+    return db.iter_themes_by_condition(condition, after)
+
+
 async def update_theme(theme_id: str, new_data: dict, db: IDataBase) -> int:
     update_counter = await db.update_theme(theme_id, new_data)
     return update_counter
 
 
-async def delete_theme_from_db(theme_id: str, db: IDataBase) -> int:
-    try:
-        themes_notes = await get_all_notes_by_condition({"links.theme_id": theme_id}, db)
-    except DBNotFound:
-        ...
-    else:
-        for note in themes_notes:
-            await delete_note(note.id, db)
-    finally:
-        deleted_counter = await db.delete_theme_by_id(theme_id)
-        return deleted_counter
+async def delete_theme_from_db(theme_id: str, db: IDataBase) -> ThemeDeleteResultModel:
+    """
+    Cascade delete of theme with its notes and alarms of these notes by constant number of requests.
+    Children are deleted first, so failure in the middle leaves no orphans
+    """
+    notes_ids = await db.get_notes_ids_by_condition({"links.theme_id": theme_id})
+    deleted_alarms_count = deleted_notes_count = 0
+    if notes_ids:
+        try:
+            deleted_alarms_count = await delete_all_alarms_by_condition({"links.parent_id": {"$in": notes_ids}}, db)
+        except DBNotFound:
+            ...
+        # Only notes, whose alarms are deleted above, so note added meanwhile does not leave orphan alarms
+        deleted_notes_count = await db.delete_notes_by_ids(notes_ids)
+    deleted_count = await db.delete_theme_by_id(theme_id)
+    return ThemeDeleteResultModel(deleted_count=deleted_count, deleted_notes_count=deleted_notes_count,
+                                  deleted_alarms_count=deleted_alarms_count)
 
 
 async def delete_all_themes_from_db_by_condition(condition: dict, db: IDataBase) -> int:
@@ -1,23 +1,123 @@
 from src.core.models.UserModel import UserModel
+from src.services.database.database_exceptions import DBNotFound
+from src.services.jobs.alarm_timer import alarm_timer
 
 from src.services.database.interface import IDataBase
+from src.utils import config
+from src.utils.cache import TTLCache
+
+# Max objects removed by one delete_many of user purge
+PURGE_BATCH_SIZE = 1000
+
+# Users are read on every bot message and alarm write, but almost never change
+users_cache: TTLCache[str, UserModel] = TTLCache(maxsize=config.USERS_CACHE_SIZE,
+                                                 ttl_seconds=config.USERS_CACHE_TTL_SECONDS)
 
 
 async def get_user_from_db(user_id: str, db: IDataBase) -> UserModel:
-    user = await db.get_user_by_id(user_id)
+    user = users_cache.get(user_id)
+    if user is None:
+        user = await db.get_user_by_id(user_id)
+        users_cache.set(user_id, user)
     return user
 
 
+async def get_users_timezones_from_db(user_ids: set[str], db: IDataBase) -> dict[str, int]:
+    """Get timezone of every user from user_ids by at most one db request. Missing users are not in result"""
+    users = dict()
+    for user_id in user_ids:
+        user = users_cache.get(user_id)
+        if user is not None:
+            users[user_id] = user
+    not_cached_ids = [user_id for user_id in user_ids if user_id not in users]
+    if not_cached_ids:
+        for user in await db.get_users_by_ids(not_cached_ids):
+            users_cache.set(user.telegram_id, user)
+            users[user.telegram_id] = user
+    return {user_id: user.timezone for user_id, user in users.items()}
+
+
 async def write_user_to_db(user: UserModel, db: IDataBase) -> str:
     user_id = await db.write_new_user(user)
+    users_cache.invalidate(user.telegram_id)
     return user_id
 
 
 async def update_username_in_db(user_id: str, new_name: str, db: IDataBase) -> int:
-    change_counter = await db.update_username(user_id, new_name)
+    try:
+        change_counter = await db.update_username(user_id, new_name)
+    finally:
+        users_cache.invalidate(user_id)
     return change_counter
 
 
 async def delete_user_from_db(user_id: str, db: IDataBase) -> int:
-    deleted_count = await db.delete_user_by_id(user_id)
+    try:
+        deleted_count = await db.delete_user_by_id(user_id)
+    finally:
+        users_cache.invalidate(user_id)
     return deleted_count
+
+
+async def purge_user_children_from_db(user_id: str, db: IDataBase,
+                                      progress: dict[str, int] | None = None) -> dict[str, int]:
+    """
+    Delete all alarms, notes and themes of user by batches of PURGE_BATCH_SIZE, user itself is kept.
+    Children are deleted first, so interrupted purge can be started again.
+    progress is updated with deleted count of every level after every batch
+    """
+    progress = dict() if progress is None else progress
+    levels = (
+        ("alarms", db.get_alarms_ids_by_condition, db.delete_alarms_by_ids),
+        ("notes", db.get_notes_ids_by_condition, db.delete_notes_by_ids),
+        ("themes", db.get_themes_ids_by_condition, db.delete_themes_by_ids),
+    )
+    for level, get_ids, delete_by_ids in levels:
+        progress[level] = 0
+        while ids := await get_ids({"links.user_id": user_id}, limit=PURGE_BATCH_SIZE):
+            deleted_count = await delete_by_ids(ids)
+            if level == "alarms":
+                for alarm_id in ids:
+                    alarm_timer.cancel(alarm_id)
+            progress[level] += deleted_count
+            if deleted_count == 0:
+                break
+    return progress
+
+
+async def purge_user_from_db(user_id: str, db: IDataBase, progress: dict[str, int] | None = None) -> dict[str, int]:
+    """Delete user with all their alarms, notes and themes, see purge_user_children_from_db"""
+    progress = await purge_user_children_from_db(user_id, db, progress)
+    try:
+        progress["user"] = await db.delete_user_by_id(user_id)
+    except DBNotFound:
+        progress["user"] = 0
+    finally:
+        users_cache.invalidate(user_id)
+    return progress
+
+
+async def purge_orphans_from_db(db: IDataBase, progress: dict[str, int] | None = None) -> dict[str, int]:
+    """
+    Purge alarms, notes and themes linked to users, that do not exist anymore.
+    Linked users are paged and checked by batches of PURGE_BATCH_SIZE.
+    Only children are deleted, so user created again meanwhile is never removed
+    """
+    progress = dict() if progress is None else progress
+    progress.update(orphan_users=0, alarms=0, notes=0, themes=0)
+    after = None
+    while batch := await db.get_linked_user_ids(after, PURGE_BATCH_SIZE):
+        existing_ids = {user.telegram_id for user in await db.get_users_by_ids(batch)}
+        for user_id in batch:
+            if user_id in existing_ids:
+                continue
+            purged = await purge_user_children_from_db(user_id, db)
+            progress["orphan_users"] += 1
+            for level in ("alarms", "notes", "themes"):
+                progress[level] += purged[level]
+        after = batch[-1]
+    return progress
+
+
+def get_users_cache_stats() -> dict:
+    return users_cache.stats()
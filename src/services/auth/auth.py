@@ -11,4 +11,4 @@ auth_fastapi_users = FastAPIUsers[BackendUser, ObjectId](
 )
 
 
-get_current_backend_user = auth_fastapi_users.current_user()
+get_current_backend_user = auth_fastapi_users.current_user(active=True)
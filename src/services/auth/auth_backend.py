@@ -1,13 +1,134 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import uuid4
+
+import jwt
+from fastapi_users import exceptions, models
 from fastapi_users.authentication import BearerTransport, AuthenticationBackend
 from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+from fastapi_users.manager import BaseUserManager
 
+from src.services.auth.database import BeanieRevocationList
+from src.utils import config
+from src.utils.cache import TTLCache
 from src.utils.config import JWT_SECRET
 
 bearer_transport = BearerTransport(tokenUrl="auth/jwr/login")
 
+# Backend user of every verified token, bot sends the same token with every request till it expires
+verified_tokens_cache: TTLCache[str, models.UP] = TTLCache(maxsize=config.AUTH_CACHE_SIZE,
+                                                           ttl_seconds=config.AUTH_CACHE_TTL_SECONDS)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def revoke_user_tokens(user_id) -> int:
+    """Forget verified tokens of user, so next request loads user from db again"""
+    return verified_tokens_cache.invalidate_values(lambda user: user.id == user_id)
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """JWT strategy, that loads user from db only on first request with token, inactive user is never cached"""
+
+    async def read_token(
+            self, token: Optional[str], user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> Optional[models.UP]:
+        if token is None:
+            return None
+        token_hash = hash_token(token)
+        user = verified_tokens_cache.get(token_hash)
+        if user is not None:
+            return user
+
+        try:
+            data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+        except jwt.PyJWTError:
+            return None
+
+        try:
+            user = await user_manager.get(user_manager.parse_id(user_id))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        if not user.is_active:
+            return None
+        expires_in = data["exp"] - time.time() if "exp" in data else None
+        if expires_in is None or expires_in > 0:
+            verified_tokens_cache.set(token_hash, user, expires_in)
+        return user
+
+
+class RefreshTokenStrategy:
+    """
+    Refresh token is jwt of one session ("fam") with own id ("jti"). Every refresh puts token id
+    to revocation list and issues new token of the same session. Used token presented again means
+    it was stolen, so the whole session is revoked
+    """
+
+    token_audience = ["alarm-bot:refresh"]
+    algorithm = "HS256"
+
+    def __init__(self, secret: str, lifetime_seconds: int, revocation_list: BeanieRevocationList) -> None:
+        self.secret = secret
+        self.lifetime_seconds = lifetime_seconds
+        self.revocation_list = revocation_list
+
+    async def write_token(self, user: models.UP, session_id: str | None = None) -> str:
+        data = {"sub": str(user.id), "aud": self.token_audience,
+                "jti": uuid4().hex, "fam": session_id or uuid4().hex}
+        return generate_jwt(data, self.secret, self.lifetime_seconds, algorithm=self.algorithm)
+
+    def _decode(self, token: str) -> dict | None:
+        try:
+            data = decode_jwt(token, self.secret, self.token_audience, algorithms=[self.algorithm])
+        except jwt.PyJWTError:
+            return None
+        if not all(data.get(key) for key in ("sub", "jti", "fam")):
+            return None
+        return data
+
+    async def rotate(
+            self, token: str, user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> tuple[models.UP, str] | None:
+        """:return active user of token and new refresh token, None if token is not valid anymore"""
+        data = self._decode(token)
+        if data is None or await self.revocation_list.contains([data["fam"]]):
+            return None
+        if not await self.revocation_list.add(data["jti"], datetime.utcfromtimestamp(data["exp"])):
+            await self.revoke(token)
+            return None
+        try:
+            user = await user_manager.get(user_manager.parse_id(data["sub"]))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        if not user.is_active:
+            return None
+        return user, await self.write_token(user, data["fam"])
+
+    async def revoke(self, token: str) -> bool:
+        """Revoke session of token, session tokens issued later expire before revocation entry"""
+        data = self._decode(token)
+        if data is None:
+            return False
+        expires_at = datetime.utcnow() + timedelta(seconds=self.lifetime_seconds)
+        await self.revocation_list.add(data["fam"], expires_at)
+        return True
+
 
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=JWT_SECRET, lifetime_seconds=120)
+    return CachedJWTStrategy(secret=JWT_SECRET, lifetime_seconds=120)
+
+
+def get_refresh_strategy() -> RefreshTokenStrategy:
+    return RefreshTokenStrategy(secret=JWT_SECRET, lifetime_seconds=config.REFRESH_TOKEN_LIFETIME_SECONDS,
+                                revocation_list=BeanieRevocationList())
 
 
 auth_backend = AuthenticationBackend(
@@ -1,15 +1,11 @@
-import motor.motor_asyncio
+from datetime import datetime
+
 from beanie import Document, init_beanie
 from fastapi_users.db import BeanieBaseUser, BeanieUserDatabase
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
 
-from src.services.database.mongo_db import MongoAPI
-from src.utils.config import DB_USER_PASSWORD
-
-DATABASE_URL = MongoAPI.get_connection_string(DB_USER_PASSWORD)
-client = motor.motor_asyncio.AsyncIOMotorClient(
-    DATABASE_URL, uuidRepresentation="standard"
-)
-backend_users_db = client["UserStorage"]
+from src.services.database.mongo_client import mongo_client_factory
 
 
 class BackendUser(BeanieBaseUser, Document):
@@ -21,14 +17,45 @@ class BackendUser(BeanieBaseUser, Document):
     tags: list[str] = []
 
 
+class RevokedToken(Document):
+    """Id of used refresh token or of revoked session, removed by mongo after token expiry"""
+    id: str
+    expires_at: datetime
+
+    class Settings:
+        name = "revoked_tokens"
+        indexes = [IndexModel("expires_at", expireAfterSeconds=0)]
+
+
+class BeanieRevocationList:
+    """Server-side revocation list of refresh tokens"""
+
+    async def add(self, token_id: str, expires_at: datetime) -> bool:
+        """:return False if token_id was already revoked"""
+        try:
+            await RevokedToken(id=token_id, expires_at=expires_at).insert()
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def contains(self, token_ids: list[str]) -> bool:
+        return await RevokedToken.find({"_id": {"$in": token_ids}}).count() > 0
+
+
 async def get_user_db():
     yield BeanieUserDatabase(BackendUser)
 
 
+def get_backend_users_db():
+    """Client is shared with MongoAPI and created on first use, so importing app doesn't connect to db"""
+    return mongo_client_factory.get_client()["UserStorage"]
+
+
 async def init_backend_users_db():
     await init_beanie(
-        database=backend_users_db,
+        database=get_backend_users_db(),
         document_models=[
             BackendUser,
+            RevokedToken,
         ],
     )
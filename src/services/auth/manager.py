@@ -1,9 +1,10 @@
-from typing import Optional, Any
+from typing import Optional, Any, Dict
 
 from bson import ObjectId
 from fastapi import Depends, Request
 from fastapi_users import BaseUserManager
 
+from src.services.auth.auth_backend import revoke_user_tokens
 from src.services.auth.database import BackendUser, get_user_db
 from src.services.database.database_exceptions import InvalidIdException
 from src.utils.config import VERIFICATION_TOKEN_SECRET
@@ -24,6 +25,13 @@ class UserManager(BaseUserManager[BackendUser, ObjectId]):
     async def on_after_register(self, user: BackendUser, request: Optional[Request] = None):
         ...
 
+    async def on_after_update(self, user: BackendUser, update_dict: Dict[str, Any],
+                              request: Optional[Request] = None):
+        revoke_user_tokens(user.id)
+
+    async def on_after_delete(self, user: BackendUser, request: Optional[Request] = None):
+        revoke_user_tokens(user.id)
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
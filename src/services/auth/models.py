@@ -2,6 +2,7 @@ from typing import Optional
 
 from bson import ObjectId
 from fastapi_users import schemas
+from pydantic import BaseModel
 
 
 class UserRead(schemas.BaseUser[ObjectId]):
@@ -20,3 +21,13 @@ class UserCreate(schemas.BaseUserCreate):
     is_superuser: Optional[bool] = False
     is_verified: Optional[bool] = False
     tags: list[str] = []
+
+
+class TokensModel(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
+class RefreshTokenModel(BaseModel):
+    refresh_token: str
@@ -1,9 +1,24 @@
 from src.services.database.interface import IDataBase
+from src.services.database.memory_db import MemoryAPI
 from src.services.database.mongo_db import MongoAPI
+from src.services.database.sqlite_db import SqliteAPI
 from src.utils import config
 
+DB_BACKENDS: dict[str, type[IDataBase]] = {
+    "mongo": MongoAPI,
+    "memory": MemoryAPI,
+    "sqlite": SqliteAPI,
+}
+
+
+def get_db_class() -> type[IDataBase]:
+    try:
+        return DB_BACKENDS[config.DB_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown DB_BACKEND {config.DB_BACKEND}, expected one of {', '.join(DB_BACKENDS)}")
+
 
 def connect_to_db() -> IDataBase:
-    db = MongoAPI()
+    db = get_db_class()()
     db.connect_to_db(config.DB_USER_PASSWORD)
     return db
@@ -0,0 +1,55 @@
+from src.core.models.AlarmModel import ALARM_INDEXES
+from src.core.models.IndexModel import IndexModel, QueryShapeModel
+from src.core.models.NoteModel import NOTE_INDEXES
+from src.core.models.ThemeModel import THEME_INDEXES
+
+# Indexes every db backend must provide, by collection name
+INDEXES: dict[str, tuple[IndexModel, ...]] = {
+    "user": (),
+    "alarms": ALARM_INDEXES,
+    "notes": NOTE_INDEXES,
+    "themes": THEME_INDEXES,
+    "locks": (),
+}
+
+# Every filter shape issued by routers, infrastructure and jobs. "_id" lookups are not listed,
+# lists are paged by "_id", so it is the last field of list queries
+QUERY_SHAPES: tuple[QueryShapeModel, ...] = (
+    QueryShapeModel("alarms", ("status", "_id")),
+    QueryShapeModel("alarms", ("status", "times.due_at_utc")),
+    QueryShapeModel("alarms", ("status", "partition", "times.due_at_utc")),
+    QueryShapeModel("alarms", ("status", "lease.expires_at")),
+    QueryShapeModel("alarms", ("links.user_id", "_id")),
+    QueryShapeModel("alarms", ("links.parent_id", "_id")),
+    QueryShapeModel("alarms", ("links.user_id",)),
+    QueryShapeModel("alarms", ("links.parent_id",)),
+    QueryShapeModel("notes", ("links.user_id", "_id")),
+    QueryShapeModel("notes", ("links.theme_id", "_id")),
+    QueryShapeModel("notes", ("links.user_id",)),
+    QueryShapeModel("notes", ("links.theme_id",)),
+    QueryShapeModel("themes", ("links.user_id", "_id")),
+    QueryShapeModel("themes", ("links.user_id",)),
+)
+
+
+def is_query_indexed(query: QueryShapeModel, indexes_keys: list[tuple[str, ...]]) -> bool:
+    """
+    Query is indexed if some index starts with query equality fields in any order
+    followed by query last field
+    """
+    *equality_fields, last_field = query.fields
+    for index_keys in indexes_keys:
+        prefix = index_keys[:len(query.fields)]
+        if len(prefix) == len(query.fields) and set(prefix[:-1]) == set(equality_fields) \
+                and prefix[-1] == last_field:
+            return True
+    return False
+
+
+def find_unindexed_queries(indexes_keys_by_collection: dict[str, list[tuple[str, ...]]]
+                           ) -> list[QueryShapeModel]:
+    """Get queries from QUERY_SHAPES not served by any of given indexes"""
+    return [
+        query for query in QUERY_SHAPES
+        if not is_query_indexed(query, indexes_keys_by_collection.get(query.collection, []))
+    ]
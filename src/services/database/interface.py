@@ -1,12 +1,25 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator
+
 from src.core.models.UserModel import UserModel
-from src.core.models.AlarmModel import AlarmModel, AlarmRouterModel, AlarmModelWrite
+from src.core.models.AlarmModel import AlarmModel, AlarmRouterModel, AlarmModelWrite, AlarmStatuses
 from src.core.models.ThemeModel import ThemeModel, ThemeModelWrite
 from src.core.models.NoteModel import NoteModelWrite, NoteModel
 
 
 class IDataBase(ABC):
 
+    @abstractmethod
+    async def ensure_indexes(self) -> None:
+        """Create indexes needed by db queries. Must be safe to call on every startup"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release db connections, called on app shutdown"""
+        raise NotImplementedError
+
     # --- User methods --- #
     @abstractmethod
     async def write_new_user(self, user: UserModel) -> str:
@@ -21,6 +34,14 @@ class IDataBase(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[UserModel]:
+        """
+        Get all users with id from user_ids by one request.
+        Ids without user in db are skipped, so result can be shorter than user_ids
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def delete_user_by_id(self, user_id: str) -> int:
         """
@@ -29,6 +50,14 @@ class IDataBase(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_linked_user_ids(self, after: str | None, limit: int) -> list[str]:
+        """
+        Get sorted page of ids of users linked from themes, notes and alarms, including already deleted users.
+        Return at most limit ids greater than after, empty list if no more ids
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def update_username(self, user_id: str, new_username: str) -> int:
         """
@@ -43,14 +72,50 @@ class IDataBase(ABC):
         """Write new alarm to db"""
         raise NotImplementedError
 
+    @abstractmethod
+    async def write_new_alarms(self, alarms: list[AlarmModelWrite]) -> list[str | None]:
+        """
+        Add many alarms by one unordered request, failed alarm does not stop others.
+        Return id of every written alarm in alarms order, None for alarm that was not written
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def get_alarm_by_id(self, alarm_id: str) -> AlarmModel:
         """Get alarm from db by id"""
         raise NotImplementedError
 
     @abstractmethod
-    async def get_all_alarms_by_condition(self, condition: dict) -> list[AlarmModel]:
-        """Get all alarms from db by condition"""
+    async def get_alarms_by_ids(self, alarm_ids: list[str]) -> list[AlarmModel]:
+        """
+        Get all alarms with id from alarm_ids by one request.
+        Ids without alarm in db are skipped, so result can be shorter than alarm_ids
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_alarms_by_condition(self, condition: dict, limit: int | None = None,
+                                          after: str | None = None) -> list[AlarmModel]:
+        """
+        Get all alarms from db by condition, ordered by id.
+        Return at most limit items (all if limit is None) with id greater than after
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_alarms_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[AlarmModel]:
+        """
+        Async iterate alarms by condition ordered by id without loading them all in memory.
+        If no matches, should raise DBNotFound exception on first iteration
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_due_alarms(self, due_before: datetime, partitions: list[int] | None = None) -> list[AlarmModel]:
+        """
+        Get all QUEUE alarms with times.due_at_utc <= due_before by one range query,
+        only of given partitions if they are set. If no alarms are due, return empty list
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -58,6 +123,41 @@ class IDataBase(ABC):
         """Update alarm instance in db with new data"""
         raise NotImplementedError
 
+    @abstractmethod
+    async def update_alarms_status(self, alarm_ids: list[str], current_status: AlarmStatuses,
+                                   new_status: AlarmStatuses) -> int:
+        """
+        Move all alarms from alarm_ids that are still in current_status to new_status by one request.
+        Alarms with other status stay untouched, so repeated call is safe.
+        :return how many alarms changed status
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def postpone_alarm(self, alarm_id: str, now: datetime) -> AlarmModel | None:
+        """
+        Atomically queue repeatable alarm again at now + repeat_interval minutes, due_at_utc is shifted
+        by the same time, lease is dropped. Return postponed alarm, None if there is no repeatable alarm with alarm_id
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_update_alarms(self, new_data_by_id: dict[str, dict],
+                                 conditions_by_id: dict[str, dict] | None = None) -> int:
+        """
+        Set own new_data on every alarm from new_data_by_id by one unordered bulk request, return updated count.
+        Alarm with condition in conditions_by_id is updated only if it still matches it
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_alarms_by_ids(self, alarm_ids: list[str], condition: dict, new_data: dict) -> int:
+        """
+        Set new_data on alarms with id from alarm_ids, that still match condition, by one request.
+        Condition is checked atomically with update, return updated count
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def delete_alarm_by_id(self, alarm_id: dict) -> int:
         """Delete single alarm from db by id"""
@@ -68,6 +168,19 @@ class IDataBase(ABC):
         """Delete many alarms by condition in db"""
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_alarms_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        """
+        Get only ids of alarms by condition by one request, without loading alarms.
+        Return at most limit ids (all if limit is None), empty list if no matches
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_alarms_by_ids(self, alarm_ids: list[str]) -> int:
+        """Delete alarms with id from alarm_ids by one request, return deleted count, 0 if none deleted"""
+        raise NotImplementedError
+
     #     # --- Themes methods --- #
     @abstractmethod
     async def write_new_theme(self, theme: ThemeModelWrite) -> str:
@@ -80,8 +193,20 @@ class IDataBase(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def get_all_themes_by_condition(self, condition: dict) -> list[ThemeModel]:
-        """Get all themes!! from db by condition"""
+    async def get_all_themes_by_condition(self, condition: dict, limit: int | None = None,
+                                          after: str | None = None) -> list[ThemeModel]:
+        """
+        Get all themes!! from db by condition, ordered by id.
+        Return at most limit items (all if limit is None) with id greater than after
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_themes_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[ThemeModel]:
+        """
+        Async iterate themes by condition ordered by id without loading them all in memory.
+        If no matches, should raise DBNotFound exception on first iteration
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -99,6 +224,19 @@ class IDataBase(ABC):
         """Delete many themes by condition in db"""
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_themes_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        """
+        Get only ids of themes by condition by one request, without loading themes.
+        Return at most limit ids (all if limit is None), empty list if no matches
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_themes_by_ids(self, theme_ids: list[str]) -> int:
+        """Delete themes with id from theme_ids by one request, return deleted count, 0 if none deleted"""
+        raise NotImplementedError
+
     # --- Notes methods --- #
     @abstractmethod
     async def write_new_note(self, note: NoteModelWrite) -> str:
@@ -111,10 +249,23 @@ class IDataBase(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def get_all_notes_by_condition(self, condition: dict) -> list[NoteModel]:
-        """Get all notes from db by condition"""
+    async def get_all_notes_by_condition(self, condition: dict, limit: int | None = None,
+                                         after: str | None = None) -> list[NoteModel]:
+        """
+        Get all notes from db by condition, ordered by id.
+        Return at most limit items (all if limit is None) with id greater than after
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_notes_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[NoteModel]:
+        """
+        Async iterate notes by condition ordered by id without loading them all in memory.
+        If no matches, should raise DBNotFound exception on first iteration
+        """
         raise NotImplementedError
 
+
     @abstractmethod
     async def update_note(self, note_id: str, new_data: dict) -> int:
         """Update note instance in db with new data"""
@@ -129,3 +280,35 @@ class IDataBase(ABC):
     async def delete_all_notes_by_condition(self, condition: dict) -> int:
         """Delete many notes by condition in db"""
         raise NotImplementedError
+
+    @abstractmethod
+    async def get_notes_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        """
+        Get only ids of notes by condition by one request, without loading notes.
+        Return at most limit ids (all if limit is None), empty list if no matches
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_notes_by_ids(self, note_ids: list[str]) -> int:
+        """Delete notes with id from note_ids by one request, return deleted count, 0 if none deleted"""
+        raise NotImplementedError
+
+    # --- Locks methods --- #
+    @abstractmethod
+    async def acquire_lock(self, name: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Take free or expired lock, or renew lock already held by owner, for lease_seconds by one atomic request.
+        Return False if lock is held by other owner
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_locks_owners(self, prefix: str) -> dict[str, str]:
+        """Get owner of every not expired lock with name starting with prefix, by lock name"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_lock(self, name: str, owner: str) -> None:
+        """Free lock if it is still held by owner, so other owner can take it at once"""
+        raise NotImplementedError
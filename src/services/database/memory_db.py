@@ -0,0 +1,535 @@
+import copy
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Any
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from src.core.models.AlarmModel import AlarmModel, AlarmModelWrite, AlarmStatuses, AlarmTimesModel
+from src.core.models.IndexModel import IndexModel
+from src.core.models.NoteModel import NoteModelWrite, NoteModel
+from src.core.models.ThemeModel import ThemeModel, ThemeModelWrite
+from src.core.models.UserModel import UserModel
+from src.core.models.trusted import construct_trusted
+from src.services.database.database_exceptions import DBNotFound, DuplicateKey, InvalidIdException
+from src.services.database.indexes import INDEXES
+from src.services.database.interface import IDataBase
+
+logger = logging.getLogger("app.database_api.memory")
+
+_MISSING = object()
+# Greater than any ObjectId hex string, closes (value, id) range in sorted index
+_MAX_ID = "~"
+
+
+def get_field(document: dict, path: str) -> Any:
+    """Get value by dotted path like "links.user_id", _MISSING if there is no such field"""
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def set_field(document: dict, path: str, value: Any) -> None:
+    *parents, last = path.split(".")
+    for key in parents:
+        document = document.setdefault(key, {})
+    document[last] = value
+
+
+def _normalize(value: Any) -> Any:
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+def _match_operator(value: Any, operator: str, argument: Any) -> bool:
+    argument = _normalize(argument)
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(argument)
+    value = None if value is _MISSING else value
+    if operator == "$in":
+        return value in [_normalize(item) for item in argument]
+    if operator == "$ne":
+        return value != argument
+    if value is None or argument is None:
+        return False
+    if operator == "$gt":
+        return value > argument
+    if operator == "$gte":
+        return value >= argument
+    if operator == "$lt":
+        return value < argument
+    if operator == "$lte":
+        return value <= argument
+    raise ValueError(f"Operator {operator} is not supported by memory db")
+
+
+def match(document: dict, condition: dict) -> bool:
+    """Match document with subset of Mongo query language used by the app"""
+    for path, expected in condition.items():
+        value = get_field(document, path)
+        if isinstance(expected, dict) and expected and all(key.startswith("$") for key in expected):
+            if not all(_match_operator(value, operator, argument) for operator, argument in expected.items()):
+                return False
+        elif _normalize(expected) is None:
+            # Like Mongo, None matches missing field too
+            if value is not _MISSING and value is not None:
+                return False
+        elif value is _MISSING or value != _normalize(expected):
+            return False
+    return True
+
+
+class MemoryCollection:
+    """
+    Documents by id with sorted id list for keyset pages, hash indexes on hash_fields
+    and sorted (value, id) index on sorted_field for documents matching sorted_condition
+    """
+
+    def __init__(self, hash_fields: tuple[str, ...] = (), sorted_field: str | None = None,
+                 sorted_condition: dict | None = None) -> None:
+        self.hash_fields = hash_fields
+        self.sorted_field = sorted_field
+        self.sorted_condition = sorted_condition or {}
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def clear(self) -> None:
+        self.documents: dict[str, dict] = {}
+        self._ids: list[str] = []
+        self._hash_indexes: dict[str, dict[Any, set[str]]] = {field: defaultdict(set) for field in self.hash_fields}
+        self._sorted_index: list[tuple[Any, str]] = []
+
+    def _sorted_key(self, document: dict) -> tuple[Any, str] | None:
+        if self.sorted_field is None or not match(document, self.sorted_condition):
+            return None
+        value = get_field(document, self.sorted_field)
+        return None if value is _MISSING or value is None else (value, document["_id"])
+
+    def index(self, document: dict) -> None:
+        _id = document["_id"]
+        for field, index in self._hash_indexes.items():
+            value = get_field(document, field)
+            if value is not _MISSING:
+                index[value].add(_id)
+        sorted_key = self._sorted_key(document)
+        if sorted_key is not None:
+            insort(self._sorted_index, sorted_key)
+
+    def unindex(self, document: dict) -> None:
+        _id = document["_id"]
+        for field, index in self._hash_indexes.items():
+            value = get_field(document, field)
+            if value is not _MISSING:
+                index[value].discard(_id)
+                if not index[value]:
+                    del index[value]
+        sorted_key = self._sorted_key(document)
+        if sorted_key is not None:
+            position = bisect_left(self._sorted_index, sorted_key)
+            if position < len(self._sorted_index) and self._sorted_index[position] == sorted_key:
+                del self._sorted_index[position]
+
+    def insert(self, document: dict) -> None:
+        self.documents[document["_id"]] = document
+        insort(self._ids, document["_id"])
+        self.index(document)
+
+    def delete(self, document: dict) -> None:
+        self.unindex(document)
+        del self.documents[document["_id"]]
+        del self._ids[bisect_left(self._ids, document["_id"])]
+
+    def _hash_candidates(self, condition: dict) -> set[str] | None:
+        """Smallest id set from hash indexes usable for condition, None if no index can be used"""
+        candidates = None
+        for field, index in self._hash_indexes.items():
+            if field not in condition:
+                continue
+            expected = condition[field]
+            values = expected["$in"] if isinstance(expected, dict) and list(expected) == ["$in"] else [expected]
+            values = [_normalize(value) for value in values]
+            # None matches missing fields, which are not indexed
+            if any(value is None or isinstance(value, dict) for value in values):
+                continue
+            field_candidates = set().union(*(index.get(value, ()) for value in values))
+            if candidates is None or len(field_candidates) < len(candidates):
+                candidates = field_candidates
+        return candidates
+
+    def find(self, condition: dict, limit: int | None = None, after: str | None = None) -> list[dict]:
+        """Documents matching condition ordered by id, with id greater than after"""
+        candidates = self._hash_candidates(condition)
+        if candidates is None:
+            ids = self._ids[bisect_right(self._ids, after):] if after is not None else self._ids
+        else:
+            ids = sorted(_id for _id in candidates if after is None or _id > after)
+        result = list()
+        for _id in ids:
+            document = self.documents[_id]
+            if match(document, condition):
+                result.append(document)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def distinct(self, field: str) -> list[Any]:
+        """Distinct values of field, taken from hash index if there is one"""
+        if field in self._hash_indexes:
+            return list(self._hash_indexes[field])
+        values = (get_field(document, field) for document in self.documents.values())
+        return list({value for value in values if value is not _MISSING})
+
+    def find_sorted_up_to(self, max_value: Any) -> list[dict]:
+        """Documents from sorted index with value <= max_value, ordered by value"""
+        position = bisect_right(self._sorted_index, (max_value, _MAX_ID))
+        return [self.documents[_id] for _, _id in self._sorted_index[:position]]
+
+
+def _leading_fields(indexes: tuple[IndexModel, ...]) -> tuple[str, ...]:
+    """First field of every index, "_id" order is kept by MemoryCollection itself"""
+    return tuple(dict.fromkeys(index.keys[0][0] for index in indexes if index.keys[0][0] != "_id"))
+
+
+class MemoryAPI(IDataBase):
+    """
+    IDataBase kept in process memory, documents have the same shape as in Mongo.
+    Hash indexes are built on the leading field of every index from registry, so the same
+    queries are indexed as in Mongo. Fast backend for tests, local runs and benchmarks, data is lost on restart
+    """
+    _collections: dict[str, MemoryCollection]
+
+    __instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance._collections = {
+                name: MemoryCollection(hash_fields=_leading_fields(indexes)) for name, indexes in INDEXES.items()
+            }
+            # Serves get_due_alarms like "status_due_at_utc" index in Mongo
+            cls.__instance._collections["alarms"] = MemoryCollection(
+                hash_fields=_leading_fields(INDEXES["alarms"]),
+                sorted_field="times.due_at_utc",
+                sorted_condition={"status": AlarmStatuses.QUEUE.value}
+            )
+        return cls.__instance
+
+    def connect_to_db(self, password: str | None = None) -> bool:
+        logger.info("Using in-memory db")
+        return True
+
+    async def close(self) -> None:
+        ...
+
+    async def clear(self) -> None:
+        for collection in self._collections.values():
+            collection.clear()
+
+    async def ensure_indexes(self) -> None:
+        """Indexes are maintained on every write"""
+        ...
+
+    @staticmethod
+    def check_id(_id: str) -> str:
+        try:
+            return str(ObjectId(_id))
+        except (InvalidId, TypeError):
+            raise InvalidIdException(f"{_id} is not a valid, it must be a 12-byte input or a 24-character hex string")
+
+    def _insert(self, collection: str, document: dict, _id: str | None = None) -> str:
+        _id = str(ObjectId()) if _id is None else _id
+        if _id in self._collections[collection].documents:
+            raise DuplicateKey(f"{collection} duplicate key")
+        self._collections[collection].insert({"_id": _id, **copy.deepcopy(document)})
+        return _id
+
+    def _find(self, collection: str, condition: dict, limit: int | None = None,
+              after: str | None = None) -> list[dict]:
+        if after is not None and collection != "user":
+            after = self.check_id(after)
+        return self._collections[collection].find(condition, limit, after)
+
+    def _update(self, collection: str, documents: list[dict], new_data: dict) -> int:
+        """Apply "$set" data, return count of actually changed documents like Mongo modified_count"""
+        modified_count = 0
+        for document in documents:
+            changes = {path: value for path, value in new_data.items() if get_field(document, path) != value}
+            if not changes:
+                continue
+            self._collections[collection].unindex(document)
+            for path, value in changes.items():
+                set_field(document, path, copy.deepcopy(value))
+            self._collections[collection].index(document)
+            modified_count += 1
+        return modified_count
+
+    def _delete(self, collection: str, documents: list[dict]) -> int:
+        for document in documents:
+            self._collections[collection].delete(document)
+        return len(documents)
+
+    def _get_by_id(self, collection: str, _id: str) -> dict | None:
+        return self._collections[collection].documents.get(self.check_id(_id))
+
+    def _get_by_ids(self, collection: str, ids: list[str]) -> list[dict]:
+        documents = (self._get_by_id(collection, _id) for _id in set(ids))
+        return [document for document in documents if document is not None]
+
+    # --- Users --- #
+    @staticmethod
+    def _to_user(document: dict) -> UserModel:
+        document = dict(document)
+        document["telegram_id"] = document.pop("_id")
+        return construct_trusted(UserModel, document)
+
+    async def write_new_user(self, user: UserModel) -> str:
+        user_dict = user.dict()
+        telegram_id = user_dict.pop("telegram_id")
+        try:
+            return self._insert("user", user_dict, telegram_id)
+        except DuplicateKey:
+            raise DuplicateKey("User duplicat key")
+
+    async def get_user_by_id(self, user_id: str) -> UserModel:
+        user = self._collections["user"].documents.get(user_id)
+        if user is None:
+            raise DBNotFound("User not found")
+        return self._to_user(user)
+
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[UserModel]:
+        users = self._collections["user"].documents
+        return [self._to_user(users[user_id]) for user_id in set(user_ids) if user_id in users]
+
+    async def get_linked_user_ids(self, after: str | None, limit: int) -> list[str]:
+        user_ids = set()
+        for collection in ("themes", "notes", "alarms"):
+            user_ids.update(self._collections[collection].distinct("links.user_id"))
+        return sorted(user_id for user_id in user_ids
+                      if user_id is not None and (after is None or user_id > after))[:limit]
+
+    async def delete_user_by_id(self, user_id: str) -> int:
+        user = self._collections["user"].documents.get(user_id)
+        if user is None:
+            raise DBNotFound("User not found")
+        return self._delete("user", [user])
+
+    async def update_username(self, user_id: str, new_username: str) -> int:
+        user = self._collections["user"].documents.get(user_id)
+        if user is None or not self._update("user", [user], {"user_name": new_username}):
+            raise DBNotFound("User not found")
+        return 1
+
+    # --- Alarms --- #
+    async def write_new_alarm(self, alarm: AlarmModelWrite) -> str:
+        alarm_dict = alarm.dict()
+        alarm_dict["status"] = alarm.status.value
+        return self._insert("alarms", alarm_dict)
+
+    async def write_new_alarms(self, alarms: list[AlarmModelWrite]) -> list[str | None]:
+        alarm_ids = list()
+        for alarm in alarms:
+            try:
+                alarm_ids.append(await self.write_new_alarm(alarm))
+            except DuplicateKey:
+                alarm_ids.append(None)
+        return alarm_ids
+
+    async def get_alarm_by_id(self, alarm_id: str) -> AlarmModel:
+        alarm = self._get_by_id("alarms", alarm_id)
+        if alarm is None:
+            raise DBNotFound("Alarm not found")
+        return construct_trusted(AlarmModel, alarm)
+
+    async def get_alarms_by_ids(self, alarm_ids: list[str]) -> list[AlarmModel]:
+        return [construct_trusted(AlarmModel, alarm) for alarm in self._get_by_ids("alarms", alarm_ids)]
+
+    async def get_all_alarms_by_condition(self, condition: dict, limit: int | None = None,
+                                          after: str | None = None) -> list[AlarmModel]:
+        alarms = self._find("alarms", condition, limit, after)
+        if not alarms:
+            raise DBNotFound("Alarms match condition not found")
+        return [construct_trusted(AlarmModel, alarm) for alarm in alarms]
+
+    async def iter_alarms_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[AlarmModel]:
+        for alarm in await self.get_all_alarms_by_condition(condition, after=after):
+            yield alarm
+
+    async def get_due_alarms(self, due_before: datetime, partitions: list[int] | None = None) -> list[AlarmModel]:
+        alarms = self._collections["alarms"].find_sorted_up_to(due_before)
+        if partitions is not None:
+            alarms = [alarm for alarm in alarms if alarm.get("partition") in partitions]
+        return [construct_trusted(AlarmModel, alarm) for alarm in alarms]
+
+    async def update_alarm(self, alarm_id: str, new_data: dict) -> int:
+        alarm = self._get_by_id("alarms", alarm_id)
+        if alarm is None or not self._update("alarms", [alarm], new_data):
+            raise DBNotFound("Alarm not found")
+        return 1
+
+    async def update_alarms_status(self, alarm_ids: list[str], current_status: AlarmStatuses,
+                                   new_status: AlarmStatuses) -> int:
+        alarms = [self._get_by_id("alarms", alarm_id) for alarm_id in alarm_ids]
+        alarms = [alarm for alarm in alarms if alarm is not None and alarm["status"] == current_status.value]
+        return self._update("alarms", alarms, {"status": new_status.value})
+
+    async def postpone_alarm(self, alarm_id: str, now: datetime) -> AlarmModel | None:
+        alarm = self._get_by_id("alarms", alarm_id)
+        if alarm is None or not alarm["is_repeatable"] or alarm["times"].get("repeat_interval") is None:
+            return None
+        times = construct_trusted(AlarmTimesModel, alarm["times"]).postponed(now)
+        self._update("alarms", [alarm], {"status": AlarmStatuses.QUEUE.value, "lease": None,
+                                         "times.next_notion_time": times.next_notion_time,
+                                         "times.due_at_utc": times.due_at_utc})
+        return construct_trusted(AlarmModel, alarm)
+
+    async def bulk_update_alarms(self, new_data_by_id: dict[str, dict],
+                                 conditions_by_id: dict[str, dict] | None = None) -> int:
+        conditions_by_id = conditions_by_id or dict()
+        modified_count = 0
+        for alarm_id, new_data in new_data_by_id.items():
+            alarm = self._get_by_id("alarms", alarm_id)
+            if alarm is not None and match(alarm, conditions_by_id.get(alarm_id, {})):
+                modified_count += self._update("alarms", [alarm], new_data)
+        return modified_count
+
+    async def update_alarms_by_ids(self, alarm_ids: list[str], condition: dict, new_data: dict) -> int:
+        alarms = [alarm for alarm in self._get_by_ids("alarms", alarm_ids) if match(alarm, condition)]
+        return self._update("alarms", alarms, new_data)
+
+    async def delete_alarm_by_id(self, alarm_id: str) -> int:
+        alarm = self._get_by_id("alarms", alarm_id)
+        if alarm is None:
+            raise DBNotFound(f"Alarm with id {alarm_id} not found")
+        return self._delete("alarms", [alarm])
+
+    async def delete_all_alarms_by_condition(self, condition: dict) -> int:
+        deleted_count = self._delete("alarms", self._find("alarms", condition))
+        if deleted_count == 0:
+            raise DBNotFound("Alarms not found")
+        return deleted_count
+
+    async def get_alarms_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        return [alarm["_id"] for alarm in self._find("alarms", condition, limit)]
+
+    async def delete_alarms_by_ids(self, alarm_ids: list[str]) -> int:
+        return self._delete("alarms", self._get_by_ids("alarms", alarm_ids))
+
+    # --- Themes --- #
+    async def write_new_theme(self, theme: ThemeModelWrite) -> str:
+        return self._insert("themes", theme.dict())
+
+    async def get_theme_by_id(self, theme_id: str) -> ThemeModel:
+        theme = self._get_by_id("themes", theme_id)
+        if theme is None:
+            raise DBNotFound("Theme not found")
+        return construct_trusted(ThemeModel, theme)
+
+    async def get_all_themes_by_condition(self, condition: dict, limit: int | None = None,
+                                          after: str | None = None) -> list[ThemeModel]:
+        themes = self._find("themes", condition, limit, after)
+        if not themes:
+            raise DBNotFound("Themes not found")
+        return [construct_trusted(ThemeModel, theme) for theme in themes]
+
+    async def iter_themes_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[ThemeModel]:
+        for theme in await self.get_all_themes_by_condition(condition, after=after):
+            yield theme
+
+    async def update_theme(self, theme_id: str, new_data: dict) -> int:
+        theme = self._get_by_id("themes", theme_id)
+        if theme is None or not self._update("themes", [theme], new_data):
+            raise DBNotFound("Theme not found")
+        return 1
+
+    async def delete_theme_by_id(self, theme_id: str) -> int:
+        theme = self._get_by_id("themes", theme_id)
+        if theme is None:
+            raise DBNotFound("Theme not found")
+        return self._delete("themes", [theme])
+
+    async def delete_all_themes_by_condition(self, condition: dict) -> int:
+        deleted_count = self._delete("themes", self._find("themes", condition))
+        if deleted_count == 0:
+            raise DBNotFound("Themes not found")
+        return deleted_count
+
+    async def get_themes_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        return [theme["_id"] for theme in self._find("themes", condition, limit)]
+
+    async def delete_themes_by_ids(self, theme_ids: list[str]) -> int:
+        return self._delete("themes", self._get_by_ids("themes", theme_ids))
+
+    # --- Notes --- #
+    async def write_new_note(self, note: NoteModelWrite) -> str:
+        return self._insert("notes", note.dict())
+
+    async def get_note_by_id(self, note_id: str) -> NoteModel:
+        note = self._get_by_id("notes", note_id)
+        if note is None:
+            raise DBNotFound("Note not found")
+        return construct_trusted(NoteModel, note)
+
+    async def get_all_notes_by_condition(self, condition: dict, limit: int | None = None,
+                                         after: str | None = None) -> list[NoteModel]:
+        notes = self._find("notes", condition, limit, after)
+        if not notes:
+            raise DBNotFound("Notes not found")
+        return [construct_trusted(NoteModel, note) for note in notes]
+
+    async def iter_notes_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[NoteModel]:
+        for note in await self.get_all_notes_by_condition(condition, after=after):
+            yield note
+
+    async def update_note(self, note_id: str, new_data: dict) -> int:
+        note = self._get_by_id("notes", note_id)
+        if note is None or not self._update("notes", [note], new_data):
+            raise DBNotFound("Note not found")
+        return 1
+
+    async def delete_note_by_id(self, note_id: str) -> int:
+        note = self._get_by_id("notes", note_id)
+        if note is None:
+            raise DBNotFound("Note not found")
+        return self._delete("notes", [note])
+
+    async def delete_all_notes_by_condition(self, condition: dict) -> int:
+        deleted_count = self._delete("notes", self._find("notes", condition))
+        if deleted_count == 0:
+            raise DBNotFound("Notes not found")
+        return deleted_count
+
+    async def get_notes_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        return [note["_id"] for note in self._find("notes", condition, limit)]
+
+    async def delete_notes_by_ids(self, note_ids: list[str]) -> int:
+        return self._delete("notes", self._get_by_ids("notes", note_ids))
+
+    # --- Locks --- #
+    async def acquire_lock(self, name: str, owner: str, lease_seconds: float) -> bool:
+        now = datetime.utcnow()
+        lock = self._collections["locks"].documents.get(name)
+        new_data = {"owner": owner, "expires_at": now + timedelta(seconds=lease_seconds)}
+        if lock is None:
+            self._insert("locks", new_data, name)
+            return True
+        if lock["owner"] != owner and lock["expires_at"] >= now:
+            return False
+        self._update("locks", [lock], new_data)
+        return True
+
+    async def get_locks_owners(self, prefix: str) -> dict[str, str]:
+        now = datetime.utcnow()
+        return {name: lock["owner"] for name, lock in self._collections["locks"].documents.items()
+                if name.startswith(prefix) and lock["expires_at"] >= now}
+
+    async def release_lock(self, name: str, owner: str) -> None:
+        lock = self._collections["locks"].documents.get(name)
+        if lock is not None and lock["owner"] == owner:
+            self._delete("locks", [lock])
@@ -0,0 +1,616 @@
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Type
+
+import aiosqlite
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from src.core.models.AlarmModel import AlarmModel, AlarmModelWrite, AlarmStatuses, AlarmTimesModel
+from src.core.models.NoteModel import NoteModelWrite, NoteModel
+from src.core.models.ThemeModel import ThemeModel, ThemeModelWrite
+from src.core.models.UserModel import UserModel
+from src.core.models.trusted import construct_trusted, ModelT
+from src.services.database.database_exceptions import DBNotFound, DuplicateKey, InvalidIdException
+from src.services.database.indexes import INDEXES
+from src.services.database.interface import IDataBase
+from src.utils import config
+
+logger = logging.getLogger("app.database_api.sqlite")
+
+# Same sql text for the same query shape, so every shape is prepared once and taken from cache after
+STATEMENT_CACHE_SIZE = 256
+# Max writes committed by one transaction
+WRITE_BATCH_SIZE = 256
+
+
+def column_name(path: str) -> str:
+    """Generated column for document field, "links.user_id" -> "links_user_id" """
+    return "id" if path == "_id" else path.replace(".", "_")
+
+
+def indexed_paths(collection: str) -> list[str]:
+    """Document fields used by indexes from registry, each of them is a generated column"""
+    paths = dict.fromkeys(key for index in INDEXES[collection] for key, _ in index.keys)
+    paths.pop("_id", None)
+    return list(paths)
+
+
+def schema(collection: str) -> list[str]:
+    """
+    Table keeps document as json, indexed fields are virtual generated columns,
+    so they can not go out of sync with document. Indexes end with "id", so filter and keyset order
+    are resolved in index and only matched documents are read from table by primary key
+    """
+    columns = "".join(
+        f", \"{column_name(path)}\" GENERATED ALWAYS AS (json_extract(doc, '$.{path}')) VIRTUAL"
+        for path in indexed_paths(collection)
+    )
+    statements = [f'CREATE TABLE IF NOT EXISTS "{collection}" (id TEXT PRIMARY KEY, doc TEXT NOT NULL{columns})']
+    for index in INDEXES[collection]:
+        index_columns = ", ".join(f'"{column_name(key)}"' for key, _ in index.keys)
+        statements.append(f'CREATE INDEX IF NOT EXISTS "{collection}_{index.name}" ON "{collection}" ({index_columns})')
+    return statements
+
+
+def _param(value: Any) -> Any:
+    """Query value in the same form as it is stored in json document"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class Where:
+    """Translate subset of Mongo query language used by the app to sql condition"""
+    _comparisons = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+    def __init__(self, collection: str, condition: dict) -> None:
+        self.columns = set(indexed_paths(collection)) | {"_id"}
+        self.parts: list[str] = []
+        self.params: list[Any] = []
+        for path, expected in condition.items():
+            if isinstance(expected, dict) and expected and all(key.startswith("$") for key in expected):
+                for operator, argument in expected.items():
+                    self._add_operator(path, operator, argument)
+            elif expected is None:
+                self._add(f"{self._field(path)} IS NULL")
+            else:
+                self._add(f"{self._field(path)} = ?", _param(expected))
+
+    def _field(self, path: str) -> str:
+        if path in self.columns:
+            return f'"{column_name(path)}"'
+        self.params.append(f"$.{path}")
+        return "json_extract(doc, ?)"
+
+    def _add(self, part: str, *params: Any) -> None:
+        self.parts.append(part)
+        self.params.extend(params)
+
+    def _add_operator(self, path: str, operator: str, argument: Any) -> None:
+        if operator == "$exists":
+            self.params.append(f"$.{path}")
+            self._add(f"json_type(doc, ?) IS {'NOT ' if argument else ''}NULL")
+        elif operator == "$in":
+            values = [_param(value) for value in argument]
+            field = self._field(path)
+            part = f"{field} IN (SELECT value FROM json_each(?))"
+            if None in values:
+                part = f"({part} OR {field} IS NULL)"
+            self._add(part, orjson.dumps([value for value in values if value is not None]).decode())
+        elif operator == "$ne" and argument is None:
+            self._add(f"{self._field(path)} IS NOT NULL")
+        elif operator == "$ne":
+            self._add(f"{self._field(path)} IS NOT ?", _param(argument))
+        elif operator in self._comparisons:
+            self._add(f"{self._field(path)} {self._comparisons[operator]} ?", _param(argument))
+        else:
+            raise ValueError(f"Operator {operator} is not supported by sqlite db")
+
+    def sql(self) -> str:
+        return " AND ".join(self.parts) if self.parts else "1"
+
+
+class SqliteAPI(IDataBase):
+    """
+    IDataBase in local SQLite file for single node deployments.
+    Documents are stored as json with the same shape as in Mongo, WAL journal lets reads go along with writes.
+    Writes go through one writer task, which commits all writes queued by concurrent requests in one transaction
+    """
+    _path: str
+    _connection: aiosqlite.Connection | None = None
+    _connect_lock: asyncio.Lock
+    _write_queue: asyncio.Queue | None = None
+    _writer: asyncio.Task | None = None
+
+    __instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance._path = config.SQLITE_PATH
+            cls.__instance._connect_lock = asyncio.Lock()
+        return cls.__instance
+
+    def connect_to_db(self, password: str | None = None) -> bool:
+        """Connection is opened on first query, it must be opened in running event loop"""
+        self._path = config.SQLITE_PATH
+        logger.info(f"Using sqlite db {self._path}")
+        return True
+
+    async def _get_connection(self) -> aiosqlite.Connection:
+        if self._connection is None:
+            async with self._connect_lock:
+                if self._connection is None:
+                    connection = await aiosqlite.connect(self._path, isolation_level=None,
+                                                         cached_statements=STATEMENT_CACHE_SIZE)
+                    await connection.execute("PRAGMA journal_mode=WAL")
+                    await connection.execute("PRAGMA synchronous=NORMAL")
+                    await self._create_schema(connection)
+                    self._connection = connection
+        return self._connection
+
+    @staticmethod
+    async def _create_schema(connection: aiosqlite.Connection) -> None:
+        for collection in INDEXES:
+            existing_table = await connection.execute_fetchall(f'PRAGMA table_xinfo("{collection}")')
+            existing_columns = {row[1] for row in existing_table}
+            if existing_columns:
+                # Fields of indexes added to registry later
+                for path in indexed_paths(collection):
+                    if column_name(path) not in existing_columns:
+                        await connection.execute(
+                            f'ALTER TABLE "{collection}" ADD COLUMN "{column_name(path)}" '
+                            f"GENERATED ALWAYS AS (json_extract(doc, '$.{path}')) VIRTUAL"
+                        )
+            for statement in schema(collection):
+                await connection.execute(statement)
+
+    async def ensure_indexes(self) -> None:
+        """Tables and indexes from registry are created with connection"""
+        await self._get_connection()
+        logger.info("Sqlite indexes are ensured")
+
+    async def close(self) -> None:
+        """Must be awaited before exit, connection worker thread keeps process alive until it is closed"""
+        if self._writer is not None:
+            # Writer commits everything queued before it gets None
+            self._write_queue.put_nowait(None)
+            await self._writer
+            self._writer = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def clear(self) -> None:
+        for collection in INDEXES:
+            await self._write(f'DELETE FROM "{collection}"', ())
+
+    async def _write(self, sql: str, params: tuple | list) -> int:
+        """Queue write to writer task, return affected rows count after write is committed"""
+        if self._writer is None or self._writer.done():
+            self._write_queue = asyncio.Queue()
+            self._writer = asyncio.get_running_loop().create_task(self._run_writer())
+        result = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((sql, params, result))
+        return await result
+
+    async def _run_writer(self) -> None:
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            is_closing = batch[-1] is None
+            batch = [write for write in batch if write is not None]
+            if batch:
+                await self._commit_batch(batch)
+            if is_closing:
+                return
+
+    async def _commit_batch(self, batch: list[tuple[str, tuple | list, asyncio.Future]]) -> None:
+        """
+        One transaction for whole batch. Failed statement is rolled back alone by sqlite,
+        so its error goes to its own caller and other writes are still committed
+        """
+        connection = await self._get_connection()
+        done = list()
+        try:
+            await connection.execute("BEGIN")
+            for sql, params, result in batch:
+                try:
+                    cursor = await connection.execute(sql, params)
+                except sqlite3.IntegrityError as err:
+                    result.set_exception(err)
+                    continue
+                done.append((result, cursor.rowcount))
+            await connection.execute("COMMIT")
+        except Exception as err:
+            logger.error(f"Sqlite write batch failed: {str(err)}")
+            if connection.in_transaction:
+                await connection.execute("ROLLBACK")
+            for _, _, result in batch:
+                if not result.done():
+                    result.set_exception(err)
+            return
+        for result, rowcount in done:
+            result.set_result(rowcount)
+
+    @staticmethod
+    def check_id(_id: str) -> str:
+        try:
+            return str(ObjectId(_id))
+        except (InvalidId, TypeError):
+            raise InvalidIdException(f"{_id} is not a valid, it must be a 12-byte input or a 24-character hex string")
+
+    @staticmethod
+    def _load(model: Type[ModelT], row: sqlite3.Row | tuple, id_field: str = "_id") -> ModelT:
+        document = orjson.loads(row[1])
+        document[id_field] = row[0]
+        return construct_trusted(model, document)
+
+    async def _insert(self, collection: str, document: dict, _id: str | None = None) -> str:
+        _id = str(ObjectId()) if _id is None else _id
+        try:
+            await self._write(f'INSERT INTO "{collection}" (id, doc) VALUES (?, json(?))',
+                              (_id, orjson.dumps(document).decode()))
+        except sqlite3.IntegrityError:
+            raise DuplicateKey(f"{collection} duplicate key")
+        return _id
+
+    async def _get_by_id(self, collection: str, _id: str) -> sqlite3.Row | None:
+        connection = await self._get_connection()
+        async with connection.execute(f'SELECT id, doc FROM "{collection}" WHERE id = ?', (_id,)) as cursor:
+            return await cursor.fetchone()
+
+    def _select(self, collection: str, condition: dict, limit: int | None = None, after: str | None = None,
+                order_by: str = "_id") -> tuple[str, list]:
+        where = Where(collection, condition)
+        if after is not None:
+            where.parts.append("id > ?")
+            where.params.append(after if collection == "user" else self.check_id(after))
+        sql = f'SELECT id, doc FROM "{collection}" WHERE {where.sql()} ORDER BY "{column_name(order_by)}"'
+        if limit is not None:
+            sql += " LIMIT ?"
+            where.params.append(limit)
+        return sql, where.params
+
+    async def _find(self, collection: str, condition: dict, limit: int | None = None,
+                    after: str | None = None) -> list[sqlite3.Row]:
+        connection = await self._get_connection()
+        return list(await connection.execute_fetchall(*self._select(collection, condition, limit, after)))
+
+    async def _find_ids(self, collection: str, condition: dict, limit: int | None = None) -> list[str]:
+        """Only id is selected, so query on indexed column is covered by index"""
+        where = Where(collection, condition)
+        sql = f'SELECT id FROM "{collection}" WHERE {where.sql()}'
+        if limit is not None:
+            sql += " LIMIT ?"
+            where.params.append(limit)
+        connection = await self._get_connection()
+        return [row[0] for row in await connection.execute_fetchall(sql, where.params)]
+
+    async def _iter(self, collection: str, condition: dict, after: str | None = None) -> AsyncIterator[sqlite3.Row]:
+        connection = await self._get_connection()
+        async with connection.execute(*self._select(collection, condition, after=after)) as cursor:
+            async for row in cursor:
+                yield row
+
+    async def _update(self, collection: str, condition: dict, new_data: dict) -> int:
+        """Apply "$set" data, count only actually changed documents like Mongo modified_count"""
+        if not new_data:
+            return 0
+        new_doc = f"json_set(doc{', ?, json(?)' * len(new_data)})"
+        params = [param for path, value in new_data.items() for param in (f"$.{path}", orjson.dumps(value).decode())]
+        where = Where(collection, condition)
+        return await self._write(
+            f'UPDATE "{collection}" SET doc = {new_doc} WHERE {where.sql()} AND doc != {new_doc}',
+            (*params, *where.params, *params)
+        )
+
+    async def _delete(self, collection: str, condition: dict) -> int:
+        where = Where(collection, condition)
+        return await self._write(f'DELETE FROM "{collection}" WHERE {where.sql()}', where.params)
+
+    # --- Users --- #
+    async def write_new_user(self, user: UserModel) -> str:
+        user_dict = user.dict()
+        telegram_id = user_dict.pop("telegram_id")
+        try:
+            return await self._insert("user", user_dict, telegram_id)
+        except DuplicateKey:
+            logger.info(f"User duplicat with id {telegram_id}")
+            raise DuplicateKey("User duplicat key")
+
+    async def get_user_by_id(self, user_id: str) -> UserModel:
+        user = await self._get_by_id("user", user_id)
+        if user is None:
+            logger.info(f"User with id {user_id} not found")
+            raise DBNotFound("User not found")
+        return self._load(UserModel, user, "telegram_id")
+
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[UserModel]:
+        users = await self._find("user", {"_id": {"$in": list(user_ids)}})
+        return [self._load(UserModel, user, "telegram_id") for user in users]
+
+    async def get_linked_user_ids(self, after: str | None, limit: int) -> list[str]:
+        """Distinct values are read from "links_user_id" indexes"""
+        connection = await self._get_connection()
+        rows = await connection.execute_fetchall(
+            'SELECT "links_user_id" FROM "themes" WHERE "links_user_id" > ? '
+            'UNION SELECT "links_user_id" FROM "notes" WHERE "links_user_id" > ? '
+            'UNION SELECT "links_user_id" FROM "alarms" WHERE "links_user_id" > ? '
+            'ORDER BY 1 LIMIT ?',
+            (*[after if after is not None else ""] * 3, limit)
+        )
+        return [row[0] for row in rows]
+
+    async def delete_user_by_id(self, user_id: str) -> int:
+        deleted_count = await self._delete("user", {"_id": user_id})
+        if deleted_count == 0:
+            logger.info(f"User with id {user_id} not found")
+            raise DBNotFound("User not found")
+        return deleted_count
+
+    async def update_username(self, user_id: str, new_username: str) -> int:
+        modified_count = await self._update("user", {"_id": user_id}, {"user_name": new_username})
+        if modified_count == 0:
+            raise DBNotFound("User not found")
+        return modified_count
+
+    # --- Alarms --- #
+    async def write_new_alarm(self, alarm: AlarmModelWrite) -> str:
+        return await self._insert("alarms", alarm.dict())
+
+    async def write_new_alarms(self, alarms: list[AlarmModelWrite]) -> list[str | None]:
+        """Inserts are queued together, so writer commits them in a few transactions"""
+        results = await asyncio.gather(*(self._insert("alarms", alarm.dict()) for alarm in alarms),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, DuplicateKey):
+                raise result
+        return [None if isinstance(result, DuplicateKey) else result for result in results]
+
+    async def get_alarm_by_id(self, alarm_id: str) -> AlarmModel:
+        alarm = await self._get_by_id("alarms", self.check_id(alarm_id))
+        if alarm is None:
+            logger.info(f"Alarm with id {alarm_id} not found")
+            raise DBNotFound("Alarm not found")
+        return self._load(AlarmModel, alarm)
+
+    async def get_alarms_by_ids(self, alarm_ids: list[str]) -> list[AlarmModel]:
+        alarms = await self._find("alarms", {"_id": {"$in": [self.check_id(_id) for _id in alarm_ids]}})
+        return [self._load(AlarmModel, alarm) for alarm in alarms]
+
+    async def get_all_alarms_by_condition(self, condition: dict, limit: int | None = None,
+                                          after: str | None = None) -> list[AlarmModel]:
+        alarms = await self._find("alarms", condition, limit, after)
+        if not alarms:
+            raise DBNotFound("Alarms match condition not found")
+        return [self._load(AlarmModel, alarm) for alarm in alarms]
+
+    async def iter_alarms_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[AlarmModel]:
+        is_found = False
+        async for alarm in self._iter("alarms", condition, after):
+            is_found = True
+            yield self._load(AlarmModel, alarm)
+        if not is_found:
+            raise DBNotFound("Alarms match condition not found")
+
+    async def get_due_alarms(self, due_before: datetime, partitions: list[int] | None = None) -> list[AlarmModel]:
+        """Served by "status_due_at_utc" or "status_partition_due_at_utc" index"""
+        condition = {"status": AlarmStatuses.QUEUE.value, "times.due_at_utc": {"$lte": due_before}}
+        if partitions is not None:
+            condition["partition"] = {"$in": partitions}
+        sql, params = self._select("alarms", condition, order_by="times.due_at_utc")
+        connection = await self._get_connection()
+        return [self._load(AlarmModel, alarm) for alarm in await connection.execute_fetchall(sql, params)]
+
+    async def update_alarm(self, alarm_id: str, new_data: dict) -> int:
+        modified_count = await self._update("alarms", {"_id": self.check_id(alarm_id)}, new_data)
+        if modified_count == 0:
+            raise DBNotFound("Alarm not found")
+        return modified_count
+
+    async def update_alarms_status(self, alarm_ids: list[str], current_status: AlarmStatuses,
+                                   new_status: AlarmStatuses) -> int:
+        """One statement for all alarms, ids are bound as one json array"""
+        if not alarm_ids:
+            return 0
+        where = Where("alarms", {"_id": {"$in": [self.check_id(alarm_id) for alarm_id in alarm_ids]},
+                                 "status": current_status.value})
+        return await self._write(
+            f"UPDATE \"alarms\" SET doc = json_set(doc, '$.status', ?) WHERE {where.sql()}",
+            (new_status.value, *where.params)
+        )
+
+    async def postpone_alarm(self, alarm_id: str, now: datetime) -> AlarmModel | None:
+        """
+        Local file has no network round trip to save, so times are computed in Python and written
+        only if stored times are still the read ones, on concurrent change it is read again
+        """
+        alarm_id = self.check_id(alarm_id)
+        while True:
+            row = await self._get_by_id("alarms", alarm_id)
+            if row is None:
+                return None
+            alarm = self._load(AlarmModel, row)
+            if not alarm.is_repeatable or alarm.times.repeat_interval is None:
+                return None
+            times = alarm.times.postponed(now)
+            new_data = {"status": AlarmStatuses.QUEUE.value, "lease": None,
+                        "times.next_notion_time": times.next_notion_time, "times.due_at_utc": times.due_at_utc}
+            guard = {"_id": alarm_id, "times.next_notion_time": alarm.times.next_notion_time,
+                     "times.repeat_interval": alarm.times.repeat_interval, "is_repeatable": True}
+            if await self._update("alarms", guard, new_data) or await self._is_postponed(alarm_id, times):
+                return alarm.copy(update={"status": AlarmStatuses.QUEUE, "lease": None, "times": times})
+
+    async def _is_postponed(self, alarm_id: str, times: AlarmTimesModel) -> bool:
+        """Update counts only changed documents, so postpone to the same times is not counted"""
+        row = await self._get_by_id("alarms", alarm_id)
+        return row is not None and self._load(AlarmModel, row).times == times
+
+    async def bulk_update_alarms(self, new_data_by_id: dict[str, dict],
+                                 conditions_by_id: dict[str, dict] | None = None) -> int:
+        """Updates are queued together, so writer commits them in a few transactions"""
+        conditions_by_id = conditions_by_id or dict()
+        modified_counts = await asyncio.gather(*(
+            self._update("alarms", {"_id": self.check_id(alarm_id), **conditions_by_id.get(alarm_id, {})}, new_data)
+            for alarm_id, new_data in new_data_by_id.items()
+        ))
+        return sum(modified_counts)
+
+    async def update_alarms_by_ids(self, alarm_ids: list[str], condition: dict, new_data: dict) -> int:
+        if not alarm_ids:
+            return 0
+        return await self._update(
+            "alarms", {"_id": {"$in": [self.check_id(alarm_id) for alarm_id in alarm_ids]}, **condition}, new_data
+        )
+
+    async def delete_alarm_by_id(self, alarm_id: str) -> int:
+        deleted_count = await self._delete("alarms", {"_id": self.check_id(alarm_id)})
+        if deleted_count == 0:
+            raise DBNotFound(f"Alarm with id {alarm_id} not found")
+        return deleted_count
+
+    async def delete_all_alarms_by_condition(self, condition: dict) -> int:
+        deleted_count = await self._delete("alarms", condition)
+        if deleted_count == 0:
+            raise DBNotFound("Alarms not found")
+        return deleted_count
+
+    async def get_alarms_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        return await self._find_ids("alarms", condition, limit)
+
+    async def delete_alarms_by_ids(self, alarm_ids: list[str]) -> int:
+        return await self._delete("alarms", {"_id": {"$in": [self.check_id(_id) for _id in alarm_ids]}})
+
+    # --- Themes --- #
+    async def write_new_theme(self, theme: ThemeModelWrite) -> str:
+        return await self._insert("themes", theme.dict())
+
+    async def get_theme_by_id(self, theme_id: str) -> ThemeModel:
+        theme = await self._get_by_id("themes", self.check_id(theme_id))
+        if theme is None:
+            logger.info(f"Theme with id {theme_id} not found")
+            raise DBNotFound("Theme not found")
+        return self._load(ThemeModel, theme)
+
+    async def get_all_themes_by_condition(self, condition: dict, limit: int | None = None,
+                                          after: str | None = None) -> list[ThemeModel]:
+        themes = await self._find("themes", condition, limit, after)
+        if not themes:
+            raise DBNotFound("Themes not found")
+        return [self._load(ThemeModel, theme) for theme in themes]
+
+    async def iter_themes_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[ThemeModel]:
+        is_found = False
+        async for theme in self._iter("themes", condition, after):
+            is_found = True
+            yield self._load(ThemeModel, theme)
+        if not is_found:
+            raise DBNotFound("Themes not found")
+
+    async def update_theme(self, theme_id: str, new_data: dict) -> int:
+        modified_count = await self._update("themes", {"_id": self.check_id(theme_id)}, new_data)
+        if modified_count == 0:
+            raise DBNotFound("Theme not found")
+        return modified_count
+
+    async def delete_theme_by_id(self, theme_id: str) -> int:
+        deleted_count = await self._delete("themes", {"_id": self.check_id(theme_id)})
+        if deleted_count == 0:
+            raise DBNotFound("Theme not found")
+        return deleted_count
+
+    async def delete_all_themes_by_condition(self, condition: dict) -> int:
+        deleted_count = await self._delete("themes", condition)
+        if deleted_count == 0:
+            raise DBNotFound("Themes not found")
+        return deleted_count
+
+    async def get_themes_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        return await self._find_ids("themes", condition, limit)
+
+    async def delete_themes_by_ids(self, theme_ids: list[str]) -> int:
+        return await self._delete("themes", {"_id": {"$in": [self.check_id(_id) for _id in theme_ids]}})
+
+    # --- Notes --- #
+    async def write_new_note(self, note: NoteModelWrite) -> str:
+        return await self._insert("notes", note.dict())
+
+    async def get_note_by_id(self, note_id: str) -> NoteModel:
+        note = await self._get_by_id("notes", self.check_id(note_id))
+        if note is None:
+            logger.info(f"Note with id {note_id} not found")
+            raise DBNotFound("Note not found")
+        return self._load(NoteModel, note)
+
+    async def get_all_notes_by_condition(self, condition: dict, limit: int | None = None,
+                                         after: str | None = None) -> list[NoteModel]:
+        notes = await self._find("notes", condition, limit, after)
+        if not notes:
+            raise DBNotFound("Notes not found")
+        return [self._load(NoteModel, note) for note in notes]
+
+    async def iter_notes_by_condition(self, condition: dict, after: str | None = None) -> AsyncIterator[NoteModel]:
+        is_found = False
+        async for note in self._iter("notes", condition, after):
+            is_found = True
+            yield self._load(NoteModel, note)
+        if not is_found:
+            raise DBNotFound("Notes not found")
+
+    async def update_note(self, note_id: str, new_data: dict) -> int:
+        modified_count = await self._update("notes", {"_id": self.check_id(note_id)}, new_data)
+        if modified_count == 0:
+            raise DBNotFound("Note not found")
+        return modified_count
+
+    async def delete_note_by_id(self, note_id: str) -> int:
+        deleted_count = await self._delete("notes", {"_id": self.check_id(note_id)})
+        if deleted_count == 0:
+            raise DBNotFound("Note not found")
+        return deleted_count
+
+    async def delete_all_notes_by_condition(self, condition: dict) -> int:
+        deleted_count = await self._delete("notes", condition)
+        if deleted_count == 0:
+            raise DBNotFound("Notes not found")
+        return deleted_count
+
+    async def get_notes_ids_by_condition(self, condition: dict, limit: int | None = None) -> list[str]:
+        return await self._find_ids("notes", condition, limit)
+
+    async def delete_notes_by_ids(self, note_ids: list[str]) -> int:
+        return await self._delete("notes", {"_id": {"$in": [self.check_id(_id) for _id in note_ids]}})
+
+    # --- Locks --- #
+    async def acquire_lock(self, name: str, owner: str, lease_seconds: float) -> bool:
+        """One upsert, so workers of several processes sharing db file race safely"""
+        now = datetime.utcnow()
+        lock = {"owner": owner, "expires_at": now + timedelta(seconds=lease_seconds)}
+        return await self._write(
+            'INSERT INTO "locks" (id, doc) VALUES (?, json(?)) ON CONFLICT(id) DO UPDATE SET doc = excluded.doc '
+            "WHERE json_extract(doc, '$.owner') = ? OR json_extract(doc, '$.expires_at') < ?",
+            (name, orjson.dumps(lock).decode(), owner, _param(now))
+        ) > 0
+
+    async def get_locks_owners(self, prefix: str) -> dict[str, str]:
+        connection = await self._get_connection()
+        rows = await connection.execute_fetchall(
+            "SELECT id, json_extract(doc, '$.owner') FROM \"locks\" "
+            "WHERE substr(id, 1, ?) = ? AND json_extract(doc, '$.expires_at') >= ?",
+            (len(prefix), prefix, _param(datetime.utcnow()))
+        )
+        return {row[0]: row[1] for row in rows}
+
+    async def release_lock(self, name: str, owner: str) -> None:
+        await self._delete("locks", {"_id": name, "owner": owner})
@@ -1,34 +1,27 @@
-import datetime
-from datetime import datetime as dt
 from logging import getLogger
 
-from src.core.models.AlarmModel import AlarmStatuses
-from src.infrastructure.alarms.db_interaction import get_all_queued_alarms, update_alarm
-from src.services.database.database_exceptions import DBNotFound
+from src.infrastructure.alarms.db_interaction import (get_all_due_alarms, promote_queued_alarms_to_ready,
+                                                      release_expired_leases)
 from src.services.database.interface import IDataBase
 from src.utils.depends import get_db
 
 logger = getLogger(__name__)
 
 
-async def check_queue_status() -> None:
+async def check_queue_status(partitions: list[int] | None = None) -> None:
+    """Promote due alarms of given partitions, of all partitions if they are not set"""
     logger.info("Start job 'check_queue_status'")
     db: IDataBase = get_db()
     try:
-        alarms = await get_all_queued_alarms(db)
-    except DBNotFound:
-        return
-    else:
-        for alarm in alarms:
-            user = await db.get_user_by_id(alarm.links.user_id)
-            user_tz = user.timezone
-            due_time = dt.now() + datetime.timedelta(hours=user_tz)
-            next_notion_time = alarm.times.next_notion_time
-            if (next_notion_time is not None) and (next_notion_time < due_time):
-                await update_alarm(
-                    alarm_id=alarm.id,
-                    new_data={"status": AlarmStatuses.READY.value},
-                    db=db
-                )
+        alarms = await get_all_due_alarms(db, partitions)
+        promoted_count = await promote_queued_alarms_to_ready([alarm.id for alarm in alarms], db)
+        logger.info(f"check_queue_status promoted {promoted_count} alarms to READY")
     finally:
         logger.info("check_queue_status job done")
+
+
+async def check_expired_leases() -> None:
+    """Claimed alarms, that consumer did not ack or nack in time, are returned to READY"""
+    released_count = await release_expired_leases(get_db())
+    if released_count:
+        logger.info(f"check_expired_leases returned {released_count} alarms to READY")
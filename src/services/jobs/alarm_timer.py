@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+from datetime import datetime as dt, timedelta
+from logging import getLogger
+
+from src.core.models.AlarmModel import AlarmStatuses
+from src.services.database.interface import IDataBase
+from src.services.jobs.ready_alarms_broker import ready_alarms_broker
+from src.utils import config
+from src.utils.depends import get_db
+
+logger = getLogger(__name__)
+
+
+class AlarmTimer:
+    """
+    In-process min-heap of alarm due times, that promotes alarm to READY exactly when it is due.
+    Holds only alarms of partitions owned by worker due within horizon, farther alarms are loaded by periodic reload.
+    Heap entries are removed lazily: entry is valid only while it matches self._due_times
+    """
+
+    def __init__(self, horizon: timedelta) -> None:
+        self.horizon = horizon
+        self._heap: list[tuple[dt, str]] = []
+        self._due_times: dict[str, dt] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._is_standby = False
+        self._partitions: set[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._due_times)
+
+    def owns(self, partition: int | None) -> bool:
+        """Alarm written before partition existed is owned by every worker"""
+        return self._partitions is None or partition is None or partition in self._partitions
+
+    def schedule(self, alarm_id: str, due_at_utc: dt | None, partition: int | None = None) -> None:
+        """Add or move alarm in heap. Alarm without due time, beyond horizon or of other worker partition is dropped"""
+        if self._is_standby:
+            return
+        if due_at_utc is None or due_at_utc > dt.utcnow() + self.horizon or not self.owns(partition):
+            self.cancel(alarm_id)
+            return
+        self._due_times[alarm_id] = due_at_utc
+        heapq.heappush(self._heap, (due_at_utc, alarm_id))
+        if len(self._heap) > 2 * len(self._due_times) + 64:
+            self._compact()
+        self._wakeup.set()
+
+    def cancel(self, alarm_id: str) -> None:
+        self._due_times.pop(alarm_id, None)
+
+    async def reload(self, db: IDataBase, partitions: list[int] | None = None) -> None:
+        """Replace heap content with queued alarms of partitions due within horizon"""
+        alarms = await db.get_due_alarms(dt.utcnow() + self.horizon, partitions)
+        self._due_times = {alarm.id: alarm.times.due_at_utc for alarm in alarms}
+        self._compact()
+        self._wakeup.set()
+        logger.info(f"Alarm timer reloaded with {len(self._due_times)} alarms")
+
+    def start(self, partitions: list[int] | None = None) -> None:
+        """Collect alarms of partitions, of all partitions if they are not set"""
+        self._is_standby = False
+        self._partitions = None if partitions is None else set(partitions)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                ...
+            self._task = None
+
+    async def standby(self) -> None:
+        """Stop and forget alarms till start, worker that does not run jobs must not collect alarms"""
+        await self.stop()
+        self._is_standby = True
+        self._due_times.clear()
+        self._heap.clear()
+
+    def _compact(self) -> None:
+        """Drop stale entries left by cancel and reschedule"""
+        self._heap = [(due_at_utc, alarm_id) for alarm_id, due_at_utc in self._due_times.items()]
+        heapq.heapify(self._heap)
+
+    def _is_actual(self, entry: tuple[dt, str]) -> bool:
+        due_at_utc, alarm_id = entry
+        return self._due_times.get(alarm_id) == due_at_utc
+
+    def _seconds_to_next(self) -> float | None:
+        while self._heap and not self._is_actual(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max((self._heap[0][0] - dt.utcnow()).total_seconds(), 0)
+
+    def _pop_due(self) -> list[str]:
+        now = dt.utcnow()
+        due_ids = list()
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_actual(entry):
+                self._due_times.pop(entry[1])
+                due_ids.append(entry[1])
+        return due_ids
+
+    async def _fire(self, alarm_ids: list[str]) -> None:
+        db: IDataBase = get_db()
+        try:
+            promoted_count = await db.update_alarms_status(alarm_ids, AlarmStatuses.QUEUE, AlarmStatuses.READY)
+            logger.info(f"Alarm timer promoted {promoted_count} alarms to READY")
+            if promoted_count:
+                await ready_alarms_broker.publish(alarm_ids, db)
+        except Exception as err:
+            # Reload will pick alarms up again, timer loop must not die
+            logger.error(f"Alarm timer failed to promote alarms {alarm_ids}: {str(err)}")
+
+    async def _run(self) -> None:
+        while True:
+            timeout = self._seconds_to_next()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                ...
+            due_ids = self._pop_due()
+            if due_ids:
+                await self._fire(due_ids)
+
+
+alarm_timer = AlarmTimer(horizon=timedelta(seconds=2 * config.ALARM_SWEEP_INTERVAL_SECONDS))
@@ -0,0 +1,63 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime as dt
+from logging import getLogger
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from src.core.models.TaskModel import TaskModel, TaskStatuses
+
+logger = getLogger(__name__)
+
+# Coroutine function of task, it gets progress dict to update while it runs
+TaskFunction = Callable[[dict[str, int]], Awaitable[None]]
+
+
+class BackgroundTasks:
+    """
+    Registry of long operations started by routers, so request returns at once and client polls progress.
+    Tasks live in worker process that started them, finished tasks are kept until max_finished is exceeded
+    """
+
+    def __init__(self, max_finished: int) -> None:
+        self.max_finished = max_finished
+        self._tasks: OrderedDict[str, TaskModel] = OrderedDict()
+        self._running: dict[str, asyncio.Task] = {}
+
+    def start(self, name: str, function: TaskFunction) -> TaskModel:
+        task = TaskModel(task_id=uuid4().hex, name=name, status=TaskStatuses.RUNNING, progress={},
+                         started_at=dt.utcnow())
+        self._tasks[task.task_id] = task
+        self._running[task.task_id] = asyncio.get_running_loop().create_task(self._run(task, function))
+        return task
+
+    def get(self, task_id: str) -> TaskModel | None:
+        return self._tasks.get(task_id)
+
+    async def wait(self, task_id: str) -> TaskModel | None:
+        """Wait until task is finished"""
+        running = self._running.get(task_id)
+        if running is not None:
+            await asyncio.shield(running)
+        return self.get(task_id)
+
+    async def _run(self, task: TaskModel, function: TaskFunction) -> None:
+        try:
+            await function(task.progress)
+            task.status = TaskStatuses.DONE
+        except Exception as err:
+            logger.error(f"Background task {task.name} {task.task_id} failed: {str(err)}")
+            task.status = TaskStatuses.FAILED
+            task.error = str(err)
+        finally:
+            task.finished_at = dt.utcnow()
+            self._running.pop(task.task_id, None)
+            self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        finished_ids = [task_id for task_id, task in self._tasks.items() if task.status != TaskStatuses.RUNNING]
+        for task_id in finished_ids[:max(len(finished_ids) - self.max_finished, 0)]:
+            del self._tasks[task_id]
+
+
+background_tasks = BackgroundTasks(max_finished=1000)
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import socket
+import time
+from logging import getLogger
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from src.services.database.interface import IDataBase
+from src.utils import config
+from src.utils.depends import get_db
+
+logger = getLogger(__name__)
+
+
+def worker_id() -> str:
+    """Unique across hosts, processes and restarts"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+
+
+class LeaderElection:
+    """
+    Lease on lock document in db. Every worker tries to take or renew lease each renew_seconds,
+    holder of lease is leader and runs on_elected. Leader, that could not renew lease in time by its own
+    clock, runs on_demoted before lease can be taken by other worker
+    """
+
+    def __init__(self, name: str, lease_seconds: float, renew_seconds: float,
+                 on_elected: Callable[[], Awaitable[None]], on_demoted: Callable[[], Awaitable[None]]) -> None:
+        if renew_seconds * 2 > lease_seconds:
+            raise ValueError("Lease must last at least two renew intervals")
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = renew_seconds
+        self.owner = worker_id()
+        self.is_leader = False
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._lease_until = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def step(self, db: IDataBase) -> None:
+        """One attempt to take or renew lease"""
+        started_at = time.monotonic()
+        try:
+            acquired = await db.acquire_lock(self.name, self.owner, self.lease_seconds)
+        except Exception as err:
+            logger.error(f"Leader lock {self.name} is not renewed: {str(err)}")
+            acquired = None
+        if acquired:
+            self._lease_until = started_at + self.lease_seconds
+            if not self.is_leader:
+                logger.info(f"{self.owner} is elected as leader of {self.name}")
+                await self._on_elected()
+                self.is_leader = True
+        # Lease is given up one renew interval early, so it ends before other worker can take it
+        elif self.is_leader and (acquired is False or time.monotonic() >= self._lease_until - self.renew_seconds):
+            await self._demote()
+
+    async def _demote(self) -> None:
+        self.is_leader = False
+        logger.info(f"{self.owner} is not leader of {self.name} anymore")
+        await self._on_demoted()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.step(get_db())
+            except Exception as err:
+                # Elections must go on, failed step is repeated after renew interval
+                logger.error(f"Leader election {self.name} step failed: {str(err)}")
+            await asyncio.sleep(self.renew_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop elections and free lock, so other worker takes over without waiting for lease expiry"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                ...
+            self._task = None
+        if self.is_leader:
+            await self._demote()
+            await get_db().release_lock(self.name, self.owner)
+
+
+def create_jobs_leader_election(on_elected: Callable[[], Awaitable[None]],
+                                on_demoted: Callable[[], Awaitable[None]]) -> LeaderElection:
+    return LeaderElection("scheduled_jobs", lease_seconds=config.LEADER_LEASE_SECONDS,
+                          renew_seconds=config.LEADER_RENEW_SECONDS, on_elected=on_elected, on_demoted=on_demoted)
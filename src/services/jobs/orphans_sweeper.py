@@ -0,0 +1,25 @@
+"""
+One-off removal of alarms, notes and themes left by users deleted before purge existed.
+Run from repo root with the same environment as the app:
+    python -m src.services.jobs.orphans_sweeper
+"""
+import asyncio
+from logging import INFO, basicConfig, getLogger
+
+from src.infrastructure.users.db_interaction import purge_orphans_from_db
+from src.services.database.controller import connect_to_db
+
+logger = getLogger(__name__)
+
+
+async def sweep_orphans() -> dict[str, int]:
+    db = connect_to_db()
+    try:
+        return await purge_orphans_from_db(db)
+    finally:
+        await db.close()
+
+
+if __name__ == '__main__':
+    basicConfig(level=INFO)
+    logger.info(f"Orphans removed: {asyncio.run(sweep_orphans())}")
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from logging import getLogger
+from typing import Awaitable, Callable
+
+from src.infrastructure.alarms.db_interaction import ALARM_PARTITIONS
+from src.services.database.interface import IDataBase
+from src.services.jobs.leader_election import worker_id
+from src.utils import config
+from src.utils.depends import get_db
+
+logger = getLogger(__name__)
+
+
+class PartitionsAssignment:
+    """
+    Partitions spread over live workers by lock leases in db. Worker keeps membership lease
+    "<name>.members.<owner>" and lease "<name>.partitions.<number>" of every partition it owns.
+    Partition goes to member at number % members count in members sorted by owner, so all workers
+    agree on target without coordination. Partition of other member is given up on next step
+    and taken by new owner as soon as it is free, so worker joining or leaving rebalances partitions
+    in about one renew interval, or in lease time if worker died
+    """
+
+    def __init__(self, name: str, partitions_count: int, lease_seconds: float, renew_seconds: float,
+                 on_change: Callable[[list[int]], Awaitable[None]]) -> None:
+        if renew_seconds * 2 > lease_seconds:
+            raise ValueError("Lease must last at least two renew intervals")
+        self.name = name
+        self.partitions_count = partitions_count
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = renew_seconds
+        self.owner = worker_id()
+        self.partitions: list[int] = []
+        self._on_change = on_change
+        self._lease_until = 0.0
+        self._task: asyncio.Task | None = None
+
+    def _partition_lock(self, partition: int) -> str:
+        return f"{self.name}.partitions.{partition}"
+
+    def target_partitions(self, members: list[str]) -> list[int]:
+        members = sorted(set(members) | {self.owner})
+        return [partition for partition in range(self.partitions_count)
+                if members[partition % len(members)] == self.owner]
+
+    async def _rebalance(self, db: IDataBase) -> list[int]:
+        """Renew membership, give up partitions of other members and take or renew own ones"""
+        await db.acquire_lock(f"{self.name}.members.{self.owner}", self.owner, self.lease_seconds)
+        members = await db.get_locks_owners(f"{self.name}.members.")
+        target = self.target_partitions(list(members.values()))
+        for partition in set(self.partitions) - set(target):
+            await db.release_lock(self._partition_lock(partition), self.owner)
+        return [partition for partition in target
+                if await db.acquire_lock(self._partition_lock(partition), self.owner, self.lease_seconds)]
+
+    async def step(self, db: IDataBase) -> None:
+        started_at = time.monotonic()
+        try:
+            partitions = await self._rebalance(db)
+            self._lease_until = started_at + self.lease_seconds
+        except Exception as err:
+            logger.error(f"Partitions of {self.name} are not renewed: {str(err)}")
+            # Leases are given up one renew interval early, so they end before other worker can take them
+            if time.monotonic() < self._lease_until - self.renew_seconds:
+                return
+            partitions = []
+        if partitions != self.partitions:
+            logger.info(f"{self.owner} owns partitions {partitions} of {self.name}")
+            await self._on_change(partitions)
+            self.partitions = partitions
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.step(get_db())
+            except Exception as err:
+                logger.error(f"Partitions assignment {self.name} step failed: {str(err)}")
+            await asyncio.sleep(self.renew_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Leave members and free partitions, so other workers take them without waiting for lease expiry"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                ...
+            self._task = None
+        partitions, self.partitions = self.partitions, []
+        if partitions:
+            await self._on_change([])
+        db = get_db()
+        await db.release_lock(f"{self.name}.members.{self.owner}", self.owner)
+        for partition in partitions:
+            await db.release_lock(self._partition_lock(partition), self.owner)
+
+
+def create_alarm_partitions_assignment(on_change: Callable[[list[int]], Awaitable[None]]) -> PartitionsAssignment:
+    return PartitionsAssignment("alarm_jobs", partitions_count=ALARM_PARTITIONS,
+                                lease_seconds=config.LEADER_LEASE_SECONDS,
+                                renew_seconds=config.LEADER_RENEW_SECONDS, on_change=on_change)
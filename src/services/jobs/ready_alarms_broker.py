@@ -0,0 +1,122 @@
+import asyncio
+from collections import deque
+from logging import getLogger
+from typing import AsyncIterator
+from uuid import uuid4
+
+from src.core.models.AlarmModel import AlarmModel, AlarmStatuses
+from src.services.database.database_exceptions import DBNotFound
+from src.services.database.interface import IDataBase
+from src.services.jobs.ready_alarms_notifier import ready_alarms_notifier
+from src.utils import config
+from src.utils.streaming import sse_event, SSE_HEARTBEAT
+
+logger = getLogger(__name__)
+
+
+class Subscription:
+    """
+    Events of one push connection. Queue is bounded: connection that does not keep up is closed,
+    client reconnects with Last-Event-ID and gets missed events from broker history
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue[tuple[int, AlarmModel]] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, seq: int, alarm: AlarmModel) -> None:
+        try:
+            self.queue.put_nowait((seq, alarm))
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ReadyAlarmsBroker:
+    """
+    In-process fan-out of alarms becoming READY to push connections and long-poll waiters.
+    Event id is "<epoch>-<seq>", epoch changes on restart, so stale Last-Event-ID is detected.
+    Last history_size events are kept for resume
+    """
+
+    def __init__(self, history_size: int, queue_size: int, heartbeat_seconds: float) -> None:
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._epoch = uuid4().hex[:8]
+        self._seq = 0
+        self._history: deque[tuple[int, AlarmModel]] = deque(maxlen=history_size)
+        self._subscriptions: set[Subscription] = set()
+
+    def event_id(self, seq: int) -> str:
+        return f"{self._epoch}-{seq}"
+
+    async def publish(self, alarm_ids: list[str], db: IDataBase) -> None:
+        """Announce alarms moved to READY, alarms already moved further by concurrent request are skipped"""
+        ready_alarms_notifier.notify()
+        if not alarm_ids:
+            return
+        for alarm in await db.get_alarms_by_ids(alarm_ids):
+            if alarm.status != AlarmStatuses.READY:
+                continue
+            self._seq += 1
+            self._history.append((self._seq, alarm))
+            for subscription in self._subscriptions:
+                subscription.put(self._seq, alarm)
+
+    def subscribe(self, last_event_id: str | None) -> tuple[Subscription, bool]:
+        """
+        Register new connection, events after last_event_id are queued at once.
+        :return subscription and False if missed events are not in history anymore
+        """
+        subscription = Subscription(self.queue_size)
+        missed = self._missed_events(last_event_id)
+        if missed is not None and len(missed) < self.queue_size:
+            for seq, alarm in missed:
+                subscription.put(seq, alarm)
+        else:
+            missed = None
+        self._subscriptions.add(subscription)
+        return subscription, missed is not None
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def _missed_events(self, last_event_id: str | None) -> list[tuple[int, AlarmModel]] | None:
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq < self._seq and (not self._history or self._history[0][0] > seq + 1):
+            return None
+        return [(event_seq, alarm) for event_seq, alarm in self._history if event_seq > seq]
+
+    async def stream(self, last_event_id: str | None, db: IDataBase) -> AsyncIterator[str]:
+        """
+        Server-sent events of ready alarms. Without resumable last_event_id stream starts
+        with all alarms READY now, so client does not need to poll for them
+        """
+        subscription, resumed = self.subscribe(last_event_id)
+        try:
+            if not resumed:
+                snapshot_id = self.event_id(self._seq)
+                try:
+                    async for alarm in db.iter_alarms_by_condition({"status": AlarmStatuses.READY.value}):
+                        yield sse_event(snapshot_id, "alarm", alarm.json(by_alias=True))
+                except DBNotFound:
+                    ...
+            while not subscription.overflowed:
+                try:
+                    seq, alarm = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield SSE_HEARTBEAT
+                    continue
+                yield sse_event(self.event_id(seq), "alarm", alarm.json(by_alias=True))
+            logger.info("Ready alarms stream is closed, client does not keep up")
+        finally:
+            self.unsubscribe(subscription)
+
+
+ready_alarms_broker = ReadyAlarmsBroker(
+    history_size=config.SSE_HISTORY_SIZE,
+    queue_size=config.SSE_QUEUE_SIZE,
+    heartbeat_seconds=config.SSE_HEARTBEAT_SECONDS
+)
@@ -0,0 +1,22 @@
+import asyncio
+
+
+class ReadyAlarmsNotifier:
+    """
+    In-process signal that some alarms became READY, wakes all long-poll requests waiting for ready alarms.
+    Waiter takes event before reading db, so notification sent between read and wait is not lost
+    """
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+
+    def waiter(self) -> asyncio.Event:
+        """Event set by the next notify"""
+        return self._event
+
+    def notify(self) -> None:
+        self._event.set()
+        self._event = asyncio.Event()
+
+
+ready_alarms_notifier = ReadyAlarmsNotifier()
@@ -1,10 +1,60 @@
+from datetime import datetime
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from src.services.jobs.alarm_status_check_job import check_queue_status
+from src.services.jobs.alarm_status_check_job import check_queue_status, check_expired_leases
+from src.services.jobs.alarm_timer import alarm_timer
+from src.utils import config
+from src.utils.depends import get_db
+
+
+async def reconcile_alarm_timer(partitions: list[int] | None = None) -> None:
+    """Safety net for alarm timer: promote everything already due and reload upcoming alarms of partitions"""
+    await check_queue_status(partitions)
+    await alarm_timer.reload(get_db(), partitions)
+
+
+class JobsRunner:
+    """
+    Scheduled jobs of worker: alarm timer and its reconcile for alarm partitions owned by worker,
+    jobs over all alarms while worker is leader. Not partitioned leader runs alarm timer of all alarms
+    """
+
+    def __init__(self, partitioned: bool) -> None:
+        self.scheduler = AsyncIOScheduler()
+        self.partitioned = partitioned
+
+    def start(self) -> None:
+        self.scheduler.start()
+
+    def shutdown(self) -> None:
+        self.scheduler.shutdown(wait=False)
+
+    def _remove_job(self, job_id: str) -> None:
+        if self.scheduler.get_job(job_id) is not None:
+            self.scheduler.remove_job(job_id)
+
+    async def set_partitions(self, partitions: list[int] | None) -> None:
+        """
+        Alarms of new partitions are taken at once, so they are not late till next reconcile.
+        None is all alarms
+        """
+        if partitions == []:
+            self._remove_job("reconcile_alarm_timer")
+            await alarm_timer.standby()
+            return
+        alarm_timer.start(partitions)
+        self.scheduler.add_job(reconcile_alarm_timer, "interval", args=[partitions], id="reconcile_alarm_timer",
+                               seconds=config.ALARM_SWEEP_INTERVAL_SECONDS, next_run_time=datetime.now(),
+                               replace_existing=True)
 
+    async def start_leader_jobs(self) -> None:
+        self.scheduler.add_job(check_expired_leases, "interval", id="check_expired_leases",
+                               seconds=config.ALARM_LEASE_CHECK_INTERVAL_SECONDS, replace_existing=True)
+        if not self.partitioned:
+            await self.set_partitions(None)
 
-def create_and_start_scheduler() -> AsyncIOScheduler:
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(check_queue_status, "interval", seconds=60)
-    scheduler.start()
-    return scheduler
+    async def stop_leader_jobs(self) -> None:
+        self._remove_job("check_expired_leases")
+        if not self.partitioned:
+            await self.set_partitions([])
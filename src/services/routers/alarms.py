@@ -1,16 +1,25 @@
 import datetime
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from starlette import status
+from starlette.requests import Request
 
-from src.core.models.AlarmModel import AlarmModel, AlarmStatuses, AlarmRouterModel, AlarmLinksModel
+from src.core.models.AlarmModel import (AlarmModel, AlarmStatuses, AlarmRouterModel, AlarmLinksModel, AlarmsAckModel,
+                                        AlarmCreateModel, AlarmWriteResultModel, AlarmActionModel, AlarmActionResultModel)
+from src.core.models.PageModel import PageParamsModel
 from src.infrastructure.alarms import db_interaction
-from src.infrastructure.exceptions import AlarmNotRepeatable, UnexpectedInfrastructureException
+from src.infrastructure.exceptions import AlarmNotRepeatable
 from src.services.auth.auth import get_current_backend_user
 from src.services.auth.database import BackendUser
 from src.services.database.database_exceptions import DBNotFound, InvalidIdException
 from src.services.database.interface import IDataBase
+from src.services.jobs.ready_alarms_broker import ready_alarms_broker
+from src.utils import config
 from src.utils.depends import get_db
+from src.utils.pagination import get_page_params, page_response, MAX_PAGE_LIMIT
+from src.utils.streaming import wants_ndjson, ndjson_response, sse_response
 
 router = APIRouter(
     prefix="/alarms",
@@ -31,50 +40,138 @@ async def get_alarm(alarm_id: str, db: IDataBase = Depends(get_db),
 
 
 @router.get("/get_all_alarm_by_parent_id/{parent_id}", status_code=status.HTTP_200_OK)
-async def get_all_alarms_by_parent_id(parent_id: str, db: IDataBase = Depends(get_db),
+async def get_all_alarms_by_parent_id(r: Request, parent_id: str, db: IDataBase = Depends(get_db),
+                                      page_params: PageParamsModel = Depends(get_page_params),
                                       backend_user: BackendUser = Depends(get_current_backend_user)
                                       ) -> list[AlarmModel]:
     try:
         AlarmLinksModel.parent_id_must_convert_to_object_id(parent_id)  # Validate Parent id
-        alarms = await db_interaction.get_all_alarm_by_condition(
-            {"links.parent_id": parent_id}, db
+        if wants_ndjson(r):
+            return await ndjson_response(db_interaction.iter_alarms_by_condition(
+                {"links.parent_id": parent_id}, page_params.after, db
+            ))
+        page = await db_interaction.get_alarms_page_by_condition(
+            {"links.parent_id": parent_id}, page_params, db
         )
-        return alarms
+        return page_response(page)
     except DBNotFound as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     except ValueError as err:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
 @router.get("/get_all_user_alarms/{user_id}", status_code=status.HTTP_200_OK)
-async def get_all_user_alarms(user_id, db: IDataBase = Depends(get_db),
+async def get_all_user_alarms(r: Request, user_id, db: IDataBase = Depends(get_db),
+                              page_params: PageParamsModel = Depends(get_page_params),
                               backend_user: BackendUser = Depends(get_current_backend_user)) -> list[AlarmModel]:
     try:
-        alarms = await db_interaction.get_all_alarm_by_condition(
-            {"links.user_id": user_id}, db
+        if wants_ndjson(r):
+            return await ndjson_response(db_interaction.iter_alarms_by_condition(
+                {"links.user_id": user_id}, page_params.after, db
+            ))
+        page = await db_interaction.get_alarms_page_by_condition(
+            {"links.user_id": user_id}, page_params, db
         )
-        return alarms
+        return page_response(page)
     except DBNotFound as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     except ValueError as err:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
 @router.get("/get_all_ready_alarms", status_code=status.HTTP_200_OK)
-async def get_all_ready_alarms(db: IDataBase = Depends(get_db),
+async def get_all_ready_alarms(r: Request, db: IDataBase = Depends(get_db),
+                               page_params: PageParamsModel = Depends(get_page_params),
                                backend_user: BackendUser = Depends(get_current_backend_user)
                                ) -> list[AlarmModel]:
     try:
-        alarms = await db_interaction.get_all_alarm_by_condition(
-            {"status": AlarmStatuses.READY.value}, db
+        if wants_ndjson(r):
+            return await ndjson_response(db_interaction.iter_alarms_by_condition(
+                {"status": AlarmStatuses.READY.value}, page_params.after, db
+            ))
+        page = await db_interaction.get_alarms_page_by_condition(
+            {"status": AlarmStatuses.READY.value}, page_params, db
         )
-        return alarms
+        return page_response(page)
+    except DBNotFound as err:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+
+@router.get("/wait_ready_alarms", status_code=status.HTTP_200_OK)
+async def wait_ready_alarms(timeout: float = Query(default=30, ge=0, le=config.LONG_POLL_MAX_SECONDS),
+                            db: IDataBase = Depends(get_db),
+                            page_params: PageParamsModel = Depends(get_page_params),
+                            backend_user: BackendUser = Depends(get_current_backend_user)
+                            ) -> list[AlarmModel]:
+    """Long-poll variant of get_all_ready_alarms, waits up to timeout seconds for alarms to become READY"""
+    try:
+        page = await db_interaction.wait_ready_alarms_page(page_params, timeout, db)
+        return page_response(page)
     except DBNotFound as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     except ValueError as err:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
+@router.post("/claim_ready_alarms", status_code=status.HTTP_200_OK)
+async def claim_ready_alarms(consumer_id: str,
+                             limit: int = Query(default=100, ge=1, le=MAX_PAGE_LIMIT),
+                             lease_seconds: int = Query(default=config.ALARM_LEASE_SECONDS, ge=1),
+                             db: IDataBase = Depends(get_db),
+                             backend_user: BackendUser = Depends(get_current_backend_user)) -> list[AlarmModel]:
+    """
+    Atomically move up to limit READY alarms to IN_FLIGHT for consumer_id and return them.
+    Consumer must ack or nack them before lease_seconds, otherwise alarms return to READY
+    """
+    try:
+        alarms = await db_interaction.claim_ready_alarms(consumer_id, limit, lease_seconds, db)
+        return alarms
+    except DBNotFound as err:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+
+
+@router.post("/ack_alarms", status_code=status.HTTP_200_OK)
+async def ack_alarms(ack: AlarmsAckModel, db: IDataBase = Depends(get_db),
+                     backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
+    """Finish delivered claimed alarms, alarms with lost lease are not counted"""
+    try:
+        update_count = await db_interaction.ack_alarms(ack.alarm_ids, ack.consumer_id, db)
+        return {"update_count": update_count}
+    except InvalidIdException as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+
+@router.post("/nack_alarms", status_code=status.HTTP_200_OK)
+async def nack_alarms(ack: AlarmsAckModel, db: IDataBase = Depends(get_db),
+                      backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
+    """Return not delivered claimed alarms to READY, alarms with lost lease are not counted"""
+    try:
+        update_count = await db_interaction.nack_alarms(ack.alarm_ids, ack.consumer_id, db)
+        return {"update_count": update_count}
+    except InvalidIdException as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+
+@router.get("/ready_alarms_stream", status_code=status.HTTP_200_OK)
+async def ready_alarms_stream(r: Request, db: IDataBase = Depends(get_db),
+                              backend_user: BackendUser = Depends(get_current_backend_user)):
+    """
+    Server-sent events with alarms as they become READY, heartbeat comment is sent to idle connection.
+    Reconnect with Last-Event-ID header resumes stream, otherwise it starts with all alarms READY now
+    """
+    return sse_response(ready_alarms_broker.stream(r.headers.get("last-event-id"), db))
+
+
 @router.post("/create_alarm", status_code=status.HTTP_201_CREATED)
 async def create_alarm(alarm: AlarmRouterModel,
                        next_notion_time: datetime.datetime,
@@ -86,6 +183,31 @@ async def create_alarm(alarm: AlarmRouterModel,
     return alarm_id
 
 
+@router.post("/create_alarms", status_code=status.HTTP_200_OK)
+async def create_alarms(alarms: list[dict] = Body(..., min_items=1, max_items=config.ALARMS_BATCH_MAX_SIZE),
+                        db: IDataBase = Depends(get_db),
+                        backend_user: BackendUser = Depends(get_current_backend_user)
+                        ) -> list[AlarmWriteResultModel]:
+    """
+    Create many alarms by one db write. Every alarm is validated alone,
+    result has id or error of every alarm in request order
+    """
+    results = [AlarmWriteResultModel() for _ in alarms]
+    valid_alarms, valid_results = list(), list()
+    for alarm, result in zip(alarms, results):
+        try:
+            valid_alarms.append(AlarmCreateModel.parse_obj(alarm))
+            valid_results.append(result)
+        except ValidationError as err:
+            result.error = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in err.errors())
+    if valid_alarms:
+        alarm_ids = await db_interaction.write_alarms_to_db(valid_alarms, db)
+        for alarm_id, result in zip(alarm_ids, valid_results):
+            result.alarm_id = alarm_id
+            result.error = None if alarm_id is not None else "Alarm duplicate key"
+    return ORJSONResponse([result.dict() for result in results])
+
+
 @router.patch("/postpone_repeatable_alarm/{alarm_id}", status_code=200)
 async def get_all_user_ready_alarms(alarm_id: str, db: IDataBase = Depends(get_db),
                                     backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
@@ -98,8 +220,20 @@ async def get_all_user_ready_alarms(alarm_id: str, db: IDataBase = Depends(get_d
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     except InvalidIdException as err:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
-    except UnexpectedInfrastructureException as err:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.post("/apply_alarms_actions", status_code=status.HTTP_200_OK)
+async def apply_alarms_actions(actions: list[AlarmActionModel] = Body(..., min_items=1,
+                                                                      max_items=config.ALARMS_BATCH_MAX_SIZE),
+                               db: IDataBase = Depends(get_db),
+                               backend_user: BackendUser = Depends(get_current_backend_user)
+                               ) -> list[AlarmActionResultModel]:
+    """
+    Finish or postpone many delivered alarms by one db write instead of update_alarm_status
+    and postpone_repeatable_alarm per alarm. Result has error or next_notion_time of every action
+    """
+    results = await db_interaction.apply_alarms_actions(actions, db)
+    return ORJSONResponse([result.dict() for result in results])
 
 
 @router.patch("/update_alarm/{alarm_id}", status_code=status.HTTP_200_OK)
@@ -113,13 +247,18 @@ async def update_alarm(alarm_id: str, new_data: dict, db: IDataBase = Depends(ge
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
     except InvalidIdException as err:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
 @router.patch("/update_alarm_status/{alarm_id}", status_code=status.HTTP_200_OK)
 async def update_alarm_status(alarm_id: str, new_status: AlarmStatuses,
                               db: IDataBase = Depends(get_db),
                               backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
-    """Update alarm status"""
+    """Update alarm status, IN_FLIGHT is set only by claim of alarms"""
+    if new_status == AlarmStatuses.IN_FLIGHT:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Alarm can be moved to IN_FLIGHT only by claim")
     try:
         update_count = await db_interaction.update_alarm(alarm_id=alarm_id,
                                                          db=db,
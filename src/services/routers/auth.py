@@ -0,0 +1,51 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users.router.common import ErrorCode
+from starlette import status
+from starlette.requests import Request
+
+from src.services.auth.auth_backend import get_jwt_strategy, get_refresh_strategy, RefreshTokenStrategy
+from src.services.auth.manager import get_user_manager, UserManager
+from src.services.auth.models import TokensModel, RefreshTokenModel
+
+logger = logging.getLogger("app.router.auth")
+
+router = APIRouter(
+    prefix="/auth/jwt",
+    tags=["auth"]
+)
+
+
+@router.post("/login", status_code=status.HTTP_200_OK)
+async def login(r: Request, credentials: OAuth2PasswordRequestForm = Depends(),
+                user_manager: UserManager = Depends(get_user_manager),
+                refresh_strategy: RefreshTokenStrategy = Depends(get_refresh_strategy)) -> TokensModel:
+    """Password check, the only expensive step of auth, is done once per session"""
+    user = await user_manager.authenticate(credentials)
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=ErrorCode.LOGIN_BAD_CREDENTIALS)
+    await user_manager.on_after_login(user, r)
+    return TokensModel(access_token=await get_jwt_strategy().write_token(user),
+                       refresh_token=await refresh_strategy.write_token(user))
+
+
+@router.post("/refresh", status_code=status.HTTP_200_OK)
+async def refresh(r: Request, body: RefreshTokenModel, user_manager: UserManager = Depends(get_user_manager),
+                  refresh_strategy: RefreshTokenStrategy = Depends(get_refresh_strategy)) -> TokensModel:
+    """New access token and new refresh token, sent refresh token can not be used again"""
+    result = await refresh_strategy.rotate(body.refresh_token, user_manager)
+    if result is None:
+        logger.info("POST:Fail:/refresh:refresh token is revoked or not valid")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is not valid")
+    user, refresh_token = result
+    return TokensModel(access_token=await get_jwt_strategy().write_token(user), refresh_token=refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(r: Request, body: RefreshTokenModel,
+                 refresh_strategy: RefreshTokenStrategy = Depends(get_refresh_strategy)) -> None:
+    """Revoke session of refresh token, access tokens already issued live till expiry"""
+    if not await refresh_strategy.revoke(body.refresh_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is not valid")
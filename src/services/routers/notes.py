@@ -5,12 +5,15 @@ from starlette import status
 from starlette.requests import Request
 
 from src.core.models.NoteModel import NoteRouterModel, NoteModel, NoteLinksModel
+from src.core.models.PageModel import PageParamsModel
 from src.infrastructure.notes import db_interaction
 from src.services.auth.auth import get_current_backend_user
 from src.services.auth.database import BackendUser
 from src.services.database.database_exceptions import DBNotFound, InvalidIdException
 from src.services.database.interface import IDataBase
 from src.utils.depends import get_db
+from src.utils.pagination import get_page_params, page_response
+from src.utils.streaming import wants_ndjson, ndjson_response
 
 logger = logging.getLogger("app.router.notes")
 
@@ -37,37 +40,53 @@ async def get_note(note_id: str, db: IDataBase = Depends(get_db),
 
 
 @router.get("/get_all_notes_by_theme_id/{theme_id}", status_code=status.HTTP_200_OK)
-async def get_all_notes_by_theme_id(theme_id: str, db: IDataBase = Depends(get_db),
+async def get_all_notes_by_theme_id(r: Request, theme_id: str, db: IDataBase = Depends(get_db),
+                                    page_params: PageParamsModel = Depends(get_page_params),
                                     backend_user: BackendUser = Depends(get_current_backend_user)) -> list[NoteModel]:
     logger.info(f"GET:Start:/get_all_notes_by_theme_id:{theme_id}")
     try:
         NoteLinksModel.theme_id_must_convert_to_object_id(theme_id)  # Validate theme_id
-        note = await db_interaction.get_all_notes_by_condition(
-            {"links.theme_id": theme_id}, db
+        if wants_ndjson(r):
+            return await ndjson_response(db_interaction.iter_notes_by_condition(
+                {"links.theme_id": theme_id}, page_params.after, db
+            ))
+        page = await db_interaction.get_notes_page_by_condition(
+            {"links.theme_id": theme_id}, page_params, db
         )
-        logger.info(f"GET:Success:/get_all_notes_by_theme_id:{theme_id}:{note}")
-        return note
+        logger.info(f"GET:Success:/get_all_notes_by_theme_id:{theme_id}:{page.items}")
+        return page_response(page)
     except DBNotFound as err:
         logger.info(f"GET:Success handle exception:/get_all_notes_by_theme_id:{theme_id}:{err}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        logger.info(f"GET:Success handle exception:/get_all_notes_by_theme_id:{theme_id}:{err}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
     except ValueError as err:
         logger.info(f"GET:Success handle exception:/get_all_notes_by_theme_id:{theme_id}:{err}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
 @router.get("/get_all_notes_by_user_id/{user_id}", status_code=status.HTTP_200_OK)
-async def get_all_notes_by_user_id(user_id: str, db: IDataBase = Depends(get_db),
+async def get_all_notes_by_user_id(r: Request, user_id: str, db: IDataBase = Depends(get_db),
+                                   page_params: PageParamsModel = Depends(get_page_params),
                                    backend_user: BackendUser = Depends(get_current_backend_user)) -> list[NoteModel]:
     logger.info(f"GET:Start:/get_all_notes_by_user_id:{user_id}")
     try:
-        note = await db_interaction.get_all_notes_by_condition(
-            {"links.user_id": user_id}, db
+        if wants_ndjson(r):
+            return await ndjson_response(db_interaction.iter_notes_by_condition(
+                {"links.user_id": user_id}, page_params.after, db
+            ))
+        page = await db_interaction.get_notes_page_by_condition(
+            {"links.user_id": user_id}, page_params, db
         )
-        logger.info(f"GET:Success:/get_all_notes_by_user_id:{user_id}:{note}")
-        return note
+        logger.info(f"GET:Success:/get_all_notes_by_user_id:{user_id}:{page.items}")
+        return page_response(page)
     except DBNotFound as err:
         logger.info(f"GET:Success handle exception:/get_all_notes_by_user_id:{user_id}:{err}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        logger.info(f"GET:Success handle exception:/get_all_notes_by_user_id:{user_id}:{err}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
 @router.post("/create_note", status_code=status.HTTP_201_CREATED)
@@ -4,6 +4,7 @@ from starlette.requests import Request
 
 from src.services.auth.auth import get_current_backend_user
 from src.services.auth.database import BackendUser
+from src.services.database.mongo_client import mongo_client_factory
 
 router = APIRouter(
     # prefix="/"
@@ -23,3 +24,9 @@ async def protected_jwt_ping(r: Request, backend_user: BackendUser = Depends(get
         "app": r.app.title,
         "user": backend_user.tags
     }
+
+
+@router.get("/db_pool_stats", status_code=status.HTTP_200_OK)
+async def db_pool_stats(r: Request, backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
+    """Mongo connection pool counters of worker process that handled request"""
+    return mongo_client_factory.stats()
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
 from starlette.requests import Request
 
+from src.core.models.PageModel import PageParamsModel
 from src.core.models.ThemeModel import ThemeModel, ThemeModelWrite
 from src.infrastructure.themes import db_interaction
 from src.services.auth.auth import get_current_backend_user
@@ -11,6 +12,8 @@ from src.services.auth.database import BackendUser
 from src.services.database.database_exceptions import DBNotFound, InvalidIdException
 from src.services.database.interface import IDataBase
 from src.utils.depends import get_db
+from src.utils.pagination import get_page_params, page_response
+from src.utils.streaming import wants_ndjson, ndjson_response
 
 logger = getLogger("app.router.themes")
 
@@ -34,17 +37,25 @@ async def get_theme(r: Request, theme_id: str, db: IDataBase = Depends(get_db),
 
 @router.get("/get_all_user_themes/{user_id}")
 async def get_all_user_themes(r: Request, user_id: str, db: IDataBase = Depends(get_db),
+                              page_params: PageParamsModel = Depends(get_page_params),
                               backend_user: BackendUser = Depends(get_current_backend_user)) -> list[ThemeModel]:
     logger.info(f"GET:Start:/get_all_user_themes/{user_id}")
     try:
-        themes = await db_interaction.get_all_themes_by_condition(
-            {"links": {"user_id": user_id}}, db
+        if wants_ndjson(r):
+            return await ndjson_response(db_interaction.iter_themes_by_condition(
+                {"links.user_id": user_id}, page_params.after, db
+            ))
+        page = await db_interaction.get_themes_page_by_condition(
+            {"links.user_id": user_id}, page_params, db
         )
-        logger.info(f"GET:Success:/get_all_user_themes/{user_id}:{themes}")
-        return themes
+        logger.info(f"GET:Success:/get_all_user_themes/{user_id}:{page.items}")
+        return page_response(page)
     except DBNotFound as err:
         logger.info(f"GET:Success:/get_all_user_themes/{user_id}:{err}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except InvalidIdException as err:
+        logger.info(f"GET:Success:/get_all_user_themes/{user_id}:{err}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
 
 @router.post("/create_theme", status_code=status.HTTP_201_CREATED)
@@ -70,8 +81,8 @@ async def update_theme(r: Request, theme_id: str, new_data: dict, db: IDataBase
 async def delete_theme(r: Request, theme_id: str, db: IDataBase = Depends(get_db),
                        backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
     try:
-        deleted_count = await db_interaction.delete_theme_from_db(theme_id, db)
-        return {"deleted_count": deleted_count}
+        delete_result = await db_interaction.delete_theme_from_db(theme_id, db)
+        return delete_result.dict()
     except DBNotFound as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
     except InvalidIdException as err:
@@ -84,7 +95,7 @@ async def delete_all_user_themes(r: Request, user_id: str, db: IDataBase = Depen
     logger.info(f"DELETE:Start:/delete_all_user_themes/{user_id}")
     try:
         delete_count = await db_interaction.delete_all_themes_from_db_by_condition(
-            {"links": {"user_id": user_id}}, db
+            {"links.user_id": user_id}, db
         )
         logger.info(f"DELETE:Success:/delete_all_user_themes/{user_id}:delete count - {delete_count}")
         return {"deleted_count": delete_count}
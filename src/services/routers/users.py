@@ -4,13 +4,15 @@ from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
 from starlette.requests import Request
 
+from src.core.models.TaskModel import TaskModel
 from src.core.models.UserModel import UserModel
 from src.infrastructure.users.db_interaction import (get_user_from_db, write_user_to_db, update_username_in_db,
-                                                     delete_user_from_db)
+                                                     delete_user_from_db, get_users_cache_stats, purge_user_from_db)
 from src.services.auth.auth import get_current_backend_user
 from src.services.auth.database import BackendUser
 from src.services.database.database_exceptions import DBNotFound, DuplicateKey
 from src.services.database.interface import IDataBase
+from src.services.jobs.background_tasks import background_tasks
 from src.utils.depends import get_db
 
 logger = logging.getLogger("app.router.users")
@@ -36,6 +38,12 @@ async def get_user(r: Request, user_telegram_id: str, db: IDataBase = Depends(ge
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
 
 
+@router.get("/cache_stats", status_code=status.HTTP_200_OK)
+async def cache_stats(r: Request, backend_user: BackendUser = Depends(get_current_backend_user)) -> dict:
+    """Users cache counters of worker process that handled request"""
+    return get_users_cache_stats()
+
+
 @router.post("/create_user", status_code=status.HTTP_201_CREATED)
 async def create_user(r: Request, user: UserModel, db: IDataBase = Depends(get_db),
                       backend_user: BackendUser = Depends(get_current_backend_user)) -> str:
@@ -70,3 +78,25 @@ async def delete_user(r: Request, user_telegram_id: str, db: IDataBase = Depends
         return deleted_count
     except DBNotFound as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+
+
+@router.delete("/purge_user/{user_telegram_id}", status_code=status.HTTP_202_ACCEPTED)
+async def purge_user(r: Request, user_telegram_id: str, db: IDataBase = Depends(get_db),
+                     backend_user: BackendUser = Depends(get_current_backend_user)) -> TaskModel:
+    """
+    Start deleting user with all their themes, notes and alarms in background.
+    Progress is available in /purge_user_status of the same worker process
+    """
+    logger.info(f"DELETE:Start:/purge_user/{user_telegram_id}")
+    return background_tasks.start(
+        f"purge_user {user_telegram_id}", lambda progress: purge_user_from_db(user_telegram_id, db, progress)
+    )
+
+
+@router.get("/purge_user_status/{task_id}", status_code=status.HTTP_200_OK)
+async def purge_user_status(r: Request, task_id: str,
+                            backend_user: BackendUser = Depends(get_current_backend_user)) -> TaskModel:
+    task = background_tasks.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return task
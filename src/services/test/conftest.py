@@ -1,5 +1,6 @@
 import asyncio
-from typing import AsyncGenerator
+from datetime import datetime
+from typing import AsyncGenerator, Awaitable, Callable
 
 import pytest
 from asgi_lifespan import LifespanManager
@@ -7,10 +8,18 @@ from httpx import AsyncClient
 from pydantic import BaseModel
 
 from src.app_main import app
+from src.core.models.AlarmModel import AlarmStatuses
+from src.infrastructure.alarms.db_interaction import write_alarm_to_db
+from src.services.auth.auth import get_current_backend_user
+from src.services.database.memory_db import MemoryAPI
+from src.services.jobs.alarm_timer import alarm_timer
+from src.services.test.data import AlarmJobsTestData
+from src.utils import config
 
 
 class BackendUserData(BaseModel):
     token: str | None = None
+    refresh_token: str | None = None
 
 
 class ThemeCash(BaseModel):
@@ -26,6 +35,12 @@ class AlarmCash(BaseModel):
     alarm_id: None | str = None
 
 
+class StubBackendUser:
+    """Backend user for local db runs, auth storage needs Mongo"""
+    tags = ["test"]
+    is_active = True
+
+
 def pytest_configure():
     pytest.theme_cash = ThemeCash()
     pytest.note_cash = NoteCash()
@@ -43,6 +58,37 @@ def event_loop():
 
 @pytest.fixture(scope="session")
 async def ac() -> AsyncGenerator[AsyncClient, None]:
+    if config.DB_BACKEND != "mongo":
+        app.dependency_overrides[get_current_backend_user] = lambda: StubBackendUser()
+        async with AsyncClient(app=app, base_url="http://test.io") as ac:
+            yield ac
+        app.dependency_overrides.clear()
+        await app.state.db.close()
+        return
     async with LifespanManager(app):
         async with AsyncClient(app=app, base_url="http://test.io") as ac:
             yield ac
+
+
+@pytest.fixture
+async def memory_db() -> AsyncGenerator[MemoryAPI, None]:
+    """Empty in-memory db for tests of infrastructure and jobs, cleared after test"""
+    db = MemoryAPI()
+    await db.clear()
+    yield db
+    await db.clear()
+
+
+@pytest.fixture
+def ready_alarm(memory_db) -> Callable[..., Awaitable[str]]:
+    """Factory of AlarmJobsTestData alarms in memory_db with given status and without timer, returns alarm id"""
+    async def write(status: AlarmStatuses = AlarmStatuses.READY, is_repeatable: bool = False,
+                    next_notion_time: datetime = datetime(2030, 1, 1), repeat_interval: int | None = None) -> str:
+        alarm = AlarmJobsTestData.alarm.copy(update={"is_repeatable": is_repeatable})
+        alarm_id = await write_alarm_to_db(alarm, memory_db, next_notion_time, repeat_interval)
+        alarm_timer.cancel(alarm_id)
+        if status != AlarmStatuses.QUEUE:
+            await memory_db.update_alarm(alarm_id, {"status": status.value})
+        return alarm_id
+
+    return write
@@ -1,3 +1,6 @@
+from bson import ObjectId
+from fastapi_users import exceptions
+
 from src.core.models.AlarmModel import AlarmRouterModel, AlarmLinksModel
 from src.core.models.NoteModel import NoteRouterModel, NoteLinksModel, NoteDataModel, CheckPointModel
 from src.core.models.ThemeModel import ThemeModelWrite, ThemesLinksModel
@@ -81,3 +84,52 @@ class AlarmTestData(TestData):
             parent_id=parent_id
         )
     )
+
+
+class AlarmJobsTestData(TestData):
+    user = UserModel(
+        telegram_id="555000001",
+        user_name="TestJobsUser",
+        lang_code="Ru",
+        timezone=3
+    )
+    alarm = AlarmRouterModel(
+        name="test jobs alarm",
+        description="test desc",
+        is_repeatable=True,
+        links=AlarmLinksModel(
+            user_id=user.telegram_id,
+            parent_id="33cc204076aa1111a1111a1a"
+        )
+    )
+
+
+class StubUser:
+
+    def __init__(self) -> None:
+        self.id = ObjectId()
+        self.is_active = True
+
+
+class StubUserManager:
+    """User manager counting db lookups"""
+
+    def __init__(self, *users: StubUser) -> None:
+        self.users = {user.id: user for user in users}
+        self.lookups = 0
+
+    def parse_id(self, value) -> ObjectId:
+        return ObjectId(value)
+
+    async def get(self, user_id: ObjectId) -> StubUser:
+        self.lookups += 1
+        if user_id not in self.users:
+            raise exceptions.UserNotExists()
+        return self.users[user_id]
+
+
+class FailingDB:
+    """Db, that is not available"""
+
+    async def acquire_lock(self, name: str, owner: str, lease_seconds: float) -> bool:
+        raise ConnectionError("db is not available")
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+from src.services.auth.auth_backend import RefreshTokenStrategy, CachedJWTStrategy
+from src.services.test.data import StubUser, StubUserManager
+
+
+class MemoryRevocationList:
+
+    def __init__(self) -> None:
+        self.revoked: dict[str, datetime] = {}
+
+    async def add(self, token_id: str, expires_at: datetime) -> bool:
+        if token_id in self.revoked:
+            return False
+        self.revoked[token_id] = expires_at
+        return True
+
+    async def contains(self, token_ids: list[str]) -> bool:
+        return any(token_id in self.revoked for token_id in token_ids)
+
+
+def make_strategy(lifetime_seconds: int = 3600) -> RefreshTokenStrategy:
+    return RefreshTokenStrategy(secret="test secret", lifetime_seconds=lifetime_seconds,
+                                revocation_list=MemoryRevocationList())
+
+
+class TestRefreshTokens:
+
+    async def test_rotation(self):
+        user = StubUser()
+        user_manager = StubUserManager(user)
+        strategy = make_strategy()
+        token = await strategy.write_token(user)
+        for _ in range(3):
+            refreshed_user, new_token = await strategy.rotate(token, user_manager)
+            assert refreshed_user is user
+            assert new_token != token
+            token = new_token
+
+    async def test_reused_token_revokes_session(self):
+        user = StubUser()
+        user_manager = StubUserManager(user)
+        strategy = make_strategy()
+        token = await strategy.write_token(user)
+        _, new_token = await strategy.rotate(token, user_manager)
+
+        assert await strategy.rotate(token, user_manager) is None
+        assert await strategy.rotate(new_token, user_manager) is None
+
+    async def test_revoke(self):
+        user = StubUser()
+        user_manager = StubUserManager(user)
+        strategy = make_strategy()
+        token, other_session_token = await strategy.write_token(user), await strategy.write_token(user)
+
+        assert await strategy.revoke(token)
+
+        assert await strategy.rotate(token, user_manager) is None
+        assert await strategy.rotate(other_session_token, user_manager) is not None
+
+    @pytest.mark.parametrize("lifetime_seconds, is_active, exists", [(-1, True, True), (3600, False, True),
+                                                                     (3600, True, False)])
+    async def test_not_valid_token(self, lifetime_seconds, is_active, exists):
+        user = StubUser()
+        user.is_active = is_active
+        user_manager = StubUserManager(*([user] if exists else []))
+        strategy = make_strategy(lifetime_seconds)
+        assert await strategy.rotate(await strategy.write_token(user), user_manager) is None
+
+    @pytest.mark.parametrize("token", ["not a jwt", None])
+    async def test_access_token_is_not_refresh_token(self, token):
+        user = StubUser()
+        strategy = make_strategy()
+        token = token or await CachedJWTStrategy(secret="test secret", lifetime_seconds=120).write_token(user)
+        assert await strategy.rotate(token, StubUserManager(user)) is None
+        assert not await strategy.revoke(token)
@@ -0,0 +1,63 @@
+import pytest
+
+from src.services.auth.auth_backend import CachedJWTStrategy, verified_tokens_cache, revoke_user_tokens
+from src.services.test.data import StubUser, StubUserManager
+
+
+def make_strategy(lifetime_seconds: int | None = 120) -> CachedJWTStrategy:
+    return CachedJWTStrategy(secret="test secret", lifetime_seconds=lifetime_seconds)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    verified_tokens_cache.clear()
+    yield
+    verified_tokens_cache.clear()
+
+
+class TestVerifiedTokensCache:
+
+    @pytest.mark.parametrize("lifetime_seconds", [120, None])
+    async def test_user_loaded_once_per_token(self, lifetime_seconds):
+        user = StubUser()
+        user_manager = StubUserManager(user)
+        strategy = make_strategy(lifetime_seconds)
+        token = await strategy.write_token(user)
+        for _ in range(3):
+            assert await strategy.read_token(token, user_manager) is user
+        assert user_manager.lookups == 1
+
+    @pytest.mark.parametrize("token", [None, "not a jwt"])
+    async def test_invalid_token(self, token):
+        user_manager = StubUserManager()
+        assert await make_strategy().read_token(token, user_manager) is None
+        assert len(verified_tokens_cache) == 0
+
+    async def test_expired_token_is_not_cached(self):
+        user = StubUser()
+        user_manager = StubUserManager(user)
+        token = await make_strategy(lifetime_seconds=-1).write_token(user)
+        assert await make_strategy().read_token(token, user_manager) is None
+        assert len(verified_tokens_cache) == 0
+
+    async def test_not_existing_user(self):
+        user_manager = StubUserManager()
+        token = await make_strategy().write_token(StubUser())
+        assert await make_strategy().read_token(token, user_manager) is None
+        assert len(verified_tokens_cache) == 0
+
+    async def test_revoke_user_tokens(self):
+        user, other_user = StubUser(), StubUser()
+        user_manager = StubUserManager(user, other_user)
+        strategy = make_strategy()
+        token, other_token = await strategy.write_token(user), await strategy.write_token(other_user)
+        await strategy.read_token(token, user_manager)
+        await strategy.read_token(other_token, user_manager)
+
+        user.is_active = False
+        assert revoke_user_tokens(user.id) == 1
+
+        assert await strategy.read_token(token, user_manager) is None
+        assert await strategy.read_token(token, user_manager) is None
+        await strategy.read_token(other_token, user_manager)
+        assert user_manager.lookups == 4
@@ -0,0 +1,43 @@
+import pytest
+
+from src.core.models.IndexModel import QueryShapeModel
+from src.services.database.indexes import INDEXES, QUERY_SHAPES, is_query_indexed, find_unindexed_queries
+
+
+def registry_keys() -> dict[str, list[tuple[str, ...]]]:
+    return {collection: [tuple(key for key, _ in index.keys) for index in indexes]
+            for collection, indexes in INDEXES.items()}
+
+
+class TestIndexes:
+
+    @pytest.mark.parametrize(
+        "fields, indexes_keys, indexed",
+        [
+            (("status", "_id"), [("status", "_id")], True),
+            # Index longer than query serves it by prefix
+            (("status",), [("status", "times.due_at_utc")], True),
+            (("status", "times.due_at_utc"), [("status", "partition", "times.due_at_utc")], False),
+            # Equality fields go in any order, range field must be next after them
+            (("partition", "status", "times.due_at_utc"), [("status", "partition", "times.due_at_utc")], True),
+            (("status", "_id"), [("_id", "status")], False),
+            (("links.user_id", "_id"), [("links.user_id",)], False),
+            (("links.user_id",), [], False)
+        ]
+    )
+    def test_is_query_indexed(self, fields, indexes_keys, indexed):
+        assert is_query_indexed(QueryShapeModel("alarms", fields), indexes_keys) == indexed
+
+    def test_registry_serves_every_query(self):
+        assert find_unindexed_queries(registry_keys()) == []
+
+    def test_registry_mismatch(self):
+        indexes_keys = registry_keys()
+        indexes_keys["alarms"] = [keys for keys in indexes_keys["alarms"] if keys != ("status", "_id")]
+        del indexes_keys["themes"]
+
+        unindexed = find_unindexed_queries(indexes_keys)
+
+        assert QueryShapeModel("alarms", ("status", "_id")) in unindexed
+        assert {query for query in QUERY_SHAPES if query.collection == "themes"} <= set(unindexed)
+        assert all(query.collection in ("alarms", "themes") for query in unindexed)
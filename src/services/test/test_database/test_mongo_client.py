@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+from httpx import AsyncClient
+from starlette import status
+
+from src.services.database.mongo_client import PoolStatsListener, MongoClientFactory
+from src.utils import config
+
+
+class TestMongoClient:
+
+    def test_pool_stats(self):
+        listener = PoolStatsListener()
+        event = SimpleNamespace()
+        for _ in range(3):
+            listener.connection_created(event)
+        listener.connection_closed(event)
+        listener.connection_checked_out(event)
+        listener.connection_checked_out(event)
+        listener.connection_checked_in(event)
+        listener.connection_check_out_failed(event)
+
+        assert listener.stats() == {"open": 2, "in_use": 1, "created": 3, "closed": 1, "checked_out": 2,
+                                    "check_out_failed": 1, "pools_cleared": 0}
+
+    def test_stats_before_connect(self):
+        stats = MongoClientFactory().stats()
+        assert stats["is_connected"] is False
+        assert stats["max_pool_size"] == config.MONGO_MAX_POOL_SIZE
+        assert stats["open"] == 0
+
+    async def test_db_pool_stats_route(self, ac: AsyncClient):
+        r = await ac.get("db_pool_stats")
+        assert r.status_code == status.HTTP_200_OK
+        assert "in_use" in r.json()
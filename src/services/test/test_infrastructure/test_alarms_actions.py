@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from src.core.models.AlarmModel import AlarmStatuses, AlarmActionModel
+from src.infrastructure.alarms.db_interaction import apply_alarms_actions
+from src.services.jobs.alarm_timer import alarm_timer
+
+
+async def write_ready_alarm(ready_alarm, is_repeatable: bool) -> str:
+    return await ready_alarm(is_repeatable=is_repeatable, next_notion_time=datetime(2020, 1, 1), repeat_interval=60)
+
+
+class TestApplyAlarmsActions:
+
+    async def test_apply_actions(self, memory_db, ready_alarm):
+        one_shot_id = await write_ready_alarm(ready_alarm, False)
+        repeatable_id = await write_ready_alarm(ready_alarm, True)
+        actions = [
+            AlarmActionModel(alarm_id=one_shot_id, action="FINISH"),
+            AlarmActionModel(alarm_id=repeatable_id, action="POSTPONE"),
+            AlarmActionModel(alarm_id=one_shot_id, action="POSTPONE"),
+            AlarmActionModel(alarm_id="11aa204076aa1111a1111a1a", action="FINISH"),
+            AlarmActionModel(alarm_id="1", action="FINISH"),
+        ]
+
+        results = await apply_alarms_actions(actions, memory_db)
+
+        assert [result.alarm_id for result in results] == [action.alarm_id for action in actions]
+        assert [result.error for result in results] == [
+            None, None, "Alarm must be repeatable", "Alarm not found", "Alarm not found"
+        ]
+        assert (await memory_db.get_alarm_by_id(one_shot_id)).status == AlarmStatuses.FINISH
+        repeatable = await memory_db.get_alarm_by_id(repeatable_id)
+        assert repeatable.status == AlarmStatuses.QUEUE
+        assert repeatable.times.next_notion_time == results[1].next_notion_time > datetime.now()
+        alarm_timer.cancel(repeatable_id)
+
+    async def test_alarm_changed_concurrently_is_not_overwritten(self, memory_db, ready_alarm, monkeypatch):
+        changed_id = await write_ready_alarm(ready_alarm, True)
+        repeatable_id = await write_ready_alarm(ready_alarm, True)
+        bulk_update_alarms = memory_db.bulk_update_alarms
+
+        async def change_before_bulk_update(*args) -> int:
+            await memory_db.update_alarm(changed_id, {"times.next_notion_time": datetime(2040, 1, 1)})
+            return await bulk_update_alarms(*args)
+
+        monkeypatch.setattr(memory_db, "bulk_update_alarms", change_before_bulk_update)
+        results = await apply_alarms_actions([AlarmActionModel(alarm_id=changed_id, action="POSTPONE"),
+                                              AlarmActionModel(alarm_id=repeatable_id, action="POSTPONE")],
+                                             memory_db)
+
+        assert [(result.error, result.next_notion_time is None) for result in results] == [
+            ("Alarm was changed concurrently", True), (None, False)
+        ]
+        changed = await memory_db.get_alarm_by_id(changed_id)
+        assert (changed.status, changed.times.next_notion_time) == (AlarmStatuses.READY, datetime(2040, 1, 1))
+        assert (await memory_db.get_alarm_by_id(repeatable_id)).status == AlarmStatuses.QUEUE
+        alarm_timer.cancel(repeatable_id)
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmStatuses
+from src.infrastructure.alarms.db_interaction import claim_ready_alarms, ack_alarms, nack_alarms, release_expired_leases
+from src.services.database.database_exceptions import DBNotFound
+
+
+async def write_ready_alarms(ready_alarm, count: int) -> list[str]:
+    return [await ready_alarm() for _ in range(count)]
+
+
+class TestClaimAlarms:
+
+    async def test_claim_by_limit(self, memory_db, ready_alarm):
+        alarm_ids = await write_ready_alarms(ready_alarm, 3)
+
+        first = await claim_ready_alarms("consumer_1", 2, 60, memory_db)
+        second = await claim_ready_alarms("consumer_2", 2, 60, memory_db)
+
+        assert [alarm.id for alarm in first] == alarm_ids[:2]
+        assert [alarm.id for alarm in second] == alarm_ids[2:]
+        assert all(alarm.status == AlarmStatuses.IN_FLIGHT for alarm in [*first, *second])
+        assert {alarm.lease.consumer_id for alarm in first} == {"consumer_1"}
+        with pytest.raises(DBNotFound):
+            await claim_ready_alarms("consumer_1", 2, 60, memory_db)
+
+    async def test_concurrent_claims_do_not_overlap(self, memory_db, ready_alarm):
+        await write_ready_alarms(ready_alarm, 5)
+
+        results = await asyncio.gather(
+            *(claim_ready_alarms(f"consumer_{i}", 5, 60, memory_db) for i in range(3)), return_exceptions=True
+        )
+
+        claimed_ids = [alarm.id for result in results if isinstance(result, list) for alarm in result]
+        assert len(claimed_ids) == len(set(claimed_ids)) == 5
+
+    @pytest.mark.parametrize(
+        "consumer_id, update_count",
+        [
+            ("consumer_1", 2),
+            ("consumer_2", 0)
+        ]
+    )
+    async def test_ack(self, memory_db, ready_alarm, consumer_id, update_count):
+        alarm_ids = await write_ready_alarms(ready_alarm, 2)
+        await claim_ready_alarms("consumer_1", 2, 60, memory_db)
+
+        assert await ack_alarms(alarm_ids, consumer_id, memory_db) == update_count
+        expected_status = AlarmStatuses.FINISH if update_count else AlarmStatuses.IN_FLIGHT
+        assert {alarm.status for alarm in await memory_db.get_alarms_by_ids(alarm_ids)} == {expected_status}
+
+    async def test_nack_returns_to_ready(self, memory_db, ready_alarm):
+        alarm_ids = await write_ready_alarms(ready_alarm, 2)
+        await claim_ready_alarms("consumer_1", 2, 60, memory_db)
+
+        assert await nack_alarms(alarm_ids[:1], "consumer_1", memory_db) == 1
+
+        alarm = await memory_db.get_alarm_by_id(alarm_ids[0])
+        assert alarm.status == AlarmStatuses.READY and alarm.lease is None
+        assert [alarm.id for alarm in await claim_ready_alarms("consumer_2", 2, 60, memory_db)] == alarm_ids[:1]
+
+    async def test_expired_lease_returns_to_ready(self, memory_db, ready_alarm):
+        alarm_ids = await write_ready_alarms(ready_alarm, 2)
+        await claim_ready_alarms("consumer_1", 2, 60, memory_db)
+        await memory_db.update_alarm(alarm_ids[0], {"lease.expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        # Claim itself does not release expired leases
+        with pytest.raises(DBNotFound):
+            await claim_ready_alarms("consumer_2", 2, 60, memory_db)
+
+        assert await release_expired_leases(memory_db) == 1
+
+        assert (await memory_db.get_alarm_by_id(alarm_ids[0])).status == AlarmStatuses.READY
+        assert (await memory_db.get_alarm_by_id(alarm_ids[1])).status == AlarmStatuses.IN_FLIGHT
+        assert await ack_alarms(alarm_ids, "consumer_1", memory_db) == 1
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmStatuses, AlarmTimesModel, AlarmCreateModel
+from src.infrastructure.alarms import db_interaction
+from src.infrastructure.exceptions import AlarmNotRepeatable
+from src.services.database.database_exceptions import DBNotFound
+from src.services.jobs.alarm_timer import alarm_timer
+from src.services.test.data import AlarmJobsTestData as Data
+
+
+async def write_alarm_without_due_time(db, next_notion_time: datetime | None) -> str:
+    """Alarm as it was written before due_at_utc existed"""
+    return await db.write_new_alarm(Data.alarm.convert_to_alarm_model_write(
+        status=AlarmStatuses.QUEUE,
+        times=AlarmTimesModel(creation_time=datetime.now(), next_notion_time=next_notion_time,
+                              repeat_interval=60, end_time=None)
+    ))
+
+
+class TestAlarmsDueTime:
+
+    @pytest.mark.parametrize(
+        "next_notion_time, user_timezone, due_at_utc",
+        [
+            (datetime(2024, 1, 1, 12), 3, datetime(2024, 1, 1, 9)),
+            (datetime(2024, 1, 1, 1), 3, datetime(2023, 12, 31, 22)),
+            (datetime(2024, 1, 1, 12), -5, datetime(2024, 1, 1, 17)),
+            (datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=5))), 3, datetime(2024, 1, 1, 7)),
+            (datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=5))), None, datetime(2024, 1, 1, 7)),
+            (datetime(2024, 1, 1, 12), None, None),
+            (None, 3, None)
+        ]
+    )
+    def test_compute_due_at_utc(self, next_notion_time, user_timezone, due_at_utc):
+        assert db_interaction.compute_due_at_utc(next_notion_time, user_timezone) == due_at_utc
+
+    async def test_write_alarm_sets_due_at_utc(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        next_notion_time = datetime(2030, 1, 1, 12)
+        alarm_id = await db_interaction.write_alarm_to_db(Data.alarm, memory_db, next_notion_time, 60)
+        alarm_timer.cancel(alarm_id)
+        alarm = await memory_db.get_alarm_by_id(alarm_id)
+        assert alarm.times.due_at_utc == datetime(2030, 1, 1, 9)
+
+    async def test_write_alarms_sets_due_at_utc(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        alarms = [
+            AlarmCreateModel(**Data.alarm.dict(), next_notion_time=datetime(2030, 1, 1, 12), repeat_interval=60),
+            AlarmCreateModel(**{**Data.alarm.dict(), "links": {**Data.alarm.links.dict(), "user_id": "555000099"}},
+                             next_notion_time=datetime(2030, 1, 1, 12), repeat_interval=None)
+        ]
+        alarm_ids = await db_interaction.write_alarms_to_db(alarms, memory_db)
+        for alarm_id in alarm_ids:
+            alarm_timer.cancel(alarm_id)
+        written = [await memory_db.get_alarm_by_id(alarm_id) for alarm_id in alarm_ids]
+        assert [alarm.times.due_at_utc for alarm in written] == [datetime(2030, 1, 1, 9), None]
+        assert [alarm.times.repeat_interval for alarm in written] == [60, None]
+
+    async def test_get_all_due_alarms(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        due_ids = [
+            await db_interaction.write_alarm_to_db(Data.alarm, memory_db, datetime.now() - timedelta(minutes=minutes), 60)
+            for minutes in (1, 30)
+        ]
+        await db_interaction.write_alarm_to_db(Data.alarm, memory_db, datetime.now() + timedelta(hours=4), 60)
+        ready_id = await db_interaction.write_alarm_to_db(Data.alarm, memory_db, datetime.now(), 60)
+        await memory_db.update_alarms_status([ready_id], AlarmStatuses.QUEUE, AlarmStatuses.READY)
+        due_alarms = await db_interaction.get_all_due_alarms(memory_db)
+        # Ordered by due time
+        assert [alarm.id for alarm in due_alarms] == due_ids[::-1]
+        for alarm_id in [*due_ids, ready_id]:
+            alarm_timer.cancel(alarm_id)
+
+    async def test_postpone_keeps_timezone_offset(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        alarm_id = await db_interaction.write_alarm_to_db(Data.alarm, memory_db, datetime.now(), 60)
+        next_notion_time = await db_interaction.postpone_repeatable_alarm(alarm_id, memory_db)
+        alarm_timer.cancel(alarm_id)
+        alarm = await memory_db.get_alarm_by_id(alarm_id)
+        assert alarm.status == AlarmStatuses.QUEUE
+        assert alarm.times.next_notion_time == next_notion_time
+        assert alarm.times.due_at_utc == next_notion_time - timedelta(hours=3)
+
+    async def test_postpone_alarm_without_due_time(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        alarm_id = await write_alarm_without_due_time(memory_db, datetime(2030, 1, 1, 12))
+        next_notion_time = await db_interaction.postpone_repeatable_alarm(alarm_id, memory_db)
+        alarm_timer.cancel(alarm_id)
+        alarm = await memory_db.get_alarm_by_id(alarm_id)
+        assert alarm.times.due_at_utc == next_notion_time - timedelta(hours=3)
+
+    @pytest.mark.parametrize(
+        "is_repeatable, repeat_interval, exception",
+        [
+            (False, 60, AlarmNotRepeatable),
+            (True, None, AlarmNotRepeatable),
+            (None, None, DBNotFound)
+        ]
+    )
+    async def test_postpone_not_repeatable_alarm(self, memory_db, is_repeatable, repeat_interval, exception):
+        alarm_id = "0" * 24
+        if is_repeatable is not None:
+            await memory_db.write_new_user(Data.user)
+            alarm_id = await db_interaction.write_alarm_to_db(Data.alarm, memory_db, datetime.now(), repeat_interval)
+            alarm_timer.cancel(alarm_id)
+            if not is_repeatable:
+                await memory_db.update_alarm(alarm_id, {"is_repeatable": False})
+        with pytest.raises(exception):
+            await db_interaction.postpone_repeatable_alarm(alarm_id, memory_db)
+
+    async def test_backfill_alarms_due_time(self, memory_db, monkeypatch):
+        monkeypatch.setattr(db_interaction, "BACKFILL_BATCH_SIZE", 2)
+        await memory_db.write_new_user(Data.user)
+        next_notion_time = datetime(2030, 1, 1, 12)
+        alarm_ids = [await write_alarm_without_due_time(memory_db, next_notion_time) for _ in range(5)]
+        await write_alarm_without_due_time(memory_db, None)
+        assert await db_interaction.backfill_alarms_due_time(memory_db) == 5
+        for alarm_id in alarm_ids:
+            assert (await memory_db.get_alarm_by_id(alarm_id)).times.due_at_utc == datetime(2030, 1, 1, 9)
+        assert await db_interaction.backfill_alarms_due_time(memory_db) == 0
+
+    async def test_concurrent_backfill_alarms_due_time(self, memory_db, monkeypatch):
+        await memory_db.write_new_user(Data.user)
+        for _ in range(3):
+            await write_alarm_without_due_time(memory_db, datetime(2030, 1, 1, 12))
+        get_all_alarms_by_condition = memory_db.get_all_alarms_by_condition
+
+        async def read_then_yield(*args, **kwargs):
+            alarms = await get_all_alarms_by_condition(*args, **kwargs)
+            # Both backfills read the same alarms before any of them writes
+            await asyncio.sleep(0.01)
+            return alarms
+
+        monkeypatch.setattr(memory_db, "get_all_alarms_by_condition", read_then_yield)
+        updated_counts = await asyncio.gather(*(db_interaction.backfill_alarms_due_time(memory_db) for _ in range(2)))
+        assert sum(updated_counts) == 3
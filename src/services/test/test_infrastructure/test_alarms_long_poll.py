@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmStatuses
+from src.core.models.PageModel import PageParamsModel
+from src.infrastructure.alarms.db_interaction import (wait_ready_alarms_page, update_alarm,
+                                                      promote_queued_alarms_to_ready)
+from src.services.database.database_exceptions import DBNotFound
+
+PAGE_PARAMS = PageParamsModel(limit=100, after=None)
+
+
+class TestWaitReadyAlarms:
+
+    async def test_timeout_without_ready_alarms(self, memory_db, ready_alarm):
+        await ready_alarm(AlarmStatuses.QUEUE)
+        with pytest.raises(DBNotFound):
+            await wait_ready_alarms_page(PAGE_PARAMS, 0.05, memory_db)
+
+    async def test_ready_alarm_returned_at_once(self, memory_db, ready_alarm):
+        alarm_id = await ready_alarm(AlarmStatuses.QUEUE)
+        await update_alarm(alarm_id, {"status": AlarmStatuses.READY.value}, memory_db)
+
+        page = await asyncio.wait_for(wait_ready_alarms_page(PAGE_PARAMS, 10, memory_db), 1)
+
+        assert [alarm.id for alarm in page.items] == [alarm_id]
+
+    @pytest.mark.parametrize("by_promotion", [True, False])
+    async def test_waiter_woken_by_notification(self, memory_db, ready_alarm, by_promotion):
+        alarm_id = await ready_alarm(AlarmStatuses.QUEUE)
+        waiting = asyncio.create_task(wait_ready_alarms_page(PAGE_PARAMS, 10, memory_db))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+        if by_promotion:
+            await promote_queued_alarms_to_ready([alarm_id], memory_db)
+        else:
+            await update_alarm(alarm_id, {"status": AlarmStatuses.READY.value}, memory_db)
+
+        page = await asyncio.wait_for(waiting, 1)
+        assert [alarm.id for alarm in page.items] == [alarm_id]
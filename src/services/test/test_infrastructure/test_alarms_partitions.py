@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from src.core.models.AlarmModel import AlarmStatuses, AlarmTimesModel, AlarmRouterModel, AlarmLinksModel
+from src.infrastructure.alarms import db_interaction
+from src.services.jobs.alarm_timer import alarm_timer
+from src.services.test.data import AlarmJobsTestData as Data
+
+
+def alarm_of_user(user_id: str) -> AlarmRouterModel:
+    return Data.alarm.copy(update={"links": AlarmLinksModel(user_id=user_id, parent_id=Data.alarm.links.parent_id)})
+
+
+async def write_alarm_without_partition(db, user_id: str) -> str:
+    """Alarm as it was written before partition existed"""
+    return await db.write_new_alarm(alarm_of_user(user_id).convert_to_alarm_model_write(
+        status=AlarmStatuses.QUEUE,
+        times=AlarmTimesModel(creation_time=datetime.now(), next_notion_time=None, repeat_interval=None,
+                              end_time=None, due_at_utc=datetime.utcnow() - timedelta(minutes=1))
+    ))
+
+
+class TestAlarmsPartitions:
+
+    def test_alarm_partition_is_stable(self):
+        assert db_interaction.alarm_partition("123456789") == db_interaction.alarm_partition("123456789")
+        partitions = {db_interaction.alarm_partition(str(user_id)) for user_id in range(1000)}
+        assert partitions == set(range(db_interaction.ALARM_PARTITIONS))
+
+    async def test_written_alarm_has_user_partition(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        alarm_id = await db_interaction.write_alarm_to_db(Data.alarm, memory_db, datetime.now(), None)
+        alarm_timer.cancel(alarm_id)
+        alarm = await memory_db.get_alarm_by_id(alarm_id)
+        assert alarm.partition == db_interaction.alarm_partition(Data.user.telegram_id)
+
+    async def test_due_alarms_of_partitions(self, memory_db):
+        alarm_ids = {str(user_id): await write_alarm_without_partition(memory_db, str(user_id))
+                     for user_id in range(20)}
+        assert await db_interaction.backfill_alarms_partition(memory_db) == 20
+        assert await db_interaction.backfill_alarms_partition(memory_db) == 0
+
+        partitions = [0, 1]
+        due_ids = {alarm.id for alarm in await db_interaction.get_all_due_alarms(memory_db, partitions)}
+
+        assert due_ids == {alarm_id for user_id, alarm_id in alarm_ids.items()
+                           if db_interaction.alarm_partition(user_id) in partitions}
+        assert len(await db_interaction.get_all_due_alarms(memory_db)) == 20
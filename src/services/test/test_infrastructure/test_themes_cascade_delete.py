@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmRouterModel, AlarmLinksModel
+from src.core.models.NoteModel import NoteRouterModel, NoteLinksModel, NoteDataModel
+from src.core.models.ThemeModel import ThemeModelWrite, ThemesLinksModel
+from src.infrastructure.alarms.db_interaction import write_alarm_to_db
+from src.infrastructure.notes.db_interaction import write_note_to_db
+from src.infrastructure.themes.db_interaction import delete_theme_from_db
+from src.services.database.database_exceptions import DBNotFound
+from src.services.jobs.alarm_timer import alarm_timer
+
+USER_ID = "555000002"
+
+
+async def write_theme_tree(db, notes_count: int, alarms_per_note: int) -> tuple[str, list[str]]:
+    theme_id = await db.write_new_theme(ThemeModelWrite(name="theme", links=ThemesLinksModel(user_id=USER_ID)))
+    alarms_ids = list()
+    for _ in range(notes_count):
+        note_id = await write_note_to_db(NoteRouterModel(
+            name="note", links=NoteLinksModel(user_id=USER_ID, theme_id=theme_id),
+            data=NoteDataModel(text="text", check_points=[])
+        ), db)
+        for _ in range(alarms_per_note):
+            alarms_ids.append(await write_alarm_to_db(AlarmRouterModel(
+                name="alarm", is_repeatable=False, links=AlarmLinksModel(user_id=USER_ID, parent_id=note_id)
+            ), db, datetime(2030, 1, 1), None))
+    return theme_id, alarms_ids
+
+
+class TestThemesCascadeDelete:
+
+    @pytest.mark.parametrize(
+        "notes_count, alarms_per_note",
+        [
+            (3, 2),
+            (2, 0),
+            (0, 0)
+        ]
+    )
+    async def test_delete_theme_with_children(self, memory_db, notes_count, alarms_per_note):
+        theme_id, alarms_ids = await write_theme_tree(memory_db, notes_count, alarms_per_note)
+        other_theme_id, other_alarms_ids = await write_theme_tree(memory_db, 1, 1)
+
+        result = await delete_theme_from_db(theme_id, memory_db)
+
+        assert result.dict() == {"deleted_count": 1, "deleted_notes_count": notes_count,
+                                 "deleted_alarms_count": notes_count * alarms_per_note}
+        for alarm_id in alarms_ids:
+            with pytest.raises(DBNotFound):
+                await memory_db.get_alarm_by_id(alarm_id)
+        assert await memory_db.get_notes_ids_by_condition({"links.theme_id": theme_id}) == []
+        assert len(await memory_db.get_notes_ids_by_condition({"links.theme_id": other_theme_id})) == 1
+        await memory_db.get_alarm_by_id(other_alarms_ids[0])
+        for alarm_id in [*alarms_ids, *other_alarms_ids]:
+            alarm_timer.cancel(alarm_id)
+
+    async def test_delete_not_existing_theme(self, memory_db):
+        with pytest.raises(DBNotFound):
+            await delete_theme_from_db("11aa204076aa1111a1111a1a", memory_db)
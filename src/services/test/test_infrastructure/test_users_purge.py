@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmRouterModel, AlarmLinksModel
+from src.core.models.NoteModel import NoteRouterModel, NoteLinksModel, NoteDataModel
+from src.core.models.ThemeModel import ThemeModelWrite, ThemesLinksModel
+from src.core.models.UserModel import UserModel
+from src.infrastructure.alarms.db_interaction import write_alarm_to_db
+from src.infrastructure.notes.db_interaction import write_note_to_db
+from src.infrastructure.users import db_interaction
+from src.infrastructure.users.db_interaction import purge_user_from_db, purge_orphans_from_db
+from src.services.database.database_exceptions import DBNotFound
+from src.services.jobs.alarm_timer import alarm_timer
+
+USER_ID = "555000003"
+OTHER_USER_ID = "555000004"
+
+
+async def write_user_data(db, user_id: str, themes_count: int) -> None:
+    """Every theme gets 2 notes, every note gets 1 alarm"""
+    for _ in range(themes_count):
+        theme_id = await db.write_new_theme(ThemeModelWrite(name="theme", links=ThemesLinksModel(user_id=user_id)))
+        for _ in range(2):
+            note_id = await write_note_to_db(NoteRouterModel(
+                name="note", links=NoteLinksModel(user_id=user_id, theme_id=theme_id),
+                data=NoteDataModel(text="text", check_points=[])
+            ), db)
+            alarm_id = await write_alarm_to_db(AlarmRouterModel(
+                name="alarm", is_repeatable=False, links=AlarmLinksModel(user_id=user_id, parent_id=note_id)
+            ), db, datetime(2030, 1, 1), None)
+            alarm_timer.cancel(alarm_id)
+
+
+async def write_user(db, user_id: str) -> None:
+    await db.write_new_user(UserModel(telegram_id=user_id, user_name="PurgeUser", timezone=0, lang_code="en"))
+
+
+class TestUsersPurge:
+
+    @pytest.mark.parametrize(
+        "batch_size, themes_count",
+        [
+            (2, 3),
+            (1000, 3),
+            (2, 0)
+        ]
+    )
+    async def test_purge_user(self, memory_db, monkeypatch, batch_size, themes_count):
+        monkeypatch.setattr(db_interaction, "PURGE_BATCH_SIZE", batch_size)
+        await write_user(memory_db, USER_ID)
+        await write_user_data(memory_db, USER_ID, themes_count)
+        await write_user(memory_db, OTHER_USER_ID)
+        await write_user_data(memory_db, OTHER_USER_ID, 1)
+
+        progress = await purge_user_from_db(USER_ID, memory_db)
+
+        assert progress == {"alarms": themes_count * 2, "notes": themes_count * 2, "themes": themes_count, "user": 1}
+        with pytest.raises(DBNotFound):
+            await memory_db.get_user_by_id(USER_ID)
+        assert await memory_db.get_themes_ids_by_condition({"links.user_id": USER_ID}) == []
+        assert await memory_db.get_linked_user_ids(None, 10) == [OTHER_USER_ID]
+        assert len(await memory_db.get_notes_ids_by_condition({"links.user_id": OTHER_USER_ID})) == 2
+
+    async def test_purge_not_existing_user(self, memory_db):
+        assert await purge_user_from_db(USER_ID, memory_db) == {"alarms": 0, "notes": 0, "themes": 0, "user": 0}
+
+    async def test_linked_user_ids_pages(self, memory_db):
+        user_ids = [str(user_id) for user_id in range(555000010, 555000015)]
+        for user_id in user_ids:
+            await write_user_data(memory_db, user_id, 1)
+        assert await memory_db.get_linked_user_ids(None, 2) == user_ids[:2]
+        assert await memory_db.get_linked_user_ids(user_ids[1], 2) == user_ids[2:4]
+        assert await memory_db.get_linked_user_ids(user_ids[3], 2) == user_ids[4:]
+        assert await memory_db.get_linked_user_ids(user_ids[4], 2) == []
+
+    @pytest.mark.parametrize("batch_size", [1, 1000])
+    async def test_purge_orphans(self, memory_db, monkeypatch, batch_size):
+        monkeypatch.setattr(db_interaction, "PURGE_BATCH_SIZE", batch_size)
+        await write_user_data(memory_db, USER_ID, 2)
+        await write_user(memory_db, OTHER_USER_ID)
+        await write_user_data(memory_db, OTHER_USER_ID, 1)
+
+        progress = await purge_orphans_from_db(memory_db)
+
+        assert progress == {"orphan_users": 1, "alarms": 4, "notes": 4, "themes": 2}
+        assert await memory_db.get_linked_user_ids(None, 10) == [OTHER_USER_ID]
+        await memory_db.get_user_by_id(OTHER_USER_ID)
+
+    async def test_purge_orphans_keeps_recreated_user(self, memory_db, monkeypatch):
+        await write_user_data(memory_db, USER_ID, 1)
+        get_users_by_ids = memory_db.get_users_by_ids
+
+        async def recreate_user_after_check(user_ids: list[str]) -> list[UserModel]:
+            users = await get_users_by_ids(user_ids)
+            await write_user(memory_db, USER_ID)
+            return users
+
+        monkeypatch.setattr(memory_db, "get_users_by_ids", recreate_user_after_check)
+        await purge_orphans_from_db(memory_db)
+        await memory_db.get_user_by_id(USER_ID)
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmStatuses
+from src.infrastructure.alarms import db_interaction
+from src.services.jobs import alarm_timer as alarm_timer_module
+from src.services.jobs.alarm_timer import AlarmTimer
+from src.services.test.data import AlarmJobsTestData as Data
+
+
+def make_timer() -> AlarmTimer:
+    return AlarmTimer(horizon=timedelta(minutes=10))
+
+
+async def write_alarm(db, next_notion_time: datetime) -> str:
+    """Alarm of user with timezone 3, so due_at_utc is next_notion_time - 3 hours"""
+    return await db_interaction.write_alarm_to_db(Data.alarm, db, next_notion_time, repeat_interval=60)
+
+
+class TestAlarmTimer:
+
+    def test_pop_due_in_due_time_order(self):
+        timer = make_timer()
+        now = datetime.utcnow()
+        timer.schedule("c", now - timedelta(seconds=1))
+        timer.schedule("a", now - timedelta(seconds=3))
+        timer.schedule("b", now - timedelta(seconds=2))
+        timer.schedule("later", now + timedelta(minutes=1))
+        assert timer._pop_due() == ["a", "b", "c"]
+        assert len(timer) == 1
+
+    @pytest.mark.parametrize(
+        "due_at_utc_delta, held",
+        [
+            (timedelta(minutes=5), True),
+            (timedelta(minutes=11), False),
+            (None, False)
+        ]
+    )
+    def test_horizon(self, due_at_utc_delta, held):
+        timer = make_timer()
+        timer.schedule("a", None if due_at_utc_delta is None else datetime.utcnow() + due_at_utc_delta)
+        assert (len(timer) == 1) == held
+
+    def test_schedule_beyond_horizon_drops_held_alarm(self):
+        timer = make_timer()
+        timer.schedule("a", datetime.utcnow() - timedelta(seconds=1))
+        timer.schedule("a", datetime.utcnow() + timedelta(hours=1))
+        assert len(timer) == 0
+        assert timer._pop_due() == []
+
+    async def test_standby_ignores_alarms_till_start(self):
+        timer = make_timer()
+        timer.schedule("a", datetime.utcnow() + timedelta(minutes=1))
+        await timer.standby()
+        assert len(timer) == 0
+        timer.schedule("b", datetime.utcnow() + timedelta(minutes=1))
+        assert len(timer) == 0
+        timer.start()
+        timer.schedule("b", datetime.utcnow() + timedelta(minutes=1))
+        await timer.stop()
+        assert len(timer) == 1
+
+    @pytest.mark.parametrize("partition, scheduled", [(1, True), (2, False), (None, True)])
+    async def test_schedule_only_owned_partitions(self, partition, scheduled):
+        timer = make_timer()
+        timer.start([0, 1])
+        timer.schedule("a", datetime.utcnow() + timedelta(minutes=1), partition)
+        await timer.stop()
+        assert len(timer) == int(scheduled)
+
+    def test_lazy_cancel(self):
+        timer = make_timer()
+        timer.schedule("a", datetime.utcnow() - timedelta(seconds=1))
+        timer.cancel("a")
+        assert len(timer._heap) == 1
+        assert timer._pop_due() == []
+        assert timer._seconds_to_next() is None
+
+    def test_reschedule_ignores_stale_entry(self):
+        timer = make_timer()
+        timer.schedule("a", datetime.utcnow() - timedelta(seconds=1))
+        timer.schedule("a", datetime.utcnow() + timedelta(minutes=1))
+        assert timer._pop_due() == []
+        assert 0 < timer._seconds_to_next() <= 60
+
+    def test_compact(self):
+        timer = make_timer()
+        due_at_utc = datetime.utcnow() + timedelta(minutes=1)
+        for number in range(10):
+            timer.schedule(str(number), due_at_utc)
+        for number in range(5):
+            timer.cancel(str(number))
+        timer._compact()
+        assert sorted(alarm_id for _, alarm_id in timer._heap) == ["5", "6", "7", "8", "9"]
+
+    def test_heap_is_bounded_by_auto_compaction(self):
+        timer = make_timer()
+        for number in range(1000):
+            timer.schedule("a", datetime.utcnow() + timedelta(seconds=number % 100))
+        assert len(timer) == 1
+        assert len(timer._heap) <= 2 + 64
+
+    async def test_reload_takes_queued_alarms_within_horizon(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        soon_id = await write_alarm(memory_db, datetime.now() + timedelta(hours=3, minutes=1))
+        await write_alarm(memory_db, datetime.now() + timedelta(hours=3, minutes=30))
+        timer = make_timer()
+        await timer.reload(memory_db)
+        assert list(timer._due_times) == [soon_id]
+
+    async def test_run_promotes_due_alarm(self, memory_db, monkeypatch):
+        monkeypatch.setattr(alarm_timer_module, "get_db", lambda: memory_db)
+        await memory_db.write_new_user(Data.user)
+        alarm_id = await write_alarm(memory_db, datetime.now() + timedelta(hours=3, seconds=-1))
+        timer = make_timer()
+        await timer.reload(memory_db)
+        timer.start()
+        try:
+            for _ in range(50):
+                if (await memory_db.get_alarm_by_id(alarm_id)).status == AlarmStatuses.READY:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await timer.stop()
+        assert (await memory_db.get_alarm_by_id(alarm_id)).status == AlarmStatuses.READY
+        assert len(timer) == 0
+
+    async def test_alarm_returned_to_queue_is_rescheduled(self, memory_db):
+        await memory_db.write_new_user(Data.user)
+        alarm_id = await write_alarm(memory_db, datetime.now() + timedelta(hours=3, minutes=1))
+        timer = alarm_timer_module.alarm_timer
+        try:
+            await db_interaction.update_alarm(alarm_id, {"status": AlarmStatuses.READY.value}, memory_db)
+            assert alarm_id not in timer._due_times
+            await db_interaction.update_alarm(alarm_id, {"status": AlarmStatuses.QUEUE.value}, memory_db)
+            assert timer._due_times[alarm_id] == (await memory_db.get_alarm_by_id(alarm_id)).times.due_at_utc
+        finally:
+            timer.cancel(alarm_id)
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.services.jobs import scheduler as scheduler_module
+from src.services.jobs.alarm_timer import AlarmTimer
+from src.services.jobs.scheduler import JobsRunner
+
+
+@pytest.fixture
+def timer(monkeypatch) -> AlarmTimer:
+    timer = AlarmTimer(horizon=timedelta(minutes=10))
+    monkeypatch.setattr(scheduler_module, "alarm_timer", timer)
+    return timer
+
+
+class TestJobsRunner:
+
+    @pytest.mark.parametrize("partitioned, reconciled", [(False, (None,)), (True, None)])
+    async def test_leader_jobs(self, timer, partitioned, reconciled):
+        runner = JobsRunner(partitioned)
+        runner.start()
+        await timer.standby()
+        await runner.start_leader_jobs()
+
+        assert runner.scheduler.get_job("check_expired_leases") is not None
+        reconcile = runner.scheduler.get_job("reconcile_alarm_timer")
+        assert (reconcile and reconcile.args) == reconciled
+        # Timer of partitioned worker is started only by its partitions
+        timer.schedule("a", datetime.utcnow() + timedelta(minutes=1))
+        assert len(timer) == int(not partitioned)
+
+        await runner.stop_leader_jobs()
+        assert runner.scheduler.get_jobs() == []
+        assert len(timer) == 0
+        runner.shutdown()
+        await timer.stop()
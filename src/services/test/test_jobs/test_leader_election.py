@@ -0,0 +1,88 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from src.services.jobs import leader_election as leader_election_module
+from src.services.jobs.leader_election import LeaderElection
+from src.services.test.data import FailingDB
+from src.utils.depends import get_db
+
+
+class Callbacks:
+
+    def __init__(self) -> None:
+        self.elected = 0
+        self.demoted = 0
+
+    async def on_elected(self) -> None:
+        self.elected += 1
+
+    async def on_demoted(self) -> None:
+        self.demoted += 1
+
+
+def make_election(name: str, callbacks: Callbacks, lease_seconds: float = 10) -> LeaderElection:
+    return LeaderElection(name, lease_seconds=lease_seconds, renew_seconds=lease_seconds / 2,
+                          on_elected=callbacks.on_elected, on_demoted=callbacks.on_demoted)
+
+
+class TestLeaderElection:
+
+    async def test_lock(self):
+        """Configured db backend"""
+        db, name = get_db(), uuid4().hex
+        assert await db.acquire_lock(name, "a", 10)
+        assert await db.acquire_lock(name, "a", 10)
+        assert not await db.acquire_lock(name, "b", 10)
+        await db.release_lock(name, "b")
+        assert not await db.acquire_lock(name, "b", 10)
+        await db.release_lock(name, "a")
+        assert await db.acquire_lock(name, "b", 10)
+
+    async def test_expired_lock_is_taken(self, memory_db):
+        name = uuid4().hex
+        assert await memory_db.acquire_lock(name, "a", 0.01)
+        await asyncio.sleep(0.02)
+        assert await memory_db.acquire_lock(name, "b", 10)
+        assert not await memory_db.acquire_lock(name, "a", 10)
+
+    async def test_only_one_leader(self, memory_db):
+        name = uuid4().hex
+        callbacks = [Callbacks() for _ in range(3)]
+        elections = [make_election(name, worker_callbacks) for worker_callbacks in callbacks]
+        for _ in range(2):
+            for election in elections:
+                await election.step(memory_db)
+        assert [election.is_leader for election in elections] == [True, False, False]
+        assert [worker_callbacks.elected for worker_callbacks in callbacks] == [1, 0, 0]
+
+    async def test_failover(self, memory_db, monkeypatch):
+        monkeypatch.setattr(leader_election_module, "get_db", lambda: memory_db)
+        name = uuid4().hex
+        leader_callbacks, follower_callbacks = Callbacks(), Callbacks()
+        leader, follower = make_election(name, leader_callbacks), make_election(name, follower_callbacks)
+        await leader.step(memory_db)
+        await follower.step(memory_db)
+
+        await leader.stop()
+        await follower.step(memory_db)
+
+        assert (leader.is_leader, follower.is_leader) == (False, True)
+        assert (leader_callbacks.demoted, follower_callbacks.elected) == (1, 1)
+
+    @pytest.mark.parametrize("lease_seconds, is_leader", [(10, True), (0.02, False)])
+    async def test_leader_keeps_lease_while_db_fails(self, memory_db, lease_seconds, is_leader):
+        callbacks = Callbacks()
+        election = make_election(uuid4().hex, callbacks, lease_seconds)
+        await election.step(memory_db)
+        await asyncio.sleep(0.02)
+        await election.step(FailingDB())
+        assert election.is_leader == is_leader
+        assert callbacks.demoted == int(not is_leader)
+
+    async def test_lease_must_outlast_renew_interval(self):
+        callbacks = Callbacks()
+        with pytest.raises(ValueError):
+            LeaderElection("jobs", lease_seconds=5, renew_seconds=5,
+                           on_elected=callbacks.on_elected, on_demoted=callbacks.on_demoted)
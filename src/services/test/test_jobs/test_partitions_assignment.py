@@ -0,0 +1,67 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from src.services.jobs import partitions_assignment as partitions_assignment_module
+from src.services.jobs.partitions_assignment import PartitionsAssignment
+from src.services.test.data import FailingDB
+
+
+def make_assignment(name: str, lease_seconds: float = 10) -> PartitionsAssignment:
+    async def on_change(partitions: list[int]) -> None:
+        assignment.changes.append(partitions)
+
+    assignment = PartitionsAssignment(name, partitions_count=8, lease_seconds=lease_seconds,
+                                      renew_seconds=lease_seconds / 2, on_change=on_change)
+    assignment.changes = []
+    return assignment
+
+
+async def step_all(assignments: list[PartitionsAssignment], db, rounds: int = 2) -> None:
+    for _ in range(rounds):
+        for assignment in assignments:
+            await assignment.step(db)
+
+
+class TestPartitionsAssignment:
+
+    @pytest.mark.parametrize("members_count", [1, 3, 8, 10])
+    def test_target_partitions_cover_all_once(self, members_count):
+        assignments = [make_assignment("jobs") for _ in range(members_count)]
+        members = [assignment.owner for assignment in assignments]
+        targets = [assignment.target_partitions(members) for assignment in assignments]
+        assert sorted(partition for target in targets for partition in target) == list(range(8))
+        assert max(map(len, targets)) - min(map(len, targets)) <= 1
+
+    async def test_rebalance_on_join_and_leave(self, memory_db, monkeypatch):
+        monkeypatch.setattr(partitions_assignment_module, "get_db", lambda: memory_db)
+        name = uuid4().hex
+        first, second = make_assignment(name), make_assignment(name)
+        await first.step(memory_db)
+        assert first.partitions == list(range(8))
+
+        await step_all([second, first], memory_db)
+        assert sorted(first.partitions + second.partitions) == list(range(8))
+        assert len(first.partitions) == len(second.partitions) == 4
+
+        await first.stop()
+        await second.step(memory_db)
+        assert (first.partitions, second.partitions) == ([], list(range(8)))
+        assert first.changes[-1] == []
+
+    async def test_partition_is_not_owned_twice(self, memory_db):
+        name = uuid4().hex
+        first, second = make_assignment(name), make_assignment(name)
+        await first.step(memory_db)
+        await second.step(memory_db)
+        # First worker has not given up partitions of second one yet
+        assert second.partitions == []
+
+    @pytest.mark.parametrize("lease_seconds, keeps_partitions", [(10, True), (0.02, False)])
+    async def test_partitions_kept_while_db_fails(self, memory_db, lease_seconds, keeps_partitions):
+        assignment = make_assignment(uuid4().hex, lease_seconds)
+        await assignment.step(memory_db)
+        await asyncio.sleep(0.02)
+        await assignment.step(FailingDB())
+        assert (assignment.partitions == list(range(8))) == keeps_partitions
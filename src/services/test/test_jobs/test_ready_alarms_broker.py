@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from src.core.models.AlarmModel import AlarmStatuses
+from src.services.jobs.ready_alarms_broker import ReadyAlarmsBroker
+from src.utils.streaming import SSE_HEARTBEAT
+
+
+def make_broker(queue_size: int = 100, heartbeat_seconds: float = 10) -> ReadyAlarmsBroker:
+    return ReadyAlarmsBroker(history_size=3, queue_size=queue_size, heartbeat_seconds=heartbeat_seconds)
+
+
+def parse_event(event: str) -> tuple[str, str]:
+    """:return event id and alarm id"""
+    fields = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    assert fields["event"] == "alarm"
+    return fields["id"], json.loads(fields["data"])["_id"]
+
+
+class TestReadyAlarmsBroker:
+
+    async def test_stream_starts_with_ready_alarms(self, memory_db, ready_alarm):
+        broker = make_broker()
+        alarm_id = await ready_alarm()
+        await ready_alarm(AlarmStatuses.FINISH)
+        stream = broker.stream(None, memory_db)
+        assert parse_event(await anext(stream)) == (broker.event_id(0), alarm_id)
+        await stream.aclose()
+
+    async def test_stream_gets_published_alarms(self, memory_db, ready_alarm):
+        broker = make_broker()
+        stream = broker.stream(None, memory_db)
+        next_event = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0.01)
+        alarm_id = await ready_alarm()
+        finished_alarm_id = await ready_alarm(AlarmStatuses.FINISH)
+
+        await broker.publish([finished_alarm_id, alarm_id], memory_db)
+
+        assert parse_event(await asyncio.wait_for(next_event, 1)) == (broker.event_id(1), alarm_id)
+        await stream.aclose()
+
+    async def test_heartbeat(self, memory_db):
+        stream = make_broker(heartbeat_seconds=0.01).stream(None, memory_db)
+        assert await asyncio.wait_for(anext(stream), 1) == SSE_HEARTBEAT
+        await stream.aclose()
+
+    @pytest.mark.parametrize(
+        "last_seq, resumed, missed_seqs",
+        [
+            (4, True, [5]),
+            (2, True, [3, 4, 5]),
+            (5, True, []),
+            (1, False, []),
+            (None, False, [])
+        ]
+    )
+    async def test_resume_from_last_event_id(self, memory_db, ready_alarm, last_seq, resumed, missed_seqs):
+        broker = make_broker()
+        for _ in range(5):
+            await broker.publish([await ready_alarm()], memory_db)
+
+        subscription, is_resumed = broker.subscribe(None if last_seq is None else broker.event_id(last_seq))
+
+        assert is_resumed == resumed
+        assert [subscription.queue.get_nowait()[0] for _ in range(subscription.queue.qsize())] == missed_seqs
+
+    async def test_resume_after_restart(self, memory_db, ready_alarm):
+        await make_broker().publish([await ready_alarm()], memory_db)
+        _, is_resumed = make_broker().subscribe(make_broker().event_id(1))
+        assert not is_resumed
+
+    async def test_slow_subscription_overflow(self, memory_db, ready_alarm):
+        broker = make_broker(queue_size=1)
+        subscription, _ = broker.subscribe(None)
+        await broker.publish([await ready_alarm(), await ready_alarm()], memory_db)
+        assert subscription.overflowed
@@ -7,6 +7,7 @@ from src.utils import config
 
 class Test01Auth:
 
+    @pytest.mark.skipif(config.DB_BACKEND != "mongo", reason="auth storage needs Mongo")
     async def test_login_user(self, ac: AsyncClient):
         body = {
             "username": config.TEST_BACKEND_USER_USERNAME,
@@ -18,4 +19,15 @@ class Test01Auth:
         )
         assert r.status_code == status.HTTP_200_OK
         assert r.json()["token_type"] == "bearer"
-        pytest.auth.token = r.json()["access_token"]
\ No newline at end of file
+        pytest.auth.token = r.json()["access_token"]
+        pytest.auth.refresh_token = r.json()["refresh_token"]
+
+    @pytest.mark.skipif(config.DB_BACKEND != "mongo", reason="auth storage needs Mongo")
+    async def test_refresh_token(self, ac: AsyncClient):
+        r = await ac.post("auth/jwt/refresh", json={"refresh_token": pytest.auth.refresh_token})
+        assert r.status_code == status.HTTP_200_OK
+        pytest.auth.token = r.json()["access_token"]
+        pytest.auth.refresh_token = r.json()["refresh_token"]
+
+        r = await ac.post("auth/jwt/refresh", json={"refresh_token": "not a token"})
+        assert r.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
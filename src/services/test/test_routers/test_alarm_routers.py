@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from httpx import AsyncClient
 from starlette import status
@@ -69,6 +71,39 @@ class TestAlarmRouters:
         })
         assert r.status_code == code
 
+    @pytest.mark.parametrize(
+        "code, params",
+        [
+            (status.HTTP_200_OK, {"limit": 1}),
+            (status.HTTP_400_BAD_REQUEST, {"limit": 1, "after": "1"}),
+            (status.HTTP_422_UNPROCESSABLE_ENTITY, {"limit": 0})
+        ]
+    )
+    async def test_get_all_user_alarms_page(self, ac: AsyncClient, code, params):
+        r = await ac.get(f"alarms/get_all_user_alarms/{Data.user_id}", params=params, headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == code
+        if code == status.HTTP_200_OK:
+            assert len(r.json()) == 1
+
+    @pytest.mark.parametrize(
+        "code, user_id",
+        [
+            (status.HTTP_200_OK, Data.user_id),
+            (status.HTTP_404_NOT_FOUND, Data.non_exist_id)
+        ]
+    )
+    async def test_stream_all_user_alarms(self, ac: AsyncClient, code, user_id):
+        r = await ac.get(f"alarms/get_all_user_alarms/{user_id}", headers={
+            "Authorization": f"bearer {pytest.auth.token}",
+            "Accept": "application/x-ndjson"
+        })
+        assert r.status_code == code
+        if code == status.HTTP_200_OK:
+            assert r.headers["content-type"] == "application/x-ndjson"
+            assert all(json.loads(line)["links"]["user_id"] == user_id for line in r.text.splitlines())
+
     @pytest.mark.parametrize(
         "code, alarm_id",
         [
@@ -120,12 +155,58 @@ class TestAlarmRouters:
         })
         assert r.status_code == code
 
+    async def test_claim_and_nack_alarm(self, ac: AsyncClient):
+        r = await ac.post("alarms/claim_ready_alarms?consumer_id=test_consumer&limit=1000", headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == status.HTTP_200_OK
+        claimed = {alarm["_id"]: alarm for alarm in r.json()}
+        assert claimed[pytest.alarm_cash.alarm_id]["status"] == AlarmStatuses.IN_FLIGHT.value
+        assert claimed[pytest.alarm_cash.alarm_id]["lease"]["consumer_id"] == "test_consumer"
+
+        r = await ac.post("alarms/nack_alarms", json={"consumer_id": "test_consumer", "alarm_ids": list(claimed)},
+                          headers={"Authorization": f"bearer {pytest.auth.token}"})
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json() == {"update_count": len(claimed)}
+
+    @pytest.mark.parametrize(
+        "code, alarm_ids",
+        [
+            (status.HTTP_200_OK, [Data.non_exist_id]),
+            (status.HTTP_400_BAD_REQUEST, ["1"])
+        ]
+    )
+    async def test_ack_alarms(self, ac: AsyncClient, code, alarm_ids):
+        r = await ac.post("alarms/ack_alarms", json={"consumer_id": "test_consumer", "alarm_ids": alarm_ids},
+                          headers={"Authorization": f"bearer {pytest.auth.token}"})
+        assert r.status_code == code
+        if code == status.HTTP_200_OK:
+            assert r.json() == {"update_count": 0}
+
+    async def test_wait_ready_alarms(self, ac: AsyncClient):
+        r = await ac.get("alarms/wait_ready_alarms?timeout=1", headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == status.HTTP_200_OK
+        assert pytest.alarm_cash.alarm_id in [alarm["_id"] for alarm in r.json()]
+
+    @pytest.mark.parametrize(
+        "timeout",
+        [-1, 10 ** 6]
+    )
+    async def test_wait_ready_alarms_bad_timeout(self, ac: AsyncClient, timeout):
+        r = await ac.get(f"alarms/wait_ready_alarms?timeout={timeout}", headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     @pytest.mark.parametrize(
         "code, alarm_id, new_status",
         [
             (status.HTTP_200_OK, None, AlarmStatuses.FINISH.value),
             (status.HTTP_404_NOT_FOUND, Data.non_exist_id, AlarmStatuses.FINISH.value),
-            (status.HTTP_400_BAD_REQUEST, 1, AlarmStatuses.FINISH.value)
+            (status.HTTP_400_BAD_REQUEST, 1, AlarmStatuses.FINISH.value),
+            (status.HTTP_400_BAD_REQUEST, Data.non_exist_id, AlarmStatuses.IN_FLIGHT.value)
         ]
     )
     async def test_update_alarm_status(self, ac: AsyncClient, code, alarm_id, new_status):
@@ -166,6 +247,48 @@ class TestAlarmRouters:
         })
         assert r.status_code == code
 
+    @pytest.mark.parametrize(
+        "code, body, errors",
+        [
+            (status.HTTP_200_OK, [{"alarm_id": Data.non_exist_id, "action": "FINISH"},
+                                  {"alarm_id": "1", "action": "POSTPONE"}], ["Alarm not found", "Alarm not found"]),
+            (status.HTTP_422_UNPROCESSABLE_ENTITY, [{"alarm_id": Data.non_exist_id, "action": "DELETE"}], None),
+            (status.HTTP_422_UNPROCESSABLE_ENTITY, [], None)
+        ]
+    )
+    async def test_apply_alarms_actions(self, ac: AsyncClient, code, body, errors):
+        r = await ac.post("alarms/apply_alarms_actions", json=body, headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == code
+        if errors is not None:
+            assert [result["error"] for result in r.json()] == errors
+
+    async def test_create_alarms(self, ac: AsyncClient):
+        alarm = {**Data.test_alarm_model_to_write.dict(), "next_notion_time": "2030-10-29T14:16:11", "repeat_interval": 600}
+        bad_parent_alarm = {**alarm, "links": {"user_id": Data.user_id, "parent_id": "1"}}
+        r = await ac.post("alarms/create_alarms", json=[alarm, Data.stub_body, bad_parent_alarm, alarm], headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == status.HTTP_200_OK
+        results = r.json()
+        assert [result["error"] is None for result in results] == [True, False, False, True]
+        assert results[2]["error"].startswith("links.parent_id")
+        r = await ac.get(f"alarms/get_alarm/{results[3]['alarm_id']}", headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.json()["times"]["repeat_interval"] == 600
+
+    @pytest.mark.parametrize(
+        "body",
+        [[], [{}] * 1001]
+    )
+    async def test_create_alarms_bad_batch_size(self, ac: AsyncClient, body):
+        r = await ac.post("alarms/create_alarms", json=body, headers={
+            "Authorization": f"bearer {pytest.auth.token}"
+        })
+        assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     @pytest.mark.parametrize(
         "code, user_id",
         [
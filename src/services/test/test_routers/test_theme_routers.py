@@ -114,7 +114,7 @@ class TestThemeRouters:
             (
                     status.HTTP_200_OK,
                     None,
-                    {"deleted_count": 1}
+                    {"deleted_count": 1, "deleted_notes_count": 0, "deleted_alarms_count": 0}
             ),
             (
                     status.HTTP_404_NOT_FOUND,
@@ -2,6 +2,7 @@ import pytest
 from httpx import AsyncClient
 from starlette import status
 
+from src.services.jobs.background_tasks import background_tasks
 from src.services.test.data import UserTestData as Data
 
 
@@ -80,6 +81,29 @@ class TestUserRouters:
             })
         assert r.status_code == code
 
+    async def test_get_user_after_update(self, ac: AsyncClient):
+        r = await ac.get(
+            f"/users/get_user/{Data.test_user_1.telegram_id}",
+            headers={
+                "Authorization": f"bearer {pytest.auth.token}"
+            })
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["user_name"] == "NewTestName1"
+
+    async def test_cache_stats(self, ac: AsyncClient):
+        await ac.get(
+            f"/users/get_user/{Data.test_user_1.telegram_id}",
+            headers={
+                "Authorization": f"bearer {pytest.auth.token}"
+            })
+        r = await ac.get(
+            "/users/cache_stats",
+            headers={
+                "Authorization": f"bearer {pytest.auth.token}"
+            })
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["hits"] >= 1
+
     @pytest.mark.parametrize(
         "code, user_id, res_body",
         [
@@ -103,3 +127,29 @@ class TestUserRouters:
             })
         assert r.status_code == code
         assert r.json() == res_body
+
+    async def test_purge_user(self, ac: AsyncClient):
+        r = await ac.delete(
+            f"users/purge_user/{Data.non_exist_id}",
+            headers={
+                "Authorization": f"bearer {pytest.auth.token}"
+            })
+        assert r.status_code == status.HTTP_202_ACCEPTED
+        await background_tasks.wait(r.json()["task_id"])
+        r = await ac.get(
+            f"users/purge_user_status/{r.json()['task_id']}",
+            headers={
+                "Authorization": f"bearer {pytest.auth.token}"
+            })
+        assert r.status_code == status.HTTP_200_OK
+        assert r.json()["status"] == "DONE"
+        assert r.json()["progress"] == {"alarms": 0, "notes": 0, "themes": 0, "user": 0}
+
+    async def test_purge_user_status_not_found(self, ac: AsyncClient):
+        r = await ac.get(
+            f"users/purge_user_status/{Data.non_exist_id}",
+            headers={
+                "Authorization": f"bearer {pytest.auth.token}"
+            })
+        assert r.status_code == status.HTTP_404_NOT_FOUND
+        assert r.json() == {'detail': 'Task not found'}
@@ -0,0 +1,77 @@
+import pytest
+
+from src.utils import cache as cache_module
+from src.utils.cache import TTLCache
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+class TestTTLCache:
+
+    def test_entry_expires_after_ttl(self, clock):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.set("a", 1)
+        clock.now += 59
+        assert cache.get("a") == 1
+        clock.now += 2
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 1, "misses": 1}
+
+    @pytest.mark.parametrize(
+        "ttl_seconds, alive_seconds",
+        [
+            (10, 10),
+            # Entry ttl can only shorten cache ttl
+            (120, 60),
+            (None, 60)
+        ]
+    )
+    def test_entry_ttl_is_capped(self, clock, ttl_seconds, alive_seconds):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.set("a", 1, ttl_seconds)
+        clock.now += alive_seconds
+        assert cache.get("a") == 1
+        clock.now += 1
+        assert cache.get("a") is None
+
+    def test_least_recently_used_is_evicted(self, clock):
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    def test_set_refreshes_ttl(self, clock):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.set("a", 1)
+        clock.now += 50
+        cache.set("a", 2)
+        clock.now += 50
+        assert cache.get("a") == 2
+
+    def test_invalidate(self, clock):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        for key, value in (("a", 1), ("b", 2), ("c", 3)):
+            cache.set(key, value)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        assert cache.invalidate_values(lambda value: value > 2) == 1
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, 2, None)
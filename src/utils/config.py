@@ -5,11 +5,66 @@ from dotenv import load_dotenv
 load_dotenv()
 
 APP_HOST: str = os.getenv("APP_HOST")
-APP_PORT: int = int(os.getenv("APP_PORT"))
+APP_PORT: int = int(os.getenv("APP_PORT", 8000))
 
+# "mongo", "sqlite" or "memory", in-memory db keeps no data between restarts and is meant for tests and benchmarks
+DB_BACKEND: str = os.getenv("DB_BACKEND", "mongo")
+# Database file of sqlite backend, ":memory:" for db living while process runs
+SQLITE_PATH: str = os.getenv("SQLITE_PATH", "alarm_bot.sqlite3")
 DB_USER_PASSWORD: str = os.getenv("DB_USER_PASSWORD")
 
 JWT_SECRET: str = os.getenv("JWT_SECRET")
 VERIFICATION_TOKEN_SECRET: str = os.getenv("VERIFICATION_TOKEN_SECRET")
 TEST_BACKEND_USER_USERNAME: str = os.getenv('TEST_BACKEND_USER_USERNAME')
 TEST_BACKEND_USER_PASSWORD: str = os.getenv("TEST_BACKEND_USER_PASSWORD")
+
+# How often alarm timer is reconciled with db, timer holds alarms due within two intervals
+ALARM_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("ALARM_SWEEP_INTERVAL_SECONDS", 300))
+
+# Claimed alarm returns to READY if consumer does not ack it in lease time, expired leases are checked by interval
+ALARM_LEASE_SECONDS: int = int(os.getenv("ALARM_LEASE_SECONDS", 60))
+ALARM_LEASE_CHECK_INTERVAL_SECONDS: int = int(os.getenv("ALARM_LEASE_CHECK_INTERVAL_SECONDS", 30))
+
+# Most alarms in one batch request
+ALARMS_BATCH_MAX_SIZE: int = int(os.getenv("ALARMS_BATCH_MAX_SIZE", 1000))
+
+# Longest wait of long-poll request for ready alarms, keep below proxy read timeout
+LONG_POLL_MAX_SECONDS: int = int(os.getenv("LONG_POLL_MAX_SECONDS", 60))
+
+# Push channel of ready alarms: events kept for resume by Last-Event-ID, events queued per connection
+# before slow connection is closed, seconds between heartbeats of idle connection
+SSE_HISTORY_SIZE: int = int(os.getenv("SSE_HISTORY_SIZE", 10000))
+SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", 1000))
+SSE_HEARTBEAT_SECONDS: int = int(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+# Read-through cache of telegram users
+USERS_CACHE_SIZE: int = int(os.getenv("USERS_CACHE_SIZE", 10000))
+USERS_CACHE_TTL_SECONDS: int = int(os.getenv("USERS_CACHE_TTL_SECONDS", 300))
+
+# Verified jwt tokens of backend users, entry lives till token expiry but not longer than ttl,
+# so user deactivated directly in db loses access in ttl
+AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+
+# Refresh token is exchanged for new access and refresh tokens without password check, every refresh
+# token is single use, session lives while it is refreshed within lifetime
+REFRESH_TOKEN_LIFETIME_SECONDS: int = int(os.getenv("REFRESH_TOKEN_LIFETIME_SECONDS", 30 * 24 * 3600))
+
+# Connection pool of the one Mongo client of worker process, every worker keeps own pool, so total connections
+# to cluster are up to workers * MONGO_MAX_POOL_SIZE. Request waits free connection for MONGO_WAIT_QUEUE_TIMEOUT_MS
+MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 20000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000))
+
+# Scheduled jobs are shared by workers of all processes and containers through lock leases in db: alarm partitions
+# can be spread over workers, jobs over all alarms run in one leader worker. Worker renews its leases every
+# LEADER_RENEW_SECONDS, leases of dead worker are taken over after expiry
+LEADER_LEASE_SECONDS: int = int(os.getenv("LEADER_LEASE_SECONDS", 15))
+LEADER_RENEW_SECONDS: int = int(os.getenv("LEADER_RENEW_SECONDS", 5))
+# Alarm partitions are spread over workers only if "true", otherwise leader worker runs alarm timer of all alarms.
+# Long-poll and push channel are notified only in worker process, that moved alarm to READY, and purge status
+# is kept in worker process, so they need one worker (WORKERS=1) either way
+ALARM_PARTITIONED_JOBS: bool = os.getenv("ALARM_PARTITIONED_JOBS", "false").lower() == "true"
@@ -1,6 +1,6 @@
+from src.services.database.controller import get_db_class
 from src.services.database.interface import IDataBase
-from src.services.database.mongo_db import MongoAPI
 
 
 def get_db() -> IDataBase:
-    return MongoAPI()
+    return get_db_class()()
@@ -0,0 +1,25 @@
+from fastapi import Query
+from fastapi.responses import ORJSONResponse
+
+from src.core.models.PageModel import PageParamsModel, PageModel
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def get_page_params(limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+                    after: str | None = None) -> PageParamsModel:
+    """Router dependency with keyset pagination query params"""
+    return PageParamsModel(limit=limit, after=after)
+
+
+def page_response(page: PageModel) -> ORJSONResponse:
+    """
+    Serialize page items straight to json list, cursor of next page is passed in header.
+    Items come from own db, so response model validation of FastAPI is skipped
+    """
+    response = ORJSONResponse([item.dict(by_alias=True) for item in page.items])
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return response
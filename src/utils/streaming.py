@@ -0,0 +1,41 @@
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+# Comment line, keeps idle connection alive through proxies
+SSE_HEARTBEAT = ": ping\n\n"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Client asks for streaming list by "Accept: application/x-ndjson" header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def ndjson_response(models: AsyncIterator[BaseModel]) -> StreamingResponse:
+    """
+    Stream models one json per line.
+    First model is fetched before response starts, so db errors like DBNotFound are raised to router
+    """
+    first_model = await anext(models)
+
+    async def lines() -> AsyncIterator[str]:
+        yield first_model.json(by_alias=True) + "\n"
+        async for model in models:
+            yield model.json(by_alias=True) + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def sse_event(event_id: str, event: str, data: str) -> str:
+    """One server-sent event, data must be one line"""
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Stream server-sent events, proxy buffering is turned off so events are not delayed"""
+    return StreamingResponse(events, media_type=SSE_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})